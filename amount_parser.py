@@ -0,0 +1,75 @@
+# amount_parser.py
+import numpy as np
+import pandas as pd
+
+# One amount: optional sign and currency, digits with ',' (or '.') thousands separators,
+# and an optional trailing minus or Cr/Dr marker (e.g. "-R1,234.50", "1.234.56", "120.00-", "99.10 Dr")
+AMOUNT_PATTERN = (
+    r"(?P<lead>-)?\s*R?\s*(?P<number>\d+(?:\.\d{3})+\.\d{2}(?!\d)|\d[\d,]*(?:\.\d+)?|\.\d+)"
+    r"(?P<trail>-)?(?:\s*(?P<suffix>[CcDd][Rr])\b)?"
+)
+# The same shape anchored to a whole cell, without groups so it runs as one Arrow kernel;
+# the rare '.'-grouped amounts are left to AMOUNT_PATTERN
+SINGLE_AMOUNT_PATTERN = r"(?:-\s*)?R?\s*(?:\d[\d,]*(?:\.\d+)?|\.\d+)-?(?:\s*[CcDd][Rr])?"
+MINUS_PATTERN = r"^-|-\s*(?:[CcDd][Rr])?$"
+MINUS_OR_DEBIT_PATTERN = r"^-|-\s*(?:[CcDd][Rr])?$|[Dd][Rr]$"
+# A space between digit groups, unless the digits before it are the decimals of another amount
+SPACE_THOUSANDS_PATTERN = r"(?<!\.\d)(?<!\.\d\d)(?<=\d) (?=\d{3}(?!\d))"
+
+
+def _signed_tokens(tokens: pd.DataFrame, signed_suffix: bool) -> pd.Series:
+    """Convert AMOUNT_PATTERN matches into signed floats"""
+    # Drop ',' separators and every '.' but the decimal point, as the legacy cleanup did
+    values = pd.to_numeric(tokens['number'].str.replace(r",|\.(?=.*\.)", '', regex=True)).astype('float64')
+    negative = tokens['lead'].notna() | tokens['trail'].notna()
+    if signed_suffix:
+        negative |= tokens['suffix'].str.lower().eq('dr').fillna(False).astype(bool)
+    return values.where(~negative.to_numpy(), -values)
+
+
+def parse_amount_series(series: pd.Series, multi_value: bool = True, signed_suffix: bool = False) -> pd.Series:
+    """Parse a column of statement amounts into floats in a single vectorized stage.
+
+    Cells holding one amount (the bulk of any statement) are matched, stripped
+    and converted column-wide with Arrow string kernels; only the remaining
+    cells are tokenized with AMOUNT_PATTERN. Missing or unparseable cells
+    become 0.0.
+
+    Args:
+        series: Raw cell values (strings, numbers or NaN).
+        multi_value: Sum space-separated amounts in one cell (e.g. "242.20 126.86").
+            When False, spaces between digit groups are read as thousands separators
+            and the last amount in the cell is used.
+        signed_suffix: Treat a "Dr" suffix as negative, as balances are printed.
+
+    Returns:
+        A float64 Series aligned with the input.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce').fillna(0.0).astype('float64')
+
+    text = series.astype('string[pyarrow]').str.strip()
+    result = np.zeros(len(text), dtype=np.float64)
+
+    single = text.str.fullmatch(SINGLE_AMOUNT_PATTERN).fillna(False).to_numpy(dtype=bool)
+    if single.any():
+        cells = text[single]
+        magnitude = cells.str.replace(r"[^\d.]", "", regex=True).astype('float64').to_numpy()
+        negative = cells.str.contains(MINUS_OR_DEBIT_PATTERN if signed_suffix else MINUS_PATTERN)
+        result[single] = np.where(negative.to_numpy(dtype=bool), -magnitude, magnitude)
+
+    # Only cells with several amounts (or stray text) need tokenizing
+    rest_mask = ~single & text.fillna('').ne('').to_numpy(dtype=bool)
+    if rest_mask.any():
+        rest = text[rest_mask].astype(object).reset_index(drop=True)
+        if not multi_value:
+            rest = rest.str.replace(SPACE_THOUSANDS_PATTERN, '', regex=True)
+        tokens = rest.str.extractall(AMOUNT_PATTERN)
+        if not tokens.empty:
+            values = _signed_tokens(tokens, signed_suffix)
+            row = tokens.index.get_level_values(0)
+            amounts = values.groupby(row).sum() if multi_value else values.groupby(row).last()
+            positions = np.flatnonzero(rest_mask)[amounts.index.to_numpy()]
+            result[positions] = amounts.to_numpy(dtype=np.float64)
+
+    return pd.Series(result, index=series.index)
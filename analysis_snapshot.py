@@ -0,0 +1,115 @@
+# analysis_snapshot.py
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
+
+import pandas as pd
+
+from merchant import fee_types
+from summary_engine import TransactionSummary, summarize_transactions
+
+MAX_SNAPSHOTS = 8
+
+
+@dataclass(frozen=True)
+class AnalysisSnapshot:
+    """The transactions one analysis reads, at one dataset version and date range.
+
+    frame is the canonical transactions frame (int64 cents, with a category
+    column), restricted to the dates from start to end when they are given.
+    The intermediates several insights need (the summary with its daily and
+    category totals, the debits, the fee types) are computed on first use and
+    kept with the snapshot. The frame and intermediates are shared by every
+    reader and must be treated as read-only.
+    """
+
+    frame: pd.DataFrame
+    user_id: Optional[str] = None
+    version: Optional[tuple] = None
+    start: Optional[pd.Timestamp] = None
+    end: Optional[pd.Timestamp] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    @cached_property
+    def summary(self) -> TransactionSummary:
+        return summarize_transactions(self.frame)
+
+    @property
+    def daily(self) -> pd.DataFrame:
+        """Totals per day, in cents"""
+        return self.summary.daily
+
+    @property
+    def categories(self) -> pd.DataFrame:
+        """Totals per category, in cents"""
+        return self.summary.categories
+
+    @cached_property
+    def expense_types(self) -> dict:
+        """Category totals in rands, as in get_transaction_summary()['expense_types']"""
+        return self.summary.category_dict()
+
+    @cached_property
+    def debits(self) -> pd.Series:
+        """Amounts of the debit transactions, in cents"""
+        debits = self.frame['debits']
+        return debits[debits > 0]
+
+    @cached_property
+    def fee_types(self) -> pd.Series:
+        """The fee type of each transaction, NaN for non-fees"""
+        return fee_types(self.frame['description'])
+
+    def window(self, start=None, end=None) -> "AnalysisSnapshot":
+        """The snapshot of the transactions dated from start to end (inclusive)"""
+        start = pd.to_datetime(start) if start is not None else None
+        end = pd.to_datetime(end) if end is not None else None
+        frame = self.frame
+        if not frame.empty:
+            mask = pd.Series(True, index=frame.index)
+            if start is not None:
+                mask &= frame['date'] >= start
+            if end is not None:
+                mask &= frame['date'] <= end
+            frame = frame[mask]
+        return AnalysisSnapshot(frame, self.user_id, self.version, start, end)
+
+
+class SnapshotMemo:
+    """Process-wide LRU of analysis snapshots by (user, dataset version, start, end).
+
+    A saved statement changes the dataset version, so snapshots of the old one
+    are no longer looked up and age out. Nothing is memoized without a version.
+    """
+
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+
+    @classmethod
+    def get(cls, key: tuple, build, max_snapshots: int = MAX_SNAPSHOTS) -> AnalysisSnapshot:
+        """Get the snapshot of key, building it with build() if it is not memoized"""
+        if key[1] is None:
+            return build()
+        with cls._lock:
+            snapshot = cls._entries.get(key)
+            if snapshot is not None:
+                cls._entries.move_to_end(key)
+                return snapshot
+
+        snapshot = build()
+        with cls._lock:
+            cls._entries[key] = snapshot
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > max_snapshots:
+                cls._entries.popitem(last=False)
+        return snapshot
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
@@ -0,0 +1,198 @@
+# async_connection.py
+import asyncio
+import logging
+import threading
+
+import pymongo
+from pymongo import AsyncMongoClient
+from pymongo.server_api import ServerApi
+
+from config import Config
+from connection import (CATEGORY_MAPPINGS_PROJECTION, INDEX_TIMEOUT_SECONDS, INDEXES, ROLLUP_PROJECTION,
+                        STATEMENT_INFO_PROJECTION, STATEMENT_INFO_SORT, TRANSACTION_PROJECTION, TRANSACTION_SORT,
+                        IndexBootstrap, rollup_range_query, transaction_range_query)
+from mongo_client import MongoClientManager, PoolStatsListener
+
+
+class AsyncBridge:
+    """Runs coroutines from synchronous (Streamlit) code on one background event loop.
+
+    The loop lives in a daemon thread for the life of the process, so the async
+    client and its connection pool are created once and reused by every rerun.
+    """
+
+    _lock = threading.Lock()
+    _loop = None
+
+    @classmethod
+    def loop(cls) -> asyncio.AbstractEventLoop:
+        with cls._lock:
+            if cls._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="mongo-async", daemon=True).start()
+                cls._loop = loop
+            return cls._loop
+
+    @classmethod
+    def run(cls, coro, timeout: float = None):
+        """Run a coroutine on the background loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, cls.loop()).result(timeout)
+
+
+class AsyncDatabaseConnection:
+    """Asynchronous counterpart of DatabaseConnection's read API.
+
+    Uses pymongo's native AsyncMongoClient, shared process-wide on the
+    AsyncBridge loop, with the same pool settings as the synchronous client.
+    Its pool is separate from the synchronous client's and has its own
+    statistics (see stats()). The INDEXES are ensured before the first query.
+    Independent reads can be awaited together with gather(); synchronous
+    callers use run() to wait for the results.
+    """
+
+    _client = None
+    _uri = None
+    stats_listener = PoolStatsListener()
+
+    def __init__(self):
+        self.config = Config()
+        self.uri = f"mongodb+srv://ubuntupunk:{self.config.db_password}@{self.config.mongodb_url}"
+        self.logger = logging.getLogger(__name__)
+
+    async def _collection(self, collection_name: str, db_name: str = "bankstat"):
+        # Only called on the bridge loop, so the client is created there and never concurrently
+        if AsyncDatabaseConnection._client is None or AsyncDatabaseConnection._uri != self.uri:
+            AsyncDatabaseConnection._client = AsyncMongoClient(
+                self.uri,
+                server_api=ServerApi('1'),
+                event_listeners=[AsyncDatabaseConnection.stats_listener],
+                **MongoClientManager.client_options(self.config)
+            )
+            AsyncDatabaseConnection._uri = self.uri
+            self.logger.info("Created async MongoDB client")
+        db = AsyncDatabaseConnection._client[db_name]
+        await self._ensure_indexes(db)
+        return db[collection_name]
+
+    async def _ensure_indexes(self, db):
+        """Create the INDEXES unless the sync client has, or wait (briefly) while it does"""
+        if IndexBootstrap.done.is_set():
+            return
+        if not IndexBootstrap.claim():
+            await asyncio.to_thread(IndexBootstrap.done.wait, INDEX_TIMEOUT_SECONDS)
+            return
+        try:
+            with pymongo.timeout(INDEX_TIMEOUT_SECONDS):
+                for collection_name, indexes in INDEXES.items():
+                    try:
+                        await db[collection_name].create_indexes(indexes)
+                    except Exception as e:
+                        IndexBootstrap.log_failure(collection_name, e)
+            self.logger.info("Database indexes ensured")
+        finally:
+            IndexBootstrap.done.set()
+
+    @classmethod
+    def stats(cls):
+        """Connection pool and heartbeat statistics of the async client, or None before it is created"""
+        if cls._client is None:
+            return None
+        stats = cls.stats_listener.snapshot()
+        stats['max_pool_size'] = cls._client.options.pool_options.max_pool_size
+        return stats
+
+    def run(self, coro, timeout: float = None):
+        """Wait for a coroutine of this connection from synchronous code"""
+        return AsyncBridge.run(coro, timeout)
+
+    async def gather(self, **reads) -> dict:
+        """Await several reads concurrently, returning their results by name"""
+        results = await asyncio.gather(*reads.values())
+        return dict(zip(reads.keys(), results))
+
+    async def count_documents(self, query: dict = None, collection_name: str = "statements"):
+        """Count documents in the specified collection"""
+        try:
+            collection = await self._collection(collection_name)
+            return await collection.count_documents(query or {})
+        except Exception as e:
+            self.logger.error(f"Failed to count documents: {str(e)}")
+            return 0
+
+    async def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                             projection: dict = None, limit: int = None):
+        """Find documents in the specified collection"""
+        try:
+            collection = await self._collection(collection_name)
+            cursor = collection.find(query or {}, projection)
+            if sort_by:
+                cursor = cursor.sort(sort_by)
+            if limit:
+                cursor = cursor.limit(limit)
+            return await cursor.to_list()
+        except Exception as e:
+            self.logger.error(f"Failed to find documents: {str(e)}")
+            raise
+
+    async def find_transactions(self, user_id: str, start_date, end_date, account: str = None):
+        """Find a user's transactions between two dates (inclusive), sorted by date"""
+        query = transaction_range_query(user_id, start_date, end_date, account)
+        return await self.find_documents(query, "transactions", TRANSACTION_SORT, TRANSACTION_PROJECTION)
+
+    async def find_rollups(self, user_id: str, start_date, end_date):
+        """Find a user's daily category rollups between two dates (inclusive)"""
+        return await self.find_documents(rollup_range_query(user_id, start_date, end_date), "rollups",
+                                         projection=ROLLUP_PROJECTION)
+
+    async def find_category_mappings(self):
+        """Find all category mappings"""
+        return await self.find_documents(collection_name="category_mappings", projection=CATEGORY_MAPPINGS_PROJECTION)
+
+    async def find_statement_info(self, limit: int = None):
+        """Find stored statements' metadata, newest upload first"""
+        return await self.find_documents(sort_by=STATEMENT_INFO_SORT, projection=STATEMENT_INFO_PROJECTION, limit=limit)
+
+
+class AsyncConnectionAdapter:
+    """The AsyncDatabaseConnection read API over an in-process synchronous connection.
+
+    For embedded storage (SQLiteConnection) every read is a local call, so the
+    coroutines simply call the synchronous methods.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def run(self, coro, timeout: float = None):
+        """Wait for a coroutine of this connection from synchronous code"""
+        return AsyncBridge.run(coro, timeout)
+
+    async def gather(self, **reads) -> dict:
+        """Await several reads, returning their results by name"""
+        results = await asyncio.gather(*reads.values())
+        return dict(zip(reads.keys(), results))
+
+    async def count_documents(self, query: dict = None, collection_name: str = "statements"):
+        return self.connection.count_documents(query, collection_name)
+
+    async def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                             projection: dict = None, limit: int = None):
+        return self.connection.find_documents(query, collection_name, sort_by, projection, limit=limit)
+
+    async def find_transactions(self, user_id: str, start_date, end_date, account: str = None):
+        return self.connection.find_transactions(user_id, start_date, end_date, account)
+
+    async def find_rollups(self, user_id: str, start_date, end_date):
+        return self.connection.find_rollups(user_id, start_date, end_date)
+
+    async def find_category_mappings(self):
+        return self.connection.find_documents(collection_name="category_mappings",
+                                              projection=CATEGORY_MAPPINGS_PROJECTION)
+
+    async def find_statement_info(self, limit: int = None):
+        return self.connection.find_documents(sort_by=STATEMENT_INFO_SORT, projection=STATEMENT_INFO_PROJECTION,
+                                              limit=limit)
+
+
+# Global async database connection instance
+async_db_connection = AsyncDatabaseConnection()
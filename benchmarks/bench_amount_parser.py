@@ -0,0 +1,105 @@
+# benchmarks/bench_amount_parser.py
+"""Micro-benchmark the vectorized amount parser against the previous per-cell cleanup.
+
+Run from the repository root:
+    python -m benchmarks.bench_amount_parser
+"""
+import random
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from amount_parser import parse_amount_series
+
+
+def legacy_parse_amounts(series: pd.Series) -> pd.Series:
+    """The previous debits/credits/fees cleanup: per-cell apply plus two regex passes"""
+    def parse_multi_values(x):
+        if pd.isna(x):
+            return 0.0
+        values = str(x).split()
+        total = 0.0
+        for val in values:
+            cleaned = re.sub(r'[^\d.-]', '', val)
+            try:
+                total += float(cleaned)
+            except ValueError:
+                continue
+        return total
+
+    series = series.apply(parse_multi_values)
+    series = series.astype(str).str.replace(r'[^\d.-]', '', regex=True)
+    series = series.str.replace(r'\.(?=.*\.)', '', regex=True)
+    return pd.to_numeric(series, errors='coerce').fillna(0.0)
+
+
+def legacy_parse_balance(series: pd.Series) -> pd.Series:
+    """The previous balance cleanup, which ran the regex passes a second time"""
+    for _ in range(2):
+        series = series.astype(str).str.replace(r'[^\d.-]', '', regex=True)
+        series = series.str.replace(r'\.(?=.*\.)', '', regex=True)
+        series = pd.to_numeric(series, errors='coerce').fillna(0.0)
+    return series
+
+
+def make_cells(rows: int, seed: int = 11) -> pd.Series:
+    """Build a column of amount cells in the shapes Upstage tables contain"""
+    rng = random.Random(seed)
+    cells = []
+    for _ in range(rows):
+        roll = rng.random()
+        amount = rng.uniform(1, 50000)
+        if roll < 0.45:
+            cells.append(f"{amount:,.2f}")
+        elif roll < 0.85:
+            cells.append(None)
+        elif roll < 0.92:
+            cells.append(f"{amount:,.2f} {rng.uniform(1, 500):,.2f}")
+        else:
+            cells.append(f"R{amount:,.2f}")
+    return pd.Series(cells, dtype=object)
+
+
+def _time(func, repeat: int = 3) -> float:
+    """Return the best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    samples = pd.Series(['-R12,675.15', '120.00-', '1,500.00 Cr', '99.10 Dr', '1 234 567.89', None])
+    print("Signed formats:")
+    print(pd.DataFrame({
+        'cell': samples,
+        'debits': parse_amount_series(samples),
+        'balance': parse_amount_series(samples, multi_value=False, signed_suffix=True),
+    }).to_string(index=False))
+    print()
+
+    print(f"{'rows':>8} {'column':>8} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>8}")
+    for rows in (100_000, 500_000):
+        cells = make_cells(rows)
+        np.testing.assert_allclose(parse_amount_series(cells), legacy_parse_amounts(cells))
+
+        old = _time(lambda: legacy_parse_amounts(cells))
+        new = _time(lambda: parse_amount_series(cells))
+        print(f"{rows:>8} {'debits':>8} {old:>11.3f} {new:>15.3f} {old / new:>7.1f}x")
+
+        balances = cells.where(~cells.str.contains(' ', na=False), None)
+        np.testing.assert_allclose(
+            parse_amount_series(balances, multi_value=False, signed_suffix=True),
+            legacy_parse_balance(balances),
+        )
+        old = _time(lambda: legacy_parse_balance(balances))
+        new = _time(lambda: parse_amount_series(balances, multi_value=False, signed_suffix=True))
+        print(f"{rows:>8} {'balance':>8} {old:>11.3f} {new:>15.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
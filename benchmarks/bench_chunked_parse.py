@@ -0,0 +1,67 @@
+# benchmarks/bench_chunked_parse.py
+"""Benchmark page-chunked parallel parsing against single-request parsing.
+
+Both modes run against the local stub API (benchmarks/upstage_stub.py), whose
+latency grows with page count. The stitched chunked payload must produce the
+same transactions as the single request.
+
+Run from the repository root:
+    python -m benchmarks.bench_chunked_parse
+"""
+import logging
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic import make_statement_pdf
+from benchmarks.upstage_stub import start_stub
+from parse_cache import ParseCache
+from pdf_processor import StreamlitBankProcessor
+from processing import StreamlitAnalytics
+
+PAGE_LATENCY = 0.05
+
+
+def _processor(url: str, chunk_pages: int, cache_dir: str) -> StreamlitBankProcessor:
+    """Build a processor pointed at the stub with its own empty parse cache"""
+    processor = StreamlitBankProcessor()
+    processor.api_url = url
+    processor.engine = 'remote'
+    processor.chunk_pages = chunk_pages
+    processor.max_workers = 8
+    processor.cache = ParseCache(cache_dir=cache_dir)
+    return processor
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    server, url = start_stub(page_latency=PAGE_LATENCY)
+    analytics = StreamlitAnalytics()
+
+    print(f"{'pages':>6} {'chunk':>6} {'single (s)':>11} {'chunked (s)':>12} {'speedup':>8}")
+    try:
+        for pages, chunk_pages in ((20, 5), (60, 10), (120, 15)):
+            pdf_bytes = make_statement_pdf(pages=pages, rows_per_page=30)
+            timings = {}
+            frames = {}
+            for mode, chunk in (('single', 0), ('chunked', chunk_pages)):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    processor = _processor(url, chunk, cache_dir)
+                    start = time.perf_counter()
+                    data = processor.parse_pdf_bytes(pdf_bytes, 'synthetic.pdf')
+                    timings[mode] = time.perf_counter() - start
+                frames[mode] = analytics._extract_tables_to_dataframe(data)
+
+            assert len(frames['single']) == pages * 30
+            pd.testing.assert_frame_equal(frames['chunked'], frames['single'])
+            print(f"{pages:>6} {chunk_pages:>6} {timings['single']:>11.2f} {timings['chunked']:>12.2f} "
+                  f"{timings['single'] / timings['chunked']:>7.1f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
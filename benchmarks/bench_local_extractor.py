@@ -0,0 +1,59 @@
+# benchmarks/bench_local_extractor.py
+"""Benchmark the local table extractor against the document-parse API path.
+
+The remote path runs against the local stub API (benchmarks/upstage_stub.py)
+with a simulated per-page latency, so its timings are a lower bound for the
+real endpoint. Both paths must produce the same transactions.
+
+Run from the repository root:
+    python -m benchmarks.bench_local_extractor
+"""
+import logging
+import tempfile
+import time
+import warnings
+
+import pandas as pd
+
+from benchmarks.synthetic import make_statement_pdf
+from benchmarks.upstage_stub import start_stub
+from parse_cache import ParseCache
+from pdf_processor import StreamlitBankProcessor
+from processing import StreamlitAnalytics
+
+PAGE_LATENCY = 0.2
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    server, url = start_stub(page_latency=PAGE_LATENCY)
+    analytics = StreamlitAnalytics()
+
+    print(f"{'pages':>6} {'remote (s)':>11} {'local (s)':>10} {'speedup':>8}")
+    try:
+        for pages in (1, 5, 20):
+            pdf_bytes = make_statement_pdf(pages=pages, rows_per_page=40)
+            timings = {}
+            frames = {}
+            for engine in ('remote', 'local'):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    processor = StreamlitBankProcessor()
+                    processor.api_url = url
+                    processor.engine = engine
+                    processor.cache = ParseCache(cache_dir=cache_dir)
+                    start = time.perf_counter()
+                    data = processor.parse_pdf_bytes(pdf_bytes, 'synthetic.pdf')
+                    timings[engine] = time.perf_counter() - start
+                frames[engine] = analytics._extract_tables_to_dataframe(data)
+
+            assert len(frames['remote']) == pages * 40
+            pd.testing.assert_frame_equal(frames['local'], frames['remote'])
+            print(f"{pages:>6} {timings['remote']:>11.2f} {timings['local']:>10.2f} "
+                  f"{timings['remote'] / timings['local']:>7.1f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
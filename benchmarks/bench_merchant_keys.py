@@ -0,0 +1,116 @@
+# benchmarks/bench_merchant_keys.py
+"""Report merchant-key savings on synthetic card descriptions and time categorization and fee detection.
+
+Descriptions repeat a few merchants with varying card numbers, dates,
+amounts and reference codes, as card purchases do on real statements. To
+measure a real statement instead, pass its Parquet file from the
+transaction store:
+    python -m benchmarks.bench_merchant_keys data/transactions/<hash>.parquet
+
+Run from the repository root:
+    python -m benchmarks.bench_merchant_keys
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_categorizer import legacy_categorize
+from categorizer import DEFAULT_RULES, Categorizer
+from merchant import MerchantMemo, fee_types, key_stats, merchant_keys
+
+MERCHANTS = ['PnP Crp Muizen', 'Woolworths Tokai', 'Uber Trip HELP.UBER.COM', 'Netflix.com', 'Engen Fuel Tokai',
+             'Checkers Hyper', 'Vida e Caffe', 'Takealot.com', 'Monthly account fee', 'ATM withdrawal fee']
+
+
+class _MemoryOnly(MerchantMemo):
+    """A MerchantMemo that keeps entries in memory only"""
+
+    def _load(self, fingerprint, keys):
+        return {}
+
+    def _store(self, fingerprint, categories):
+        pass
+
+
+def make_descriptions(rows: int, seed: int = 9) -> pd.Series:
+    """Build card purchase descriptions with per-transaction card numbers, dates, amounts and references"""
+    rng = np.random.default_rng(seed)
+    merchants = np.array(MERCHANTS, dtype=object)[rng.integers(0, len(MERCHANTS), rows)]
+    cards = np.array(['518103XXXXXX5733', '479912XXXXXX0142', '552233XXXXXX9811'], dtype=object)
+    days = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    card_purchases = cards[rng.integers(0, len(cards), rows)] + ' ' + days.strftime('%d/%m/%y').to_numpy(dtype=object)
+    references = 'REF' + pd.Series(rng.integers(10**6, 10**7, rows)).astype(str).to_numpy(dtype=object)
+    amounts = 'R' + pd.Series(rng.integers(100, 500_000, rows) / 100).map('{:,.2f}'.format).to_numpy(dtype=object)
+    kind = rng.random(rows)
+    suffix = np.where(kind < 0.6, card_purchases, np.where(kind < 0.8, references + ' ' + amounts, ''))
+    return pd.Series(merchants + ' ' + suffix).str.strip().astype('category')
+
+
+def legacy_fee_types(descriptions: pd.Series) -> pd.Series:
+    """The previous bank fee detection: a lowercased contains() over every row, then a row loop"""
+    lowered = descriptions.astype(str).str.lower()
+    mask = lowered.str.contains('fee|charge|service|atm|commission|monthly fee|transaction fee', na=False)
+    types = {}
+    for index, description in lowered[mask].items():
+        if 'atm' in description:
+            types[index] = 'ATM Fees'
+        elif 'service' in description or 'monthly' in description:
+            types[index] = 'Service Fees'
+        elif 'transaction' in description:
+            types[index] = 'Transaction Fees'
+        elif 'commission' in description:
+            types[index] = 'Commission'
+        else:
+            types[index] = 'Other Fees'
+    return pd.Series(types, dtype=object).reindex(descriptions.index)
+
+
+def _time(func, repeat: int = 3) -> float:
+    """Return the best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    if len(sys.argv) > 1:
+        descriptions = pd.read_parquet(sys.argv[1], columns=['description'])['description']
+    else:
+        descriptions = make_descriptions(200_000)
+
+    start = time.perf_counter()
+    keys = merchant_keys(descriptions)
+    first_seconds = time.perf_counter() - start
+    for description, key in list(dict(zip(descriptions.astype(str), keys)).items())[:5]:
+        print(f"{description:<58} -> {key}")
+    stats = key_stats(descriptions)
+    print(f"\n{stats['rows']:,} rows, {stats['descriptions']:,} distinct descriptions, "
+          f"{stats['merchants']:,} merchant keys (distinct-key ratio {stats['ratio']:.4%}, "
+          f"{stats['merchants'] / stats['descriptions']:.2%} of descriptions)")
+    print(f"merchant keys: {first_seconds:.3f}s first time, "
+          f"{_time(lambda: merchant_keys(descriptions)):.3f}s for descriptions seen before\n")
+
+    categorizer = Categorizer(DEFAULT_RULES)
+    memo = _MemoryOnly(None)
+    categories = categorizer.categorize_series(descriptions, memo=memo).astype(object)
+    assert (categories == descriptions.apply(legacy_categorize).astype(object)).all()
+    assert (fee_types(descriptions).fillna('') == legacy_fee_types(descriptions).fillna('')).all()
+
+    # Timed with the match keys already memoized, as on every rerun after the first
+    print(f"{'pass':<34} {'before (s)':>11} {'after (s)':>17}")
+    rows = [
+        ("categorize", lambda: descriptions.apply(legacy_categorize),
+         lambda: categorizer.categorize_series(descriptions, memo=memo)),
+        ("fee detection", lambda: legacy_fee_types(descriptions), lambda: fee_types(descriptions)),
+    ]
+    for name, old, new in rows:
+        print(f"{name:<34} {_time(old):>11.3f} {_time(new):>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_sqlite_backend.py
+"""Benchmark the embedded SQLite storage backend on a synthetic transaction history.
+
+Saves several years of synthetic statements through the same write path as
+the app (fingerprinted upserts and rollups), then times the dashboard's
+date-range reads. Needs no MongoDB service.
+
+Run from the repository root:
+    python -m benchmarks.bench_sqlite_backend
+"""
+import logging
+import os
+import tempfile
+import time
+import warnings
+from datetime import date
+
+from benchmarks.synthetic import make_statement
+from connection import TABLE_ELEMENTS_PROJECTION, statement_period_query
+from financial_analyzer import FinancialAnalyzer
+from processing import StreamlitAnalytics
+from sqlite_connection import SQLiteConnection
+from transaction_store import conform_to_schema, to_documents
+
+USER_ID = 'bench-user'
+
+
+def _time(func, repeat: int = 200) -> float:
+    """Return the mean wall time of func in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    analytics = StreamlitAnalytics()
+    analyzer = FinancialAnalyzer(analytics)
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = SQLiteConnection(os.path.join(directory, 'bench.db'))
+        statement = make_statement(pages=500, rows_per_page=40)
+        df = conform_to_schema(analytics._extract_tables_to_dataframe(statement))
+        documents = to_documents(df, user_id=USER_ID, account='bench', statement_hash='bench')
+
+        start = time.perf_counter()
+        connection.insert_documents([statement])
+        inserted = connection.upsert_transactions(documents)
+        write_seconds = time.perf_counter() - start
+        assert connection.upsert_transactions(documents) == 0
+
+        print(f"saved {inserted:,} transactions ({df['date'].min():%Y-%m-%d} to {df['date'].max():%Y-%m-%d}) "
+              f"in {write_seconds:.2f}s")
+        print(f"{'query':<34} {'rows':>7} {'ms':>8}")
+
+        month = (date(2024, 3, 1), date(2024, 3, 31))
+        history = (df['date'].min().date(), df['date'].max().date())
+        queries = [
+            ("transaction count", lambda: [connection.count_documents({"user_id": USER_ID}, "transactions")]),
+            ("transactions, one month", lambda: connection.find_transactions(USER_ID, *month)),
+            ("rollups, one month", lambda: connection.find_rollups(USER_ID, *month)),
+            ("rollups, full history", lambda: connection.find_rollups(USER_ID, *history)),
+            ("rollup summary, full history", lambda: [analyzer.summary_from_rollups(connection.find_rollups(USER_ID, *history))]),
+            ("statements by period", lambda: connection.find_documents(
+                statement_period_query(*month), projection=TABLE_ELEMENTS_PROJECTION)),
+        ]
+        for name, query in queries:
+            rows = len(query())
+            print(f"{name:<34} {rows:>7,} {_time(query, repeat=20 if rows > 1000 else 200):>8.3f}")
+
+        print()
+        for plan in connection.explain_queries():
+            print(f"{'SCAN  ' if plan['collscan'] else 'index '} {plan['query']:<30} {plan['plan']}")
+        connection.close_connection()
+
+
+if __name__ == '__main__':
+    main()
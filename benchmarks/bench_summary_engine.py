@@ -0,0 +1,86 @@
+# benchmarks/bench_summary_engine.py
+"""Benchmark the vectorized summary engine against the previous per-group dict loops.
+
+Run from the repository root:
+    python -m benchmarks.bench_summary_engine
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from summary_engine import summarize_transactions
+from transaction_store import conform_to_schema, to_rands
+
+CATEGORIES = ['Groceries', 'Transport', 'Utilities', 'Banking', 'Entertainment', 'Insurance',
+              'Shopping', 'Medical', 'Investment', 'Transfer', 'Other', 'Uncategorized']
+
+
+def legacy_summary(transactions_df: pd.DataFrame) -> dict:
+    """The previous get_transaction_summary body: a Python loop over each date and category group"""
+    summary = {
+        'daily_flow': {},
+        'expense_types': {},
+        'total_debits': to_rands(transactions_df['debits'].sum()),
+        'total_credits': to_rands(transactions_df['credits'].sum()),
+        'transaction_count': len(transactions_df)
+    }
+    summary['net_flow'] = summary['total_credits'] - summary['total_debits']
+    for date, group in transactions_df.groupby(transactions_df['date'].dt.date):
+        summary['daily_flow'][str(date)] = {
+            'debits': to_rands(group['debits'].sum()),
+            'credits': to_rands(group['credits'].sum()),
+            'net': to_rands(group['credits'].sum() - group['debits'].sum()),
+            'transaction_count': len(group)
+        }
+    for category, group in transactions_df.groupby('category', observed=True):
+        summary['expense_types'][category] = {
+            'debits': to_rands(group['debits'].sum()),
+            'credits': to_rands(group['credits'].sum()),
+            'net': to_rands(group['credits'].sum() - group['debits'].sum()),
+            'transaction_count': len(group),
+            'avg_transaction': to_rands(group['debits'].mean()) if group['debits'].sum() > 0 else 0
+        }
+    return summary
+
+
+def make_transactions(rows: int, days: int = 3 * 365, seed: int = 5) -> pd.DataFrame:
+    """Build a canonical frame of rows transactions spread over days"""
+    rng = np.random.default_rng(seed)
+    is_debit = rng.random(rows) < 0.8
+    cents = rng.integers(100, 2_000_000, rows)
+    return conform_to_schema(pd.DataFrame({
+        'date': pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, days, rows), unit='D'),
+        'description': pd.Categorical.from_codes(rng.integers(0, 500, rows), [f"Merchant {i}" for i in range(500)]),
+        'debits': np.where(is_debit, cents, 0),
+        'credits': np.where(is_debit, 0, cents),
+        'balance': rng.integers(0, 10_000_000, rows),
+        'category': pd.Categorical.from_codes(rng.integers(0, len(CATEGORIES), rows), CATEGORIES),
+        'fees': np.zeros(rows, dtype=np.int64),
+    }))
+
+
+def _time(func, repeat: int = 3) -> float:
+    """Return the best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'rows':>9} {'legacy (s)':>11} {'engine (s)':>11} {'+ to_dict (s)':>14} {'speedup':>8}")
+    for rows in (100_000, 1_000_000):
+        df = make_transactions(rows)
+        assert summarize_transactions(df).to_dict() == legacy_summary(df)
+
+        old = _time(lambda: legacy_summary(df))
+        new = _time(lambda: summarize_transactions(df))
+        with_dict = _time(lambda: summarize_transactions(df).to_dict())
+        print(f"{rows:>9,} {old:>11.3f} {new:>11.3f} {with_dict:>14.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
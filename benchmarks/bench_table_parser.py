@@ -0,0 +1,71 @@
+# benchmarks/bench_table_parser.py
+"""Benchmark the Upstage table parser against the previous pd.read_html path.
+
+Run from the repository root:
+    python -m benchmarks.bench_table_parser
+"""
+import logging
+import time
+import warnings
+from io import StringIO
+
+import pandas as pd
+
+from benchmarks.synthetic import make_statement
+from processing import StreamlitAnalytics
+
+
+class ReadHtmlAnalytics(StreamlitAnalytics):
+    """StreamlitAnalytics using the previous pd.read_html table reader"""
+
+    def _read_transaction_tables(self, json_data):
+        all_tables = []
+        for page in json_data.get('elements', []):
+            if page.get('category') == 'table':
+                html_table = page.get('content', {}).get('html', "")
+                if html_table:
+                    df = pd.read_html(StringIO(html_table))[0]
+                    if isinstance(df.columns, pd.MultiIndex):
+                        df.columns = df.columns.map('_'.join)
+                    if any(col in df.columns for col in ['Date', 'Description', 'Debits (R)', 'Credits (R)', 'Balance (R)']):
+                        all_tables.append(df)
+        if not all_tables:
+            return None
+        return pd.concat(all_tables, ignore_index=True)
+
+
+def _time(func, repeat: int = 3) -> float:
+    """Return the best wall time of several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter('ignore')
+    reference = ReadHtmlAnalytics()
+    parser = StreamlitAnalytics()
+
+    print(f"{'pages':>6} {'rows':>8} {'stage':>10} {'read_html (s)':>14} {'parser (s)':>11} {'speedup':>8}")
+    for pages in (10, 50, 200):
+        statement = make_statement(pages=pages, rows_per_page=40)
+        expected = reference._extract_tables_to_dataframe(statement)
+        actual = parser._extract_tables_to_dataframe(statement)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+        stages = {
+            'tables': lambda analytics: analytics._read_transaction_tables(statement),
+            'extract': lambda analytics: analytics._extract_tables_to_dataframe(statement),
+        }
+        for stage, run in stages.items():
+            old = _time(lambda: run(reference))
+            new = _time(lambda: run(parser))
+            print(f"{pages:>6} {len(actual):>8} {stage:>10} {old:>14.3f} {new:>11.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
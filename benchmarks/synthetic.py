@@ -0,0 +1,162 @@
+# benchmarks/synthetic.py
+import io
+import random
+from datetime import datetime, timedelta
+
+DESCRIPTIONS = [
+    'Prepaid electricity for 183 Pa',
+    'PnP Crp Muizen518103XXXXXX5733',
+    'CREDIT CARD - 5179890053171078',
+    'BUCO TOKAI 206518103XXXXXX5733',
+    'Woolworths Tokai 518103XXXXXX5733',
+    'Uber Trip HELP.UBER.COM',
+    'Monthly account fee',
+    'ATM withdrawal fee',
+    'Netflix.com 518103XXXXXX5733',
+    'Salary ACME Holdings',
+    'Bruno_Qubes support',
+    'Transfer to savings',
+]
+
+HEADER = ('<thead><tr><td>Tran list no</td><td>Date</td><td>Description</td>'
+          '<td>Fees (R)</td><td>Debits (R)</td><td>Credits (R)</td><td>Balance (R)</td></tr></thead>')
+
+# Column headers and x positions of the tables drawn by make_statement_pdf
+PDF_COLUMNS = ('Date', 'Description', 'Fees (R)', 'Debits (R)', 'Credits (R)', 'Balance (R)')
+PDF_COLUMN_X = (30, 90, 260, 330, 430, 510)
+
+
+def _amount(value: float) -> str:
+    """Format an amount the way the statements print it"""
+    return f"{value:,.2f}"
+
+
+def statement_rows(pages: int = 50, rows_per_page: int = 40, seed: int = 7):
+    """Generate transaction rows per page as (date, description, fees, debits, credits, balance) strings"""
+    rng = random.Random(seed)
+    day = datetime(2023, 1, 1)
+    balance = 5000.0
+
+    for _ in range(pages):
+        rows = []
+        for _ in range(rows_per_page):
+            day += timedelta(days=rng.random() < 0.3)
+            description = rng.choice(DESCRIPTIONS)
+            fees = debits = credits = ""
+            if description.startswith('Salary') or description.startswith('Bruno'):
+                amount = round(rng.uniform(500, 40000), 2)
+                credits = _amount(amount)
+                balance += amount
+            elif 'fee' in description:
+                amount = round(rng.uniform(5, 120), 2)
+                fees = _amount(amount)
+                balance -= amount
+            else:
+                amount = round(rng.uniform(10, 2500), 2)
+                # Upstage sometimes merges two same-day amounts into one cell
+                if rng.random() < 0.05:
+                    extra = round(rng.uniform(10, 500), 2)
+                    debits = f"{_amount(amount)} {_amount(extra)}"
+                    amount += extra
+                else:
+                    debits = _amount(amount)
+                balance -= amount
+            rows.append((day.strftime('%d/%m/%Y'), description, fees, debits, credits, _amount(balance)))
+        yield rows
+
+
+def make_statement(pages: int = 50, rows_per_page: int = 40, seed: int = 7) -> dict:
+    """Build an Upstage-shaped statement payload with one transaction table per page"""
+    elements = []
+
+    for page, page_rows in enumerate(statement_rows(pages, rows_per_page, seed), start=1):
+        rows = [
+            f"<tr><td></td><td>{date}</td><td>{description}</td>"
+            f"<td>{fees}</td><td>{debits}</td><td>{credits}</td><td>{balance}</td></tr>"
+            for date, description, fees, debits, credits, balance in page_rows
+        ]
+
+        table_id = len(elements)
+        html = f"<table id='{table_id}' style='font-size:16px'>{HEADER}<tbody>{''.join(rows)}</tbody></table>"
+        elements.append({
+            'category': 'table',
+            'content': {'html': html, 'markdown': '', 'text': ''},
+            'coordinates': [],
+            'id': table_id,
+            'page': page,
+        })
+        elements.append({
+            'category': 'footer',
+            'content': {'html': f"<footer id='{table_id + 1}'>Page {page} of {pages}</footer>", 'markdown': '', 'text': ''},
+            'coordinates': [],
+            'id': table_id + 1,
+            'page': page,
+        })
+
+    return {
+        'api': '2.0',
+        'model': 'document-parse-250404',
+        'elements': elements,
+        'usage': {'pages': pages},
+        'filename': 'synthetic.pdf',
+        'period': {'start': None, 'end': None},
+    }
+
+
+def _pdf_string(text: str) -> str:
+    """Escape text for a PDF string literal"""
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_statement_pdf(pages: int = 50, rows_per_page: int = 40, seed: int = 7,
+                       repeat_header: bool = True, page_totals: bool = False) -> bytes:
+    """Build a text-based statement PDF with one transaction table per page.
+
+    Each cell is drawn at its column's x position, so the rows match
+    make_statement() and can be recovered from the text layout. Without
+    repeat_header only the first page has a header line; with page_totals
+    each page also has a balance brought forward line, a totals line and a
+    balance carried forward line, as printed statements do.
+    """
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    header = PDF_COLUMNS
+    line_height = 720 / (rows_per_page + 4)
+    balance = _amount(5000.0)
+
+    for page, page_rows in enumerate(statement_rows(pages, rows_per_page, seed), start=1):
+        lines = list(page_rows)
+        if page_totals:
+            debits = sum(float(value.replace(',', '')) for row in page_rows for value in row[3].split())
+            lines = [('', 'Balance brought forward', '', '', '', balance)] + lines + [
+                ('', 'Total', '', _amount(debits), '', ''),
+                ('', 'Balance carried forward', '', '', '', page_rows[-1][5]),
+            ]
+            balance = page_rows[-1][5]
+        if repeat_header or page == 1:
+            lines = [header] + lines
+        commands = []
+        for i, row in enumerate(lines):
+            y = 760 - i * line_height
+            for x, text in zip(PDF_COLUMN_X, row):
+                if text:
+                    commands.append(f"BT /F1 7 Tf 1 0 0 1 {x} {y:.2f} Tm ({_pdf_string(text)}) Tj ET")
+
+        page = writer.add_blank_page(612, 792)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+        })
+        stream = DecodedStreamObject()
+        stream.set_data("\n".join(commands).encode('latin-1'))
+        page[NameObject('/Contents')] = writer._add_object(stream)
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
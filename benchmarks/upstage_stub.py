@@ -0,0 +1,148 @@
+# benchmarks/upstage_stub.py
+"""Local stand-in for the Upstage document-parse endpoint.
+
+Reads the uploaded PDF's text layout with pypdf and answers with an
+Upstage-shaped payload: one table element per page (the first line of text is
+the header row, cells are assigned to the header column at the same x) and a
+footer element. Latency grows linearly with page count, like the real API.
+
+Run from the repository root and point the app at it:
+    python -m benchmarks.upstage_stub --port 8765 --page-latency 0.2
+    UPSTAGE_API_URL=http://localhost:8765/v1/document-ai/document-parse streamlit run streamlit_app.py
+"""
+import argparse
+import email
+import email.policy
+import io
+import json
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pypdf import PdfReader
+
+
+def _page_lines(page):
+    """Group a page's text runs into lines of (x, text), top to bottom"""
+    lines = {}
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if text.strip():
+            lines.setdefault(round(tm[5], 1), []).append((round(tm[4], 1), text.strip()))
+
+    page.extract_text(visitor_text=visit)
+    return [sorted(cells) for _, cells in sorted(lines.items(), reverse=True)]
+
+
+def _table_html(lines, table_id: int) -> str:
+    """Render page lines as table html, aligning cells to the header columns"""
+    header = lines[0]
+    columns = [x for x, _ in header]
+    head = "".join(f"<td>{escape(text)}</td>" for _, text in header)
+    rows = []
+    for line in lines[1:]:
+        cells = [""] * len(columns)
+        for x, text in line:
+            column = min(range(len(columns)), key=lambda i: abs(columns[i] - x))
+            cells[column] = f"{cells[column]} {text}".strip()
+        rows.append("<tr>" + "".join(f"<td>{escape(cell)}</td>" for cell in cells) + "</tr>")
+    return (f"<table id='{table_id}' style='font-size:14px'><thead><tr>{head}</tr></thead>"
+            f"<tbody>{''.join(rows)}</tbody></table>")
+
+
+def parse_document(pdf_bytes: bytes) -> dict:
+    """Build the stub document-parse payload for a PDF"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    elements = []
+    for page_number, page in enumerate(reader.pages, start=1):
+        lines = _page_lines(page)
+        if lines:
+            elements.append({
+                'category': 'table',
+                'content': {'html': _table_html(lines, len(elements)), 'markdown': '', 'text': ''},
+                'coordinates': [],
+                'id': len(elements),
+                'page': page_number,
+            })
+        elements.append({
+            'category': 'footer',
+            'content': {'html': f"<footer id='{len(elements)}'>{page_number}</footer>", 'markdown': '', 'text': ''},
+            'coordinates': [],
+            'id': len(elements),
+            'page': page_number,
+        })
+
+    return {
+        'api': '2.0',
+        'content': {'html': "\n".join(e['content']['html'] for e in elements), 'markdown': '', 'text': ''},
+        'elements': elements,
+        'merged_elements': [],
+        'model': 'document-parse-stub',
+        'ocr': False,
+        'usage': {'pages': len(reader.pages)},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handles multipart POSTs of a 'document' field"""
+
+    page_latency = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        message = email.message_from_bytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body,
+            policy=email.policy.HTTP,
+        )
+        document = next(
+            (part.get_payload(decode=True) for part in message.iter_parts()
+             if part.get_param('name', header='content-disposition') == 'document'),
+            None,
+        )
+        if not document:
+            self._send(400, {'error': 'missing document'})
+            return
+
+        payload = parse_document(document)
+        time.sleep(self.page_latency * payload['usage']['pages'])
+        self._send(200, payload)
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port: int = 0, page_latency: float = 0.0):
+    """Start the stub server on a background thread and return (server, endpoint url)"""
+    handler = type('Handler', (StubHandler,), {'page_latency': page_latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/document-ai/document-parse"
+    return server, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--page-latency', type=float, default=0.2, help="seconds of simulated work per page")
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, args.page_latency)
+    print(f"Serving stub document-parse API at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# categorizer.py
+import functools
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from connection import CATEGORY_MAPPINGS_PROJECTION
+from transaction_store import COLUMN_DEFAULTS
+
+UNCATEGORIZED = COLUMN_DEFAULTS['category']
+
+# Built-in description keywords per category, in priority order
+DEFAULT_KEYWORDS = {
+    'Groceries': ['woolworths', 'checkers', 'pick n pay', 'spar', 'food', 'grocery'],
+    'Transport': ['uber', 'bolt', 'petrol', 'fuel', 'taxi', 'transport', 'parking'],
+    'Utilities': ['electricity', 'water', 'municipal', 'rates', 'internet', 'cell'],
+    'Banking': ['bank', 'fee', 'charge', 'atm', 'service'],
+    'Entertainment': ['movies', 'cinema', 'restaurant', 'bar', 'club', 'entertainment'],
+    'Insurance': ['insurance', 'medical aid', 'cover'],
+    'Shopping': ['clothing', 'retail', 'store', 'shop'],
+    'Medical': ['pharmacy', 'doctor', 'hospital', 'medical', 'clinic'],
+    'Investment': ['investment', 'dividend', 'interest', 'savings'],
+    'Transfer': ['transfer', 'payment', 'deposit']
+}
+
+DEFAULT_RULES = tuple((term, category) for category, terms in DEFAULT_KEYWORDS.items() for term in terms)
+
+
+class Categorizer:
+    """Categorizes descriptions by (term, category) rules, a whole column at a time.
+
+    A description gets the category of the first rule whose term it contains,
+    case-insensitively. Consecutive terms of the same category are compiled
+    into one alternation, which Arrow matches with RE2 (a DFA, so the cost
+    does not grow with the number of terms) over every distinct match key
+    in one vectorized call; branches are applied in rule order, so earlier
+    rules take priority.
+
+    Match keys are lowercased descriptions with each run of digits replaced
+    by '#', so card numbers, dates and references collapse into one key per
+    merchant. Masking is only done while no term contains a digit or '#', so
+    a key always gets the same category as the descriptions it stands for.
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple((str(term).lower(), category) for term, category in rules if str(term).strip())
+        self.branches = [
+            (category, pc.MatchSubstringOptions('|'.join(_escape(term) for term in run), ignore_case=True))
+            for category, run in _category_runs(self.rules)
+        ]
+
+    @functools.cached_property
+    def masks_digits(self) -> bool:
+        """Whether digit runs can be masked in match keys without changing any match"""
+        return not any(re.search(r'[\d#]', term) for term, _ in self.rules)
+
+    def match_keys(self, descriptions) -> list:
+        """The match keys of a sequence of description strings"""
+        keys = pc.utf8_lower(pa.array(descriptions, type=pa.string()))
+        if self.masks_digits:
+            keys = pc.replace_substring_regex(keys, pattern=r'\d+', replacement='#')
+        return keys.to_pylist()
+
+    def categorize_values(self, descriptions, default: str = 'Other') -> np.ndarray:
+        """Categorize a sequence of description strings, returning an array of categories"""
+        descriptions = pa.array(descriptions, type=pa.string())
+        categories = np.full(len(descriptions), default, dtype=object)
+        unmatched = np.ones(len(descriptions), dtype=bool)
+        for category, options in self.branches:
+            if not unmatched.any():
+                break
+            matches = pc.match_substring_regex(descriptions, options=options).to_numpy(zero_copy_only=False)
+            matches &= unmatched
+            categories[matches] = category
+            unmatched &= ~matches
+        return categories
+
+    def categorize(self, description, default: str = 'Other') -> str:
+        """The category of one description"""
+        return self.categorize_series(pd.Series([str(description)]), default).iloc[0]
+
+    @functools.cached_property
+    def fingerprint(self) -> str:
+        """Hash of the rules, identifying this categorizer's results in a MerchantMemo"""
+        return hashlib.sha256(json.dumps(self.rules).encode('utf-8')).hexdigest()[:16]
+
+    def categorize_series(self, descriptions: pd.Series, default: str = 'Other', memo=None) -> pd.Series:
+        """Categorize a column, matching each distinct match key once (or looking it up in memo)"""
+        if not isinstance(descriptions.dtype, pd.CategoricalDtype):
+            descriptions = descriptions.astype(str).astype('category')
+        # One key per distinct description, plus '' for missing descriptions at code -1
+        key_codes, keys = pd.factorize(np.array(
+            self.match_keys(descriptions.cat.categories.astype(str).tolist()) + [''], dtype=object))
+        keys = list(keys)
+        if memo is not None:
+            labels = np.array([default if category is None else category
+                               for category in memo.lookup(self, keys)], dtype=object)
+        else:
+            labels = self.categorize_values(keys, default)
+        label_codes, names = pd.factorize(labels[key_codes])
+        return pd.Series(pd.Categorical.from_codes(label_codes[descriptions.cat.codes.to_numpy()], names),
+                         index=descriptions.index, name='category')
+
+    def tag(self, df: pd.DataFrame, memo=None) -> pd.DataFrame:
+        """Return a copy of a canonical frame with its Uncategorized transactions categorized by the rules"""
+        df = df.copy()
+        if 'category' not in df.columns:
+            df['category'] = UNCATEGORIZED
+        uncategorized = (df['category'] == UNCATEGORIZED).to_numpy()
+        if uncategorized.any():
+            categories = df['category'].astype(object)
+            matched = self.categorize_series(df['description'], default=UNCATEGORIZED, memo=memo).astype(object)
+            categories[uncategorized] = matched[uncategorized]
+            df['category'] = categories.astype('category')
+        return df
+
+
+def _escape(term: str) -> str:
+    """Escape a term for use as a literal in an RE2 pattern"""
+    return re.sub(r'([\\.^$|?*+()\[\]{}])', r'\\\1', term)
+
+
+def _category_runs(rules):
+    """Split rules into runs of consecutive terms with the same category"""
+    runs = []
+    for term, category in rules:
+        if runs and runs[-1][0] == category:
+            runs[-1][1].append(term)
+        else:
+            runs.append((category, [term]))
+    return runs
+
+
+@functools.lru_cache(maxsize=8)
+def compile_categorizer(rules: tuple) -> Categorizer:
+    """The compiled Categorizer of a rules tuple, reused until the rules change"""
+    return Categorizer(rules)
+
+
+def mapping_rules(mappings) -> tuple:
+    """(term, category) rules from category_mappings documents, newest first"""
+    mappings = sorted(mappings, key=lambda mapping: str(mapping.get('created_at') or ''), reverse=True)
+    return tuple((mapping['term'], mapping['category']) for mapping in mappings
+                 if mapping.get('term') and mapping.get('category'))
+
+
+def categorizer_from_mappings(mappings) -> Categorizer:
+    """The categorizer of category_mappings documents, ahead of the built-in keywords"""
+    return compile_categorizer(mapping_rules(mappings) + DEFAULT_RULES)
+
+
+class LoadedCategorizer:
+    """Process-wide memo of the categorizer loaded from a cached connection.
+
+    Kept while the connection's global generation (bumped by category
+    mapping writes) is unchanged, for at most its query cache TTL, which
+    bounds staleness from mapping writes made by other processes.
+    """
+
+    _lock = threading.Lock()
+    _entry = None  # (connection, generation, expires_at, categorizer)
+
+    @classmethod
+    def get(cls, db_connection, load) -> Categorizer:
+        generation = db_connection.generation()
+        with cls._lock:
+            entry = cls._entry
+            if (entry is not None and entry[0] is db_connection and entry[1] == generation
+                    and entry[2] > time.monotonic()):
+                return entry[3]
+        categorizer = load()
+        with cls._lock:
+            cls._entry = (db_connection, generation, time.monotonic() + db_connection.cache.ttl_seconds, categorizer)
+        return categorizer
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entry = None
+
+
+def load_categorizer(db_connection, mappings=None) -> Categorizer:
+    """The categorizer of the stored category mappings, ahead of the built-in keywords.
+
+    Mappings already read (e.g. with other reads in one concurrent round
+    trip) may be passed in. Otherwise they are read from db_connection, once
+    per mappings generation for a CachedConnection (see LoadedCategorizer).
+    """
+    if mappings is not None:
+        return categorizer_from_mappings(mappings)
+
+    def load():
+        try:
+            stored = db_connection.find_documents(collection_name="category_mappings",
+                                                  projection=CATEGORY_MAPPINGS_PROJECTION)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Failed to load category mappings: {str(e)}")
+            stored = []
+        return categorizer_from_mappings(stored)
+
+    if hasattr(db_connection, 'generation'):
+        return LoadedCategorizer.get(db_connection, load)
+    return load()
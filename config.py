@@ -17,6 +17,26 @@ class Config:
         self.auth_server_metadata_url = self._get_secret("AUTH_SERVER_METADATA_URL", ["auth", "server_metadata_url"])
         self.auth_redirect_uri = self._get_secret("AUTH_REDIRECT_URI", ["auth", "redirect_uri"])
         self.auth_cookie_secret = self._get_secret("AUTH_COOKIE_SECRET", ["auth", "cookie_secret"])
+        self.pdf_engine = self._get_secret("PDF_ENGINE", ["pdf", "engine"])
+        self.parse_cache_dir = self._get_secret("PARSE_CACHE_DIR", ["cache", "parse_cache_dir"])
+        self.parse_cache_max_mb = self._get_secret("PARSE_CACHE_MAX_MB", ["cache", "parse_cache_max_mb"])
+        self.transaction_store_max_mb = self._get_secret("TRANSACTION_STORE_MAX_MB", ["cache", "transaction_store_max_mb"])
+        self.upstage_api_url = self._get_secret("UPSTAGE_API_URL", ["upstage", "api_url"])
+        self.upstage_chunk_pages = self._get_secret("UPSTAGE_CHUNK_PAGES", ["upstage", "chunk_pages"])
+        self.upstage_max_workers = self._get_secret("UPSTAGE_MAX_WORKERS", ["upstage", "max_workers"])
+        self.analytics_backend = self._get_secret("ANALYTICS_BACKEND", ["analytics", "backend"])
+        self.storage_backend = self._get_secret("STORAGE_BACKEND", ["storage", "backend"])
+        self.sqlite_path = self._get_secret("SQLITE_PATH", ["storage", "sqlite_path"])
+        self.query_cache_max_entries = self._get_secret("QUERY_CACHE_MAX_ENTRIES", ["cache", "query_cache_max_entries"])
+        self.query_cache_max_documents = self._get_secret("QUERY_CACHE_MAX_DOCUMENTS", ["cache", "query_cache_max_documents"])
+        self.query_cache_ttl_seconds = self._get_secret("QUERY_CACHE_TTL_SECONDS", ["cache", "query_cache_ttl_seconds"])
+        self.result_cache_max_entries = self._get_secret("RESULT_CACHE_MAX_ENTRIES", ["cache", "result_cache_max_entries"])
+        self.mongo_max_pool_size = self._get_secret("MONGO_MAX_POOL_SIZE", ["database", "max_pool_size"])
+        self.mongo_min_pool_size = self._get_secret("MONGO_MIN_POOL_SIZE", ["database", "min_pool_size"])
+        self.mongo_connect_timeout_ms = self._get_secret("MONGO_CONNECT_TIMEOUT_MS", ["database", "connect_timeout_ms"])
+        self.mongo_server_selection_timeout_ms = self._get_secret("MONGO_SERVER_SELECTION_TIMEOUT_MS", ["database", "server_selection_timeout_ms"])
+        self.mongo_wait_queue_timeout_ms = self._get_secret("MONGO_WAIT_QUEUE_TIMEOUT_MS", ["database", "wait_queue_timeout_ms"])
+        self.mongo_heartbeat_frequency_ms = self._get_secret("MONGO_HEARTBEAT_FREQUENCY_MS", ["database", "heartbeat_frequency_ms"])
 
     def _get_secret(self, env_var_name, secrets_path):
         """Helper to get secret from environment variable or st.secrets"""
@@ -1,11 +1,179 @@
 # connection.py
 import streamlit as st
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
+import threading
+import pymongo
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
 from datetime import datetime
 from config import Config
+from mongo_client import MongoClientManager
 import logging
 
+# Statement metadata and the html of table elements only, leaving out the
+# text, markdown, coordinates and images of every other element
+TABLE_ELEMENTS_PROJECTION = {
+    "filename": 1,
+    "period": 1,
+    "statement_hash": 1,
+    "uploaded_at": 1,
+    "elements": {
+        "$map": {
+            "input": {
+                "$filter": {
+                    "input": "$elements",
+                    "as": "element",
+                    "cond": {"$eq": ["$$element.category", "table"]}
+                }
+            },
+            "as": "element",
+            "in": {"category": "$$element.category", "content": {"html": "$$element.content.html"}}
+        }
+    }
+}
+
+# Seconds index creation may take, server selection included, before it gives up
+INDEX_TIMEOUT_SECONDS = 5
+
+# Indexes for every query the app runs, created once per process by ensure_indexes()
+INDEXES = {
+    "statements": [
+        IndexModel([("period.start", ASCENDING), ("period.end", ASCENDING)], name="period_start_end"),
+        IndexModel([("uploaded_at", DESCENDING)], name="uploaded_at"),
+        IndexModel([("statement_hash", ASCENDING)], name="statement_hash"),
+    ],
+    "category_mappings": [
+        IndexModel([("term", ASCENDING)], name="term"),
+    ],
+    "transactions": [
+        IndexModel([("user_id", ASCENDING), ("account", ASCENDING), ("date", ASCENDING)], name="user_account_date"),
+        IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_date"),
+        IndexModel([("user_id", ASCENDING), ("account", ASCENDING), ("fingerprint", ASCENDING)],
+                   name="user_account_fingerprint", unique=True),
+    ],
+    "rollups": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING), ("category", ASCENDING)],
+                   name="user_day_category", unique=True),
+    ],
+    "merchant_categories": [
+        IndexModel([("memo_key", ASCENDING)], name="memo_key", unique=True),
+    ],
+}
+
+
+def statement_period_query(start_date, end_date) -> dict:
+    """Query for statements whose period overlaps the date range, or that have no period"""
+    return {
+        "$or": [
+            {
+                "period.start": {"$lte": end_date.strftime("%Y-%m-%d")},
+                "period.end": {"$gte": start_date.strftime("%Y-%m-%d")}
+            },
+            {
+                "period.start": {"$exists": False}  # Fallback for documents without period
+            }
+        ]
+    }
+
+
+CATEGORY_MAPPINGS_PROJECTION = {"_id": 0, "term": 1, "category": 1, "created_at": 1}
+STATEMENT_INFO_PROJECTION = {"_id": 0, "filename": 1, "period": 1, "statement_hash": 1, "uploaded_at": 1}
+STATEMENT_INFO_SORT = [("uploaded_at", DESCENDING)]
+TRANSACTION_PROJECTION = {"_id": 0, "date": 1, "description": 1, "debits": 1, "credits": 1,
+                          "balance": 1, "category": 1, "fees": 1}
+TRANSACTION_SORT = [("date", ASCENDING), ("seq", ASCENDING)]
+ROLLUP_PROJECTION = {"_id": 0, "day": 1, "category": 1, "debits": 1, "credits": 1, "count": 1}
+
+
+def _day_range(start_date, end_date) -> dict:
+    return {
+        "$gte": datetime.combine(start_date, datetime.min.time()),
+        "$lte": datetime.combine(end_date, datetime.min.time())
+    }
+
+
+def transaction_range_query(user_id: str, start_date, end_date, account: str = None) -> dict:
+    """Query for a user's transactions between two dates (inclusive), optionally for one account"""
+    query = {"user_id": user_id, "date": _day_range(start_date, end_date)}
+    if account is not None:
+        query["account"] = account
+    return query
+
+
+def rollup_range_query(user_id: str, start_date, end_date) -> dict:
+    """Query for a user's daily rollups between two dates (inclusive)"""
+    return {"user_id": user_id, "day": _day_range(start_date, end_date)}
+
+
+def rollup_increments(documents) -> dict:
+    """Total transaction documents per (user_id, day, category) as {key: {debits, credits, count}}.
+
+    Amounts stay in cents. Transactions without a date are not rolled up.
+    """
+    increments = {}
+    for doc in documents:
+        if doc.get('date') is None:
+            continue
+        day = datetime.combine(doc['date'].date(), datetime.min.time())
+        totals = increments.setdefault(
+            (doc['user_id'], day, doc.get('category') or 'Uncategorized'),
+            {'debits': 0, 'credits': 0, 'count': 0}
+        )
+        totals['debits'] += int(doc.get('debits', 0))
+        totals['credits'] += int(doc.get('credits', 0))
+        totals['count'] += 1
+    return increments
+
+
+def query_shapes() -> list:
+    """The app's queries as (collection, name, query, sort), for query plan checks"""
+    today = datetime.now()
+    return [
+        ("statements", "statements by period", statement_period_query(today, today), [("uploaded_at", DESCENDING)]),
+        ("statements", "statements by hash", {"statement_hash": {"$in": [""]}}, None),
+        ("category_mappings", "mappings by term", {"term": ""}, None),
+        ("transactions", "transactions by date range", transaction_range_query("", today, today), TRANSACTION_SORT),
+        ("transactions", "transactions by fingerprint", {"user_id": "", "account": "", "fingerprint": ""}, None),
+        ("rollups", "rollups by date range", rollup_range_query("", today, today), None),
+        ("merchant_categories", "merchant categories by key", {"memo_key": {"$in": [""]}}, None),
+    ]
+
+
+def _plan_stages(plan: dict) -> list:
+    """List the stage names of an explain() plan tree, outermost first"""
+    stages = [plan['stage']] if 'stage' in plan else []
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        stages += _plan_stages(child)
+    return stages
+
+
+class IndexBootstrap:
+    """Process-wide state of INDEXES creation, shared by the sync and async clients.
+
+    The first caller to claim() creates the indexes, once, behind
+    INDEX_TIMEOUT_SECONDS; failures (an unreachable server, a read-only user)
+    are logged and not retried. Others can wait for done.
+    """
+
+    _lock = threading.Lock()
+    _claimed = False
+    done = threading.Event()
+
+    @classmethod
+    def claim(cls) -> bool:
+        """True for the one caller that should create the indexes"""
+        with cls._lock:
+            if cls._claimed:
+                return False
+            cls._claimed = True
+            return True
+
+    @staticmethod
+    def log_failure(collection_name: str, error: Exception):
+        logging.getLogger(__name__).warning(f"Failed to create indexes on {collection_name}: {str(error)}")
+
+
 class DatabaseConnection:
     """Handles MongoDB database connections and operations"""
     
@@ -14,26 +182,17 @@ class DatabaseConnection:
         self.db_password = self.config.db_password
         self.mongodb_url = self.config.mongodb_url
         self.uri = f"mongodb+srv://ubuntupunk:{self.db_password}@{self.mongodb_url}"
-        self._client = None
-        self._db = None
-        self._collection = None
         
         # Set up logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
-    @st.cache_resource
-    def get_client(_self):
-        """Get MongoDB client with caching"""
-        try:
-            if _self._client is None:
-                _self._client = MongoClient(_self.uri, server_api=ServerApi('1'))
-                # Test the connection
-                _self._client.admin.command('ping')
-                _self.logger.info("Successfully connected to MongoDB")
-            return _self._client
+    def get_client(self):
+        """Get the process-wide MongoDB client"""
+        try:
+            return MongoClientManager.get_client(self.uri, self.config)
         except Exception as e:
-            _self.logger.error(f"Failed to connect to MongoDB: {str(e)}")
+            self.logger.error(f"Failed to create MongoDB client: {str(e)}")
             st.error(f"Database connection failed: {str(e)}")
             return None
     
@@ -44,11 +203,9 @@ class DatabaseConnection:
             if client is None:
                 return None
             
-            if self._db is None or self._db.name != db_name:
-                self._db = client[db_name]
-                self.logger.info(f"Connected to database: {db_name}")
-            
-            return self._db
+            db = client[db_name]
+            self.ensure_indexes(db)
+            return db
         except Exception as e:
             self.logger.error(f"Failed to get database {db_name}: {str(e)}")
             return None
@@ -60,11 +217,9 @@ class DatabaseConnection:
             if db is None:
                 return None
             
-            if self._collection is None or self._collection.name != collection_name:
-                self._collection = db[collection_name]
-                self.logger.info(f"Connected to collection: {collection_name}")
-            
-            return self._collection
+            # Collections are cheap views of the shared client; not kept on the instance,
+            # which concurrent sessions share
+            return db[collection_name]
         except Exception as e:
             self.logger.error(f"Failed to get collection {collection_name}: {str(e)}")
             return None
@@ -112,28 +267,241 @@ class DatabaseConnection:
         except Exception as e:
             self.logger.error(f"Failed to insert document: {str(e)}")
             raise
-    
-    def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None):
-        """Find documents in the specified collection"""
+
+    def insert_documents(self, documents: list, collection_name: str = "statements", unique_key: str = "statement_hash"):
+        """Insert several documents in one batch, skipping any whose unique key is already stored.
+
+        Returns:
+            A tuple of (inserted ids, number of skipped documents).
+        """
         try:
             collection = self.get_collection(collection_name)
             if collection is None:
                 raise Exception("Failed to connect to collection")
-            
-            if query is None:
-                query = {}
-            
+
+            keys = [doc[unique_key] for doc in documents if doc.get(unique_key)]
+            existing = set()
+            if keys:
+                existing = set(collection.distinct(unique_key, {unique_key: {"$in": keys}}))
+
+            new_documents = []
+            seen = set()
+            for document in documents:
+                key = document.get(unique_key)
+                if key and (key in existing or key in seen):
+                    continue
+                seen.add(key)
+                document['uploaded_at'] = datetime.now().isoformat()
+                document['processed_by'] = 'streamlit_app'
+                new_documents.append(document)
+
+            if not new_documents:
+                return [], len(documents)
+
+            result = collection.insert_many(new_documents, ordered=False)
+            self.logger.info(f"Inserted {len(result.inserted_ids)} documents, skipped {len(documents) - len(new_documents)}")
+            return result.inserted_ids, len(documents) - len(new_documents)
+
+        except Exception as e:
+            self.logger.error(f"Failed to insert documents: {str(e)}")
+            raise
+
+    def ensure_indexes(self, db):
+        """Create the INDEXES once per process, in a background thread so no page render waits on it.
+
+        Creating an existing index is a no-op on the server.
+        """
+        if IndexBootstrap.done.is_set() or not IndexBootstrap.claim():
+            return
+        threading.Thread(target=self._create_indexes, args=(db,), name="mongo-indexes", daemon=True).start()
+
+    def _create_indexes(self, db):
+        try:
+            # One deadline for all collections: an unreachable server fails them all within it
+            with pymongo.timeout(INDEX_TIMEOUT_SECONDS):
+                for collection_name, indexes in INDEXES.items():
+                    try:
+                        db[collection_name].create_indexes(indexes)
+                    except Exception as e:
+                        IndexBootstrap.log_failure(collection_name, e)
+            self.logger.info("Database indexes ensured")
+        finally:
+            IndexBootstrap.done.set()
+
+    def explain_queries(self):
+        """Explain the app's query shapes and report each winning plan.
+
+        Returns:
+            A list of dicts with the collection, query name, plan stages and whether
+            the plan is a collection scan.
+        """
+        results = []
+        for collection_name, name, query, sort_by in query_shapes():
+            collection = self.get_collection(collection_name)
+            if collection is None:
+                raise Exception(f"Failed to connect to {collection_name} collection")
             cursor = collection.find(query)
-            
             if sort_by:
                 cursor = cursor.sort(sort_by)
-            
-            return list(cursor)
-        
+            stages = _plan_stages(cursor.explain()['queryPlanner']['winningPlan'])
+            results.append({
+                'collection': collection_name,
+                'query': name,
+                'plan': ' <- '.join(stages),
+                'collscan': 'COLLSCAN' in stages,
+            })
+            if 'COLLSCAN' in stages:
+                self.logger.warning(f"Query '{name}' on {collection_name} is a collection scan")
+        return results
+
+    def upsert_transactions(self, documents: list):
+        """Write per-transaction documents in one unordered bulk upsert keyed on their fingerprint.
+
+        Transactions already stored for the user and account, e.g. from an overlapping
+        or re-uploaded statement, are left as they are and not added to the rollups.
+
+        Returns:
+            The number of new transactions.
+        """
+        try:
+            if not documents:
+                return 0
+            collection = self.get_collection("transactions")
+            if collection is None:
+                raise Exception("Failed to connect to transactions collection")
+
+            # Duplicates within the batch (overlapping statements uploaded together) are written once
+            unique_documents = list({
+                (doc['user_id'], doc['account'], doc['fingerprint']): doc for doc in reversed(documents)
+            }.values())[::-1]
+            requests = [
+                UpdateOne(
+                    {"user_id": doc['user_id'], "account": doc['account'], "fingerprint": doc['fingerprint']},
+                    {"$setOnInsert": doc},
+                    upsert=True
+                )
+                for doc in unique_documents
+            ]
+            result = collection.bulk_write(requests, ordered=False)
+
+            new_documents = [unique_documents[index] for index in result.upserted_ids]
+            self.logger.info(f"Inserted {len(new_documents)} transactions, {len(documents) - len(new_documents)} already stored")
+            self.update_rollups(new_documents)
+            return len(new_documents)
+
+        except Exception as e:
+            self.logger.error(f"Failed to upsert transactions: {str(e)}")
+            raise
+
+    def update_rollups(self, documents: list):
+        """Add newly inserted transactions to the daily (user_id, day, category) rollups"""
+        try:
+            increments = rollup_increments(documents)
+            if not increments:
+                return
+            collection = self.get_collection("rollups")
+            if collection is None:
+                raise Exception("Failed to connect to rollups collection")
+
+            requests = [
+                UpdateOne(
+                    {"user_id": user_id, "day": day, "category": category},
+                    {"$inc": totals},
+                    upsert=True
+                )
+                for (user_id, day, category), totals in increments.items()
+            ]
+            collection.bulk_write(requests, ordered=False)
+            self.logger.info(f"Updated {len(requests)} rollups")
+
+        except Exception as e:
+            self.logger.error(f"Failed to update rollups: {str(e)}")
+            raise
+
+    def find_rollups(self, user_id: str, start_date, end_date):
+        """Find a user's daily category rollups between two dates (inclusive)"""
+        try:
+            collection = self.get_collection("rollups")
+            if collection is None:
+                raise Exception("Failed to connect to rollups collection")
+
+            return list(collection.find(rollup_range_query(user_id, start_date, end_date), ROLLUP_PROJECTION))
+
+        except Exception as e:
+            self.logger.error(f"Failed to find rollups: {str(e)}")
+            raise
+
+    def find_transactions(self, user_id: str, start_date, end_date, account: str = None):
+        """Find a user's transactions between two dates (inclusive) as an index range scan.
+
+        Returns:
+            The matching transaction documents sorted by date, without their _id.
+        """
+        try:
+            collection = self.get_collection("transactions")
+            if collection is None:
+                raise Exception("Failed to connect to transactions collection")
+
+            query = transaction_range_query(user_id, start_date, end_date, account)
+            return list(collection.find(query, TRANSACTION_PROJECTION).sort(TRANSACTION_SORT))
+
+        except Exception as e:
+            self.logger.error(f"Failed to find transactions: {str(e)}")
+            raise
+
+    def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                       projection: dict = None, batch_size: int = None, limit: int = None):
+        """Find documents in the specified collection"""
+        try:
+            return list(self.iter_documents(query, collection_name, sort_by, projection, batch_size, limit))
+
         except Exception as e:
             self.logger.error(f"Failed to find documents: {str(e)}")
             raise
-    
+
+    def iter_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                       projection: dict = None, batch_size: int = None, limit: int = None):
+        """Stream documents from the specified collection as the cursor fetches them.
+
+        Args:
+            projection: Fields to return, e.g. TABLE_ELEMENTS_PROJECTION; all fields if None.
+            batch_size: Documents per server round trip; the driver default if None.
+            limit: Maximum number of documents; no limit if None.
+        """
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            raise Exception("Failed to connect to collection")
+
+        if query is None:
+            query = {}
+
+        cursor = collection.find(query, projection)
+
+        if sort_by:
+            cursor = cursor.sort(sort_by)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+
+    def aggregate(self, pipeline: list, collection_name: str = "statements"):
+        """Run an aggregation pipeline on the specified collection and return its result documents"""
+        try:
+            collection = self.get_collection(collection_name)
+            if collection is None:
+                raise Exception("Failed to connect to collection")
+
+            return list(collection.aggregate(pipeline))
+
+        except Exception as e:
+            self.logger.error(f"Failed to run aggregation: {str(e)}")
+            raise
+
     def count_documents(self, query: dict = None, collection_name: str = "statements"):
         """Count documents in the specified collection"""
         try:
@@ -150,15 +518,15 @@ class DatabaseConnection:
             self.logger.error(f"Failed to count documents: {str(e)}")
             return 0
     
+    def pool_stats(self):
+        """Connection pool and heartbeat statistics of the process-wide client"""
+        return MongoClientManager.stats()
+
     def close_connection(self):
-        """Close database connection"""
-        try:
-            if self._client:
-                self._client.close()
-                self._client = None
-                self._db = None
-                self._collection = None
-                self.logger.info("Database connection closed")
+        """Close the process-wide client; it is recreated on next use"""
+        try:
+            MongoClientManager.close()
+            self.logger.info("Database connection closed")
         except Exception as e:
             self.logger.error(f"Error closing connection: {str(e)}")
 
@@ -2,8 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from transaction_store import to_rands, amounts_in_rands
 
-def create_dashboard_metrics(analyzer, start_date, end_date, transactions_df=None):
+def create_dashboard_metrics(analyzer, start_date, end_date, transactions_df=None, summary=None):
     """Create key financial metrics display"""
     col1, col2, col3, col4 = st.columns(4)
 
@@ -15,7 +16,6 @@ def create_dashboard_metrics(analyzer, start_date, end_date, transactions_df=Non
         if transactions_df is not None and not transactions_df.empty:
             # Filter by date range if not already filtered
             if 'date' in transactions_df.columns:
-                transactions_df['date'] = pd.to_datetime(transactions_df['date'], errors='coerce')
                 if len(transactions_df) > 0:
                     date_range_filtered = transactions_df[
                         (transactions_df['date'] >= pd.to_datetime(start_date)) &
@@ -26,16 +26,16 @@ def create_dashboard_metrics(analyzer, start_date, end_date, transactions_df=Non
             
             # Debug: Show data summary
             st.write("**Debug: Transaction Data Summary**")
-            st.write(transactions_df[['debits', 'credits', 'balance']].describe())
+            st.write(amounts_in_rands(transactions_df[['debits', 'credits', 'balance']]).describe())
             st.write("**Debug: Sample Transactions**")
-            st.write(transactions_df[['date', 'description', 'debits', 'credits', 'balance']].head())
+            st.write(amounts_in_rands(transactions_df[['date', 'description', 'debits', 'credits', 'balance']].head()))
             
-            # Get transaction summary with the filtered data
-            summary = analyzer.get_transaction_summary(transactions_df)
+            # Get transaction summary with the filtered data, unless one was given (e.g. from rollups)
+            if summary is None:
+                summary = analyzer.summarize(transactions_df)
             
-            # Calculate metrics from the data we have
-            total_income = transactions_df['credits'].sum() if 'credits' in transactions_df.columns else 0
-            total_expenses = transactions_df['debits'].sum() if 'debits' in transactions_df.columns else 0
+            total_income = to_rands(summary.total_credits)
+            total_expenses = to_rands(summary.total_debits)
             
             # Try to get balance data from analyzer, fallback to simple calculation
             try:
@@ -45,7 +45,7 @@ def create_dashboard_metrics(analyzer, start_date, end_date, transactions_df=Non
                 )
                 avg_balance = balance_data.get('average_balance', 0)
             except:
-                avg_balance = transactions_df['balance'].mean() if 'balance' in transactions_df.columns else 0
+                avg_balance = to_rands(transactions_df['balance'].mean()) if 'balance' in transactions_df.columns else 0
 
             with col1:
                 st.metric("💰 Total Income", f"R {total_income:,.2f}")
@@ -75,28 +75,18 @@ def create_dashboard_metrics(analyzer, start_date, end_date, transactions_df=Non
     except Exception as e:
         st.error(f"Error calculating metrics: {str(e)}")
 
-def create_expense_breakdown_chart(summary_data):
+def create_expense_breakdown_chart(summary):
     """Create expense breakdown visualization"""
     try:
-        expense_types = summary_data.get('expense_types', {})
-        if not expense_types:
+        if summary.categories.empty:
             st.warning("No expense data available")
             return
 
-        categories = []
-        amounts = []
-
-        for category, data in expense_types.items():
-            if isinstance(data, dict) and 'debits' in data:
-                debits = data['debits']
-                if debits > 0:
-                    categories.append(category)
-                    amounts.append(debits)
-
-        if categories and amounts:
+        expenses = summary.categories[summary.categories['debits'] > 0]
+        if not expenses.empty:
             df_expenses = pd.DataFrame({
-                'Category': categories,
-                'Amount': amounts
+                'Category': expenses.index.astype(str),
+                'Amount': to_rands(expenses['debits']).to_numpy()
             })
 
             fig = px.pie(df_expenses, values='Amount', names='Category',
@@ -110,48 +100,34 @@ def create_expense_breakdown_chart(summary_data):
     except Exception as e:
         st.error(f"Error creating expense chart: {str(e)}")
 
-def create_cash_flow_chart(summary_data):
+def create_cash_flow_chart(summary):
     """Create cash flow over time visualization"""
     try:
-        daily_flow = summary_data.get('daily_flow', {})
-        if not daily_flow:
+        if summary.daily.empty:
             st.warning("No daily flow data available")
             return
 
-        dates = []
-        debits = []
-        credits = []
-
-        for date_str, data in daily_flow.items():
-            if isinstance(data, dict):
-                dates.append(pd.to_datetime(date_str))
-                debits.append(data.get('debits', 0))
-                credits.append(data.get('credits', 0))
-
-        if dates:
-            df_flow = pd.DataFrame({
-                'Date': dates,
-                'Expenses': debits,
-                'Income': credits
-            })
-            df_flow = df_flow.sort_values('Date')
+        # Daily totals are already sorted by day
+        df_flow = pd.DataFrame({
+            'Date': summary.daily.index,
+            'Expenses': to_rands(summary.daily['debits']).to_numpy(),
+            'Income': to_rands(summary.daily['credits']).to_numpy()
+        })
 
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df_flow['Date'], y=df_flow['Income'],
-                                   mode='lines+markers', name='Income',
-                                   line=dict(color='green')))
-            fig.add_trace(go.Scatter(x=df_flow['Date'], y=df_flow['Expenses'],
-                                   mode='lines+markers', name='Expenses',
-                                   line=dict(color='red')))
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=df_flow['Date'], y=df_flow['Income'],
+                               mode='lines+markers', name='Income',
+                               line=dict(color='green')))
+        fig.add_trace(go.Scatter(x=df_flow['Date'], y=df_flow['Expenses'],
+                               mode='lines+markers', name='Expenses',
+                               line=dict(color='red')))
 
-            fig.update_layout(title="Daily Cash Flow",
-                              xaxis_title="Date",
-                              yaxis_title="Amount (R)",
-                              hovermode='x unified')
+        fig.update_layout(title="Daily Cash Flow",
+                          xaxis_title="Date",
+                          yaxis_title="Amount (R)",
+                          hovermode='x unified')
 
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("No cash flow data to display")
+        st.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
-        st.error(f"Error creating cash flow chart: {str(e)}")
\ No newline at end of file
+        st.error(f"Error creating cash flow chart: {str(e)}")
@@ -5,16 +5,33 @@ from typing import Dict, List, Tuple, Optional
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from connection import DatabaseConnection
+from storage import get_db_connection, storage_backend
 from config import Config
 from financial_insights import FinancialInsights
+from mongo_analytics import MongoAnalytics
+from categorizer import Categorizer, load_categorizer
+from merchant import MerchantMemo
+from summary_engine import TransactionSummary, summarize_rollups, summarize_transactions
+from analysis_snapshot import AnalysisSnapshot, SnapshotMemo
+from result_memo import get_result_memo, memoized, skip_memo
+
+# Where range summaries are computed: in-process with pandas, or in MongoDB aggregation pipelines
+ANALYTICS_BACKENDS = ('pandas', 'mongo')
 
 class FinancialAnalyzer:
     def __init__(self, base_analyzer):
         self.analyzer = base_analyzer
         self.log_file = open("financial_analyzer.log", "a")
         self.config = Config()
-        self.db_connection = DatabaseConnection()
+        self.db_connection = get_db_connection()
+        self.result_memo = get_result_memo()
+        self.backend = (self.config.analytics_backend or 'pandas').lower()
+        if self.backend not in ANALYTICS_BACKENDS:
+            raise ValueError(f"ANALYTICS_BACKEND must be one of {', '.join(ANALYTICS_BACKENDS)}, got '{self.backend}'")
+        if self.backend == 'mongo' and storage_backend() != 'mongo':
+            raise ValueError("ANALYTICS_BACKEND 'mongo' needs STORAGE_BACKEND 'mongo'")
+        # Aggregation pipelines run only on MongoDB storage
+        self.mongo_analytics = MongoAnalytics(self.db_connection) if self.backend == 'mongo' else None
         self.insights = FinancialInsights(self)
         self._log("initialising FinancialAnalyser...")
     
@@ -38,39 +55,29 @@ class FinancialAnalyzer:
             self._log(f"Error connecting to database: {str(e)}")
             raise
 
+    def categorizer(self, mappings=None) -> Categorizer:
+        """The compiled categorizer of the current (or the given) category mappings and built-in keywords"""
+        return load_categorizer(self.db_connection, mappings)
+
+    def categorize(self, transactions_df: pd.DataFrame, mappings=None) -> pd.DataFrame:
+        """Return a copy of a canonical frame with its Uncategorized transactions categorized"""
+        return self.categorizer(mappings).tag(transactions_df, MerchantMemo(self.db_connection))
+
     def _categorize_transaction(self, description: str) -> str:
-        """Simple transaction categorization based on description keywords"""
-        description_lower = str(description).lower()
-        
-        categories = {
-            'Groceries': ['woolworths', 'checkers', 'pick n pay', 'spar', 'food', 'grocery'],
-            'Transport': ['uber', 'bolt', 'petrol', 'fuel', 'taxi', 'transport', 'parking'],
-            'Utilities': ['electricity', 'water', 'municipal', 'rates', 'internet', 'cell'],
-            'Banking': ['bank', 'fee', 'charge', 'atm', 'service'],
-            'Entertainment': ['movies', 'cinema', 'restaurant', 'bar', 'club', 'entertainment'],
-            'Insurance': ['insurance', 'medical aid', 'cover'],
-            'Shopping': ['clothing', 'retail', 'store', 'shop'],
-            'Medical': ['pharmacy', 'doctor', 'hospital', 'medical', 'clinic'],
-            'Investment': ['investment', 'dividend', 'interest', 'savings'],
-            'Transfer': ['transfer', 'payment', 'deposit']
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in description_lower for keyword in keywords):
-                return category
-        
-        return 'Other'
-
-    @st.cache_data
-    def get_transaction_summary(_self: "FinancialAnalyzer", transactions_df: Optional[pd.DataFrame] = None) -> Dict:
+        """Categorize one transaction description"""
+        return self.categorizer().categorize(description)
+
+    @memoized
+    def get_transaction_summary(self, transactions_df: Optional[pd.DataFrame] = None) -> Dict:
         """Generate comprehensive transaction summary from the provided or base analyzer's data"""
         try:
             # Use provided transactions_df or load from processor
             if transactions_df is None or transactions_df.empty:
                 try:
-                    transactions_df = _self.analyzer.process_latest_json()
+                    transactions_df = self.analyzer.process_latest_json()
                 except AttributeError as e:
-                    _self._log(f"Error: BankStatementProcessor missing process_latest_json: {str(e)}")
+                    skip_memo()
+                    self._log(f"Error: BankStatementProcessor missing process_latest_json: {str(e)}")
                     return {
                         'daily_flow': {},
                         'expense_types': {},
@@ -81,7 +88,7 @@ class FinancialAnalyzer:
                     }
             
             if transactions_df.empty:
-                _self._log("No transactions available in DataFrame")
+                self._log("No transactions available in DataFrame")
                 return {
                     'daily_flow': {},
                     'expense_types': {},
@@ -96,8 +103,8 @@ class FinancialAnalyzer:
             available_columns = transactions_df.columns.tolist()
             missing_columns = [col for col in required_columns if col not in available_columns]
             if missing_columns:
-                _self._log(f"Missing columns in transactions_df: {missing_columns}")
-                _self._log(f"Available columns: {available_columns}")
+                self._log(f"Missing columns in transactions_df: {missing_columns}")
+                self._log(f"Available columns: {available_columns}")
                 return {
                     'daily_flow': {},
                     'expense_types': {},
@@ -107,61 +114,11 @@ class FinancialAnalyzer:
                     'transaction_count': 0
                 }
             
-            summary = {
-                'daily_flow': {},
-                'expense_types': {},
-                'total_debits': 0,
-                'total_credits': 0,
-                'net_flow': 0,
-                'transaction_count': len(transactions_df)
-            }
-            
-            # Calculate totals
-            summary['total_debits'] = transactions_df['debits'].sum()
-            summary['total_credits'] = transactions_df['credits'].sum()
-            summary['net_flow'] = summary['total_credits'] - summary['total_debits']
-            
-            # Daily flow analysis
-            transactions_df['date'] = pd.to_datetime(transactions_df['date'], errors='coerce')
-            daily_groups = transactions_df.groupby(transactions_df['date'].dt.date)
-            
-            for date, group in daily_groups:
-                date_str = str(date)
-                summary['daily_flow'][date_str] = {
-                    'debits': group['debits'].sum(),
-                    'credits': group['credits'].sum(),
-                    'net': group['credits'].sum() - group['debits'].sum(),
-                    'transaction_count': len(group)
-                }
-            
-            # Category/expense type analysis
-            if 'category' in transactions_df.columns:
-                category_groups = transactions_df.groupby('category')
-                for category, group in category_groups:
-                    summary['expense_types'][category] = {
-                        'debits': group['debits'].sum(),
-                        'credits': group['credits'].sum(),
-                        'net': group['credits'].sum() - group['debits'].sum(),
-                        'transaction_count': len(group),
-                        'avg_transaction': group['debits'].mean() if group['debits'].sum() > 0 else 0
-                    }
-            else:
-                # If no category column, try to group by description patterns
-                transactions_df['simple_category'] = transactions_df['description'].apply(_self._categorize_transaction)
-                category_groups = transactions_df.groupby('simple_category')
-                for category, group in category_groups:
-                    summary['expense_types'][category] = {
-                        'debits': group['debits'].sum(),
-                        'credits': group['credits'].sum(),
-                        'net': group['credits'].sum() - group['debits'].sum(),
-                        'transaction_count': len(group),
-                        'avg_transaction': group['debits'].mean() if group['debits'].sum() > 0 else 0
-                    }
-            
-            return summary
+            return self.summarize(transactions_df).to_dict()
             
         except Exception as e:
-            _self._log(f"Error generating transaction summary: {str(e)}")
+            skip_memo()
+            self._log(f"Error generating transaction summary: {str(e)}")
             st.error(f"Error generating transaction summary: {str(e)}")
             return {
                 'daily_flow': {},
@@ -172,11 +129,89 @@ class FinancialAnalyzer:
                 'transaction_count': 0
             }
 
-    @st.cache_data
-    def add_category_mapping(_self, term: str, category: str, category_type: str) -> bool:
+    def summarize(self, transactions_df: Optional[pd.DataFrame] = None) -> TransactionSummary:
+        """Summarize the provided or base analyzer's transactions into daily and category totals"""
+        if transactions_df is None or transactions_df.empty:
+            return self.snapshot().summary
+        if 'category' in transactions_df.columns:
+            return summarize_transactions(transactions_df)
+        # If no category column, group by description patterns
+        return summarize_transactions(transactions_df, self.categorizer().categorize_series(transactions_df['description']))
+
+    def dataset_version(self):
+        """Version of the base analyzer's latest statement, or None if it has none"""
+        try:
+            return self.analyzer.dataset_version()
+        except AttributeError:
+            return None
+
+    def dataset_fingerprint(self, user_id: Optional[str] = None):
+        """Identifies the data results are computed from: the statement version and the user's database generation.
+
+        None while there is no statement, in which case nothing is memoized.
+        """
+        version = self.dataset_version()
+        if version is None:
+            return None
+        return version + self.db_connection.generation(user_id)
+
+    def snapshot(self, start_date=None, end_date=None, user_id: Optional[str] = None) -> AnalysisSnapshot:
+        """The analysis snapshot of the latest statement, restricted to a date range if one is given.
+
+        Snapshots are built once per (user, dataset version, date range), from
+        one load of the statement, and shared by every insight.
+        """
+        version = self.dataset_version()
+        start = pd.to_datetime(start_date) if start_date is not None else None
+        end = pd.to_datetime(end_date) if end_date is not None else None
+
+        def build():
+            if start is not None or end is not None:
+                return self.snapshot(user_id=user_id).window(start, end)
+            return AnalysisSnapshot(self._snapshot_frame(), user_id, version)
+        return SnapshotMemo.get((user_id, version, start, end), build)
+
+    def _snapshot_frame(self) -> pd.DataFrame:
+        transactions_df = self.process_latest_json()
+        if transactions_df is None:
+            return pd.DataFrame()
+        if not transactions_df.empty and 'category' not in transactions_df.columns:
+            # If no category column, group by description patterns
+            transactions_df = transactions_df.assign(
+                category=self.categorizer().categorize_series(transactions_df['description']))
+        return transactions_df
+
+    def get_range_summary(self, user_id: str, start_date, end_date) -> TransactionSummary:
+        """Generate the transaction summary for a user's date range with the configured backend"""
+        if self.backend == 'mongo':
+            try:
+                return self.mongo_analytics.transaction_summary(user_id, start_date, end_date)
+            except Exception as e:
+                skip_memo()
+                self._log(f"Error aggregating transaction summary: {str(e)}")
+                st.error(f"Error aggregating transaction summary: {str(e)}")
+                return TransactionSummary.empty()
+        return self.get_rollup_summary(user_id, start_date, end_date)
+
+    def get_rollup_summary(self, user_id: str, start_date, end_date) -> TransactionSummary:
+        """Generate the transaction summary for a date range from the user's daily category rollups"""
+        try:
+            rollups = self.db_connection.find_rollups(user_id, start_date, end_date)
+            return self.summary_from_rollups(rollups)
+        except Exception as e:
+            skip_memo()
+            self._log(f"Error generating rollup summary: {str(e)}")
+            st.error(f"Error generating rollup summary: {str(e)}")
+            return TransactionSummary.empty()
+
+    def summary_from_rollups(self, rollups: List[Dict]) -> TransactionSummary:
+        """Summarize rollup documents into daily and category totals"""
+        return summarize_rollups(rollups)
+
+    def add_category_mapping(self, term: str, category: str, category_type: str) -> bool:
         """Add a new category mapping"""
         try:
-            collection = _self.db_connection.get_collection("category_mappings")
+            collection = self.db_connection.get_collection("category_mappings")
             if collection is None:
                 raise Exception("Failed to connect to category_mappings collection")
             
@@ -187,11 +222,14 @@ class FinancialAnalyzer:
                 'created_at': datetime.now().isoformat()
             }
             result = collection.insert_one(mapping)
-            _self._log(f"Added category mapping: '{term}' -> '{category}' ({category_type}), ID: {result.inserted_id}")
+            # Category mappings are shared by every user
+            self.db_connection.invalidate()
+            self.result_memo.invalidate()
+            self._log(f"Added category mapping: '{term}' -> '{category}' ({category_type}), ID: {result.inserted_id}")
             return True
         except Exception as e:
             st.error(f"Error adding category mapping: {str(e)}")
-            _self._log(f"Error adding category mapping: {str(e)}")
+            self._log(f"Error adding category mapping: {str(e)}")
             return False
 
     def process_latest_json(self):
@@ -202,9 +240,9 @@ class FinancialAnalyzer:
             self._log(f"Error: BankStatementProcessor missing process_latest_json: {str(e)}")
             return pd.DataFrame()
 
-    def get_monthly_trends(self, months: int = 6):
+    def get_monthly_trends(self, months: int = 6, user_id: Optional[str] = None):
         """Get monthly spending trends - delegated to insights module"""
-        return self.insights.get_monthly_trends(months)
+        return self.insights.get_monthly_trends(months, user_id)
 
     def get_category_insights(self):
         """Get category insights - delegated to insights module"""
@@ -226,6 +264,6 @@ class FinancialAnalyzer:
         """Calculate monthly average balance - delegated to insights module"""
         return self.insights.calculate_monthly_average_balance(start_date, end_date)
 
-    def analyze_bank_fees(self, start_date: str, end_date: str):
+    def analyze_bank_fees(self, start_date: str, end_date: str, user_id: Optional[str] = None):
         """Analyze bank fees - delegated to insights module"""
-        return self.insights.analyze_bank_fees(start_date, end_date)
\ No newline at end of file
+        return self.insights.analyze_bank_fees(start_date, end_date, user_id)
\ No newline at end of file
@@ -1,56 +1,52 @@
 # financial_insights.py
 import streamlit as st
-import pandas as pd
-import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+from transaction_store import to_rands
+from result_memo import memoized, skip_memo
 
 class FinancialInsights:
     """Handles all financial analysis and insights generation"""
     
     def __init__(self, analyzer):
         self.analyzer = analyzer
+
+    @property
+    def result_memo(self):
+        return self.analyzer.result_memo
+
+    def dataset_fingerprint(self, user_id: Optional[str] = None):
+        return self.analyzer.dataset_fingerprint(user_id)
     
-    @st.cache_data
-    def get_monthly_trends(_self, months: int = 6) -> Dict:
-        """Get monthly spending trends for the last N months"""
+    @memoized(daily=True)
+    def get_monthly_trends(self, months: int = 6, user_id: Optional[str] = None) -> Dict:
+        """Get monthly spending trends for the last N months, from the user's rollups if a user is given"""
         try:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=months * 30)
             
-            summary = _self.analyzer.get_transaction_summary()
-            daily_flow = summary.get('daily_flow', {})
-            
-            # Group by month
-            monthly_data = {}
-            for date_str, data in daily_flow.items():
-                try:
-                    date = pd.to_datetime(date_str)
-                    if date >= start_date:
-                        month_key = date.strftime('%Y-%m')
-                        
-                        if month_key not in monthly_data:
-                            monthly_data[month_key] = {'debits': 0, 'credits': 0, 'net': 0}
-                        
-                        monthly_data[month_key]['debits'] += data.get('debits', 0)
-                        monthly_data[month_key]['credits'] += data.get('credits', 0)
-                        monthly_data[month_key]['net'] += data.get('net', 0)
-                        
-                except Exception:
-                    continue
-            
-            return monthly_data
+            if user_id is not None and self.analyzer.backend == 'mongo':
+                return self.analyzer.mongo_analytics.monthly_trends(user_id, start_date)
+            if user_id is not None:
+                summary = self.analyzer.get_rollup_summary(user_id, start_date.date(), end_date.date())
+            else:
+                summary = self.analyzer.snapshot().summary
+            
+            # Group the daily totals by month
+            daily = summary.daily[summary.daily.index >= start_date]
+            monthly = daily[['debits', 'credits', 'net']].groupby(daily.index.strftime('%Y-%m')).sum()
+            return to_rands(monthly).to_dict('index')
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error calculating monthly trends: {str(e)}")
             return {}
     
-    @st.cache_data
-    def get_category_insights(_self) -> Dict:
+    @memoized
+    def get_category_insights(self) -> Dict:
         """Get insights about spending categories"""
         try:
-            summary = _self.analyzer.get_transaction_summary()
-            expense_types = summary.get('expense_types', {})
+            expense_types = self.analyzer.snapshot().expense_types
             
             insights = {
                 'top_categories': [],
@@ -85,19 +81,20 @@ class FinancialInsights:
             return insights
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error getting category insights: {str(e)}")
             return {}
     
-    @st.cache_data
-    def detect_unusual_transactions(_self, threshold_multiplier: float = 2.0) -> List[Dict]:
+    @memoized
+    def detect_unusual_transactions(self, threshold_multiplier: float = 2.0) -> List[Dict]:
         """Detect transactions that are unusually large compared to typical amounts"""
         try:
-            transactions_df = _self.analyzer.analyzer.process_latest_json()
-            if transactions_df.empty:
+            snapshot = self.analyzer.snapshot()
+            if snapshot.empty:
                 return []
             
-            # Calculate mean and std for debits
-            debits = transactions_df[transactions_df['debits'] > 0]['debits']
+            # Calculate mean and std for debits (in cents)
+            debits = snapshot.debits
             if len(debits) < 2:
                 return []
             
@@ -105,37 +102,26 @@ class FinancialInsights:
             std_debit = debits.std()
             threshold = mean_debit + (threshold_multiplier * std_debit)
             
-            # Find unusual transactions
-            unusual = transactions_df[transactions_df['debits'] > threshold]
+            # Find unusual transactions; the snapshot frame always has a category column
+            unusual = snapshot.frame[snapshot.frame['debits'] > threshold]
             
             # Prepare return data
-            result = []
-            for _, row in unusual.iterrows():
-                transaction = {
-                    'date': str(row['date']),
-                    'description': row['description'],
-                    'debits': row['debits'],
-                }
-                
-                # Add category if available
-                if 'category' in row:
-                    transaction['category'] = row['category']
-                else:
-                    transaction['category'] = _self.analyzer._categorize_transaction(row['description'])
-                    
-                result.append(transaction)
-            
-            return result
+            return [
+                {'date': str(date), 'description': description, 'debits': to_rands(debit), 'category': category}
+                for date, description, debit, category in zip(
+                    unusual['date'], unusual['description'], unusual['debits'].tolist(), unusual['category'])
+            ]
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error detecting unusual transactions: {str(e)}")
             return []
     
-    @st.cache_data
-    def generate_budget_recommendations(_self) -> Dict:
+    @memoized
+    def generate_budget_recommendations(self) -> Dict:
         """Generate budget recommendations based on spending patterns"""
         try:
-            insights = _self.get_category_insights()
+            insights = self.get_category_insights()
             total_expenses = insights.get('total_expenses', 0)
             category_percentages = insights.get('category_percentages', {})
             
@@ -191,27 +177,27 @@ class FinancialInsights:
             return recommendations
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error generating recommendations: {str(e)}")
             return {}
     
-    @st.cache_data
-    def get_spending_velocity(_self, days: int = 30) -> Dict:
+    @memoized(daily=True)
+    def get_spending_velocity(self, days: int = 30) -> Dict:
         """Calculate spending velocity (rate of spending over time)"""
         try:
-            transactions_df = _self.analyzer.analyzer.process_latest_json()
-            if transactions_df.empty:
+            snapshot = self.analyzer.snapshot()
+            if snapshot.empty:
                 return {}
             
-            # Filter to recent transactions
-            transactions_df['date'] = pd.to_datetime(transactions_df['date'])
+            # Daily spending since the cutoff, from the snapshot's daily totals
             cutoff_date = datetime.now() - timedelta(days=days)
-            recent_transactions = transactions_df[transactions_df['date'] >= cutoff_date]
+            daily = snapshot.daily
+            recent_days = daily[daily.index >= cutoff_date]
             
-            if recent_transactions.empty:
+            if recent_days.empty:
                 return {}
             
-            # Calculate daily spending
-            daily_spending = recent_transactions.groupby(recent_transactions['date'].dt.date)['debits'].sum()
+            daily_spending = to_rands(recent_days['debits'])
             
             velocity = {
                 'avg_daily_spending': daily_spending.mean(),
@@ -225,40 +211,28 @@ class FinancialInsights:
             return velocity
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error calculating spending velocity: {str(e)}")
             return {}
 
-    @st.cache_data
-    def calculate_monthly_average_balance(_self, start_date: str, end_date: str) -> Dict:
+    @memoized
+    def calculate_monthly_average_balance(self, start_date: str, end_date: str) -> Dict:
         """Calculate monthly average balance for the given date range"""
         try:
-            transactions_df = _self.analyzer.analyzer.process_latest_json()
-            if transactions_df.empty:
-                return {'average_balance': 0, 'balance_trend': 'stable'}
-            
-            # Filter transactions by date range
-            transactions_df['date'] = pd.to_datetime(transactions_df['date'])
-            start_dt = pd.to_datetime(start_date)
-            end_dt = pd.to_datetime(end_date)
-            
-            filtered_df = transactions_df[
-                (transactions_df['date'] >= start_dt) & 
-                (transactions_df['date'] <= end_dt)
-            ]
-            
+            filtered_df = self.analyzer.snapshot(start_date, end_date).frame
             if filtered_df.empty:
                 return {'average_balance': 0, 'balance_trend': 'stable'}
             
             # Calculate average balance
             if 'balance' in filtered_df.columns:
                 # Use actual balance column if available
-                avg_balance = filtered_df['balance'].mean()
+                avg_balance = to_rands(filtered_df['balance'].mean())
                 balance_trend = 'increasing' if filtered_df['balance'].iloc[-1] > filtered_df['balance'].iloc[0] else 'decreasing'
             else:
                 # Estimate balance from transactions
                 # This is a simplified calculation - in reality, you'd need opening balance
-                total_credits = filtered_df['credits'].sum()
-                total_debits = filtered_df['debits'].sum()
+                total_credits = to_rands(filtered_df['credits'].sum())
+                total_debits = to_rands(filtered_df['debits'].sum())
                 net_flow = total_credits - total_debits
                 
                 # Assume a reasonable starting balance for estimation
@@ -272,73 +246,46 @@ class FinancialInsights:
             }
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error calculating monthly average balance: {str(e)}")
             return {'average_balance': 0, 'balance_trend': 'stable'}
     
-    @st.cache_data
-    def analyze_bank_fees(_self, start_date: str, end_date: str) -> Dict:
-        """Analyze bank fees for the given date range"""
+    @memoized
+    def analyze_bank_fees(self, start_date: str, end_date: str, user_id: Optional[str] = None) -> Dict:
+        """Analyze bank fees for the given date range, in MongoDB for a user when the backend is mongo"""
         try:
-            transactions_df = _self.analyzer.analyzer.process_latest_json()
-            if transactions_df.empty:
-                return {'total_fees': 0, 'fee_types': {}, 'fee_count': 0}
-            
-            # Filter transactions by date range
-            transactions_df['date'] = pd.to_datetime(transactions_df['date'])
-            start_dt = pd.to_datetime(start_date)
-            end_dt = pd.to_datetime(end_date)
-            
-            filtered_df = transactions_df[
-                (transactions_df['date'] >= start_dt) & 
-                (transactions_df['date'] <= end_dt)
-            ]
+            if user_id is not None and self.analyzer.backend == 'mongo':
+                return self.analyzer.mongo_analytics.bank_fees(user_id, start_date, end_date)
             
+            snapshot = self.analyzer.snapshot(start_date, end_date)
+            filtered_df = snapshot.frame
             if filtered_df.empty:
                 return {'total_fees': 0, 'fee_types': {}, 'fee_count': 0}
             
-            # Identify fee transactions based on description keywords
-            fee_keywords = ['fee', 'charge', 'service', 'atm', 'commission', 'monthly fee', 'transaction fee']
-            
-            # Create a mask for fee transactions
-            fee_mask = filtered_df['description'].str.lower().str.contains('|'.join(fee_keywords), na=False)
-            fee_transactions = filtered_df[fee_mask]
+            # Fee types are decided once per merchant, with the keyword rules of the Mongo pipeline
+            fee_type = snapshot.fee_types
+            fee_transactions = filtered_df[fee_type.notna()]
             
             if fee_transactions.empty:
                 return {'total_fees': 0, 'fee_types': {}, 'fee_count': 0}
             
             # Calculate total fees
-            total_fees = fee_transactions['debits'].sum()
+            total_fees = to_rands(fee_transactions['debits'].sum())
             
-            # Categorize fee types
-            fee_types = {}
-            for _, transaction in fee_transactions.iterrows():
-                description = transaction['description'].lower()
-                amount = transaction['debits']
-                
-                # Categorize based on keywords
-                if 'atm' in description:
-                    fee_type = 'ATM Fees'
-                elif 'service' in description or 'monthly' in description:
-                    fee_type = 'Service Fees'
-                elif 'transaction' in description:
-                    fee_type = 'Transaction Fees'
-                elif 'commission' in description:
-                    fee_type = 'Commission'
-                else:
-                    fee_type = 'Other Fees'
-                
-                if fee_type not in fee_types:
-                    fee_types[fee_type] = {'amount': 0, 'count': 0}
-                
-                fee_types[fee_type]['amount'] += amount
-                fee_types[fee_type]['count'] += 1
+            # Total cents per fee type, converting once at the end
+            by_type = fee_transactions['debits'].groupby(fee_type[fee_type.notna()]).agg(['sum', 'count'])
+            fee_types_summary = {
+                name: {'amount': to_rands(row['sum']), 'count': int(row['count'])}
+                for name, row in by_type.iterrows()
+            }
             
             return {
                 'total_fees': total_fees,
-                'fee_types': fee_types,
+                'fee_types': fee_types_summary,
                 'fee_count': len(fee_transactions)
             }
             
         except Exception as e:
+            skip_memo()
             st.error(f"Error analyzing bank fees: {str(e)}")
             return {'total_fees': 0, 'fee_types': {}, 'fee_count': 0}
\ No newline at end of file
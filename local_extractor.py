@@ -0,0 +1,254 @@
+# local_extractor.py
+import io
+import logging
+import re
+from html import escape
+
+import numpy as np
+import pandas as pd
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LTChar
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+from amount_parser import parse_amount_series
+from table_parser import SUMMARY_ROWS, is_transaction_table
+
+# Amounts as printed in statement columns, e.g. "1,234.56", "-80.00", "99.10 Dr"
+_RE_AMOUNT = re.compile(r"^-?R?\d[\d,]*\.\d{2}-?$")
+_RE_AMOUNT_HEADER = re.compile(r"debit|credit|fee|balance|amount|saldo", re.I)
+_RE_DESCRIPTION_HEADER = re.compile(r"descr|detail|narrative", re.I)
+# Lines that end a page's table: totals and balances carried to the next page
+_RE_TABLE_END = re.compile(r"^(?:sub\s*)?totals?\b|carried forward|closing balance", re.I)
+_RE_SUMMARY_ROW = re.compile(SUMMARY_ROWS, re.I)
+
+
+class LocalTableExtractor:
+    """In-process table extraction for text-based statement PDFs.
+
+    Characters are read with pdfminer without layout analysis, joined into
+    words and grouped into lines by their vertical position. A line whose
+    cells name the statement's transaction columns (see
+    table_parser.TRANSACTION_COLUMNS) starts a table; its cells' left
+    edges define the column boundaries for the lines below, and for the
+    following pages until another header is found, since continuation pages
+    often do not repeat it. Lines without an amount continue the previous
+    row's description, as wrapped descriptions do. Summary lines (see
+    table_parser.SUMMARY_ROWS) are skipped, and totals or a balance carried
+    forward end the page's table.
+
+    The result uses the document-parse payload shape, with one table element
+    per page rendered as html. It is only returned if the printed running
+    balances reconcile with the extracted amounts, so a misread layout falls
+    back to the API instead of producing wrong transactions.
+    """
+
+    model = "pdfminer-local"
+
+    def __init__(self, line_tolerance: float = 2.0, cell_gap: float = 6.0, word_gap: float = 0.25):
+        self.line_tolerance = line_tolerance
+        self.cell_gap = cell_gap
+        # Gap between characters, relative to the font size, that separates words
+        self.word_gap = word_gap
+        self.logger = logging.getLogger(__name__)
+
+    def extract(self, pdf_bytes):
+        """Extract a statement's transaction tables.
+
+        Returns:
+            A document-parse shaped payload, or None if the PDF has no text layer
+            (e.g. a scanned document), no recognisable transaction table, or
+            balances that do not reconcile with the extracted amounts.
+        """
+        elements = []
+        tables = []
+        layout = None
+        page_count = 0
+        resources = PDFResourceManager()
+        device = PDFPageAggregator(resources, laparams=None)
+        interpreter = PDFPageInterpreter(resources, device)
+
+        for page_number, page in enumerate(PDFPage.get_pages(io.BytesIO(pdf_bytes)), start=1):
+            page_count = page_number
+            interpreter.process_page(page)
+            page_layout = device.get_result()
+            chars = [obj for obj in page_layout if isinstance(obj, LTChar)]
+            table = self._table(self._lines(self._words(chars, page_layout.height)), layout)
+            if table is None:
+                continue
+            header, rows, layout = table
+            if not rows:
+                continue
+            tables.append((header, rows))
+            element_id = len(elements)
+            elements.append({
+                'category': 'table',
+                'content': {'html': _table_html(element_id, header, rows), 'markdown': '', 'text': ''},
+                'coordinates': [],
+                'id': element_id,
+                'page': page_number,
+            })
+
+        if not elements:
+            return None
+        if not _balances_reconcile(tables):
+            self.logger.warning("Locally extracted balances do not reconcile with the amounts")
+            return None
+        return {
+            'api': 'local',
+            'model': self.model,
+            'ocr': False,
+            'usage': {'pages': page_count},
+            'elements': elements,
+        }
+
+    def _words(self, chars, page_height):
+        """Join characters into words with their left, right and top positions"""
+        words = []
+        word = None
+        for char in sorted(chars, key=lambda c: (-round(c.y1, 1), c.x0)):
+            text = char.get_text()
+            top = page_height - char.y1
+            if text.isspace():
+                word = None
+            elif word and abs(word['top'] - top) <= self.line_tolerance and \
+                    char.x0 - word['x1'] <= self.word_gap * char.size:
+                word['text'] += text
+                word['x1'] = char.x1
+            else:
+                word = {'text': text, 'x0': char.x0, 'x1': char.x1, 'top': top}
+                words.append(word)
+        return words
+
+    def _lines(self, words):
+        """Group words into lines, top to bottom, each sorted left to right"""
+        lines = []
+        for word in sorted(words, key=lambda w: (w['top'], w['x0'])):
+            if lines and abs(lines[-1][0] - word['top']) <= self.line_tolerance:
+                lines[-1][1].append(word)
+            else:
+                lines.append((word['top'], [word]))
+        return [sorted(line, key=lambda w: w['x0']) for _, line in lines]
+
+    def _cells(self, line):
+        """Merge a line's words into cells separated by gaps wider than cell_gap"""
+        cells = []
+        for word in line:
+            if cells and word['x0'] - cells[-1]['x1'] <= self.cell_gap:
+                cells[-1]['text'] += f" {word['text']}"
+                cells[-1]['x1'] = word['x1']
+            else:
+                cells.append({'text': word['text'], 'x0': word['x0'], 'x1': word['x1']})
+        return cells
+
+    def _layout(self, header_cells):
+        """The column layout defined by a header line's cells"""
+        header = [cell['text'] for cell in header_cells]
+        return {
+            'header': header,
+            'edges': [cell['x0'] - self.cell_gap / 2 for cell in header_cells],
+            'amount_columns': {i for i, name in enumerate(header) if _RE_AMOUNT_HEADER.search(name)},
+            'description_column': next((i for i, name in enumerate(header) if _RE_DESCRIPTION_HEADER.search(name)), None),
+        }
+
+    def _table(self, lines, layout=None):
+        """Find the transaction table on a page and return (header, rows, layout), or None.
+
+        Pages without a header line are read with the layout of the previous
+        page's table, if there is one.
+        """
+        start = 0
+        for index, line in enumerate(lines):
+            header_cells = self._cells(line)
+            header = [cell['text'] for cell in header_cells]
+            if len(header) >= 3 and is_transaction_table(header):
+                layout = self._layout(header_cells)
+                start = index + 1
+                break
+        else:
+            if layout is None:
+                return None
+
+        header, edges = layout['header'], layout['edges']
+        amount_columns, description_column = layout['amount_columns'], layout['description_column']
+
+        rows = []
+        for line in lines[start:]:
+            text = " ".join(word['text'] for word in line)
+            if _RE_TABLE_END.search(text):
+                break
+            if _RE_SUMMARY_ROW.search(text):
+                continue
+            row = [[] for _ in header]
+            for word in line:
+                column = max((i for i, edge in enumerate(edges) if word['x0'] >= edge), default=0)
+                row[column].append(word['text'])
+            row = [" ".join(words) for words in row]
+
+            has_amount = any(
+                _RE_AMOUNT.match(token) for i in amount_columns for token in row[i].split()
+            )
+            if has_amount:
+                rows.append(row)
+            elif rows and description_column is not None and row[description_column] and \
+                    all(not text for i, text in enumerate(row) if i != description_column):
+                # A wrapped description line
+                rows[-1][description_column] = f"{rows[-1][description_column]} {row[description_column]}"
+
+        return header, rows, layout
+
+
+def _columns(header, pattern) -> list:
+    return [i for i, name in enumerate(header) if re.search(pattern, name, re.I)]
+
+
+def _cents(frame: pd.DataFrame, columns: list, **options) -> np.ndarray:
+    """Total of the amounts in columns per row, in cents"""
+    total = np.zeros(len(frame))
+    for column in columns:
+        total += parse_amount_series(frame[column], **options).to_numpy()
+    return np.rint(total * 100).astype(np.int64)
+
+
+def _balances_reconcile(tables) -> bool:
+    """Whether every printed balance equals the previous one plus the credits, less the debits and fees, in between.
+
+    Tables are checked in order, across pages, as long as their headers
+    match. Tables without a balance column are not checked.
+    """
+    previous_header = None
+    balance, flow = None, 0
+    for header, rows in tables:
+        balance_columns = _columns(header, r'balance|saldo')
+        if header != previous_header:
+            previous_header, balance, flow = header, None, 0
+        if not balance_columns:
+            continue
+
+        frame = pd.DataFrame(rows)
+        debit_columns = _columns(header, r'debit')
+        credit_columns = _columns(header, r'credit')
+        signed_columns = [] if debit_columns or credit_columns else _columns(header, r'amount')
+        flows = (_cents(frame, credit_columns) + _cents(frame, signed_columns)
+                 - np.abs(_cents(frame, debit_columns)) - np.abs(_cents(frame, _columns(header, r'fee'))))
+        printed = frame[balance_columns[0]].str.strip() != ''
+        balances = _cents(frame, balance_columns[:1], multi_value=False, signed_suffix=True)
+
+        for row_flow, has_balance, row_balance in zip(flows, printed, balances):
+            flow += row_flow
+            if not has_balance:
+                continue
+            if balance is not None and abs(balance + flow - row_balance) > 1:
+                return False
+            balance, flow = row_balance, 0
+    return True
+
+
+def _table_html(element_id, header, rows) -> str:
+    """Render a table the way document-parse does"""
+    head = "".join(f"<td>{escape(text)}</td>" for text in header)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{escape(text)}</td>" for text in row) + "</tr>"
+        for row in rows
+    )
+    return f"<table id='{element_id}'><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
@@ -0,0 +1,205 @@
+# merchant.py
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from mongo_analytics import FEE_KEYWORDS, FEE_TYPES, OTHER_FEES
+
+MEMO_COLLECTION = "merchant_categories"
+MAX_MEMO_KEYS = 500_000
+
+_key_lock = threading.Lock()
+_key_memo = {}
+
+_MONTHS = (r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+           r'|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b')
+
+# RE2 patterns applied in order to lowercased descriptions; each match is replaced with a space
+MERCHANT_NOISE = [
+    # Masked card numbers, also when glued to the merchant name: 518103XXXXXX5733
+    r'\d{4,}[x*#]{2,}\d{2,}',
+    # Amounts: R1,250.00, 99.10
+    r'\br?\s?\d[\d, ]*[.,]\d{2}\b',
+    # Dates: 2024-03-01, 01/03/24, 1 Mar 2024
+    r'\b\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{1,4})?\b',
+    rf'\b\d{{1,2}}\s?{_MONTHS}\b(?:\s?\d{{2,4}})?',
+    # Reference codes: tokens with four or more digits
+    r'\b[a-z]*(?:\d[a-z]*){4,}\b',
+    # Anything left that is not a letter: stray digits and punctuation
+    r'[^\p{L}]+',
+]
+
+
+def _normalize(descriptions: list) -> list:
+    """Merchant keys of description strings, with Arrow's RE2 string kernels"""
+    lowered = pc.utf8_lower(pa.array(descriptions, type=pa.string()))
+    keys = lowered
+    for pattern in MERCHANT_NOISE:
+        keys = pc.replace_substring_regex(keys, pattern=pattern, replacement=' ')
+    keys = pc.utf8_trim_whitespace(keys)
+    keys = pc.if_else(pc.equal(keys, ''), pc.utf8_trim_whitespace(lowered), keys)
+    return keys.to_pylist()
+
+
+def merchant_keys(descriptions: pd.Series) -> pd.Series:
+    """Normalize descriptions to merchant keys, as a categorical Series aligned with descriptions.
+
+    Card numbers, amounts, dates and reference codes are stripped, so
+    purchases at the same merchant share a key; descriptions that are all
+    noise keep their lowercased text as the key. Each distinct description is
+    normalized once, and its key is memoized for the process (up to
+    MAX_MEMO_KEYS descriptions) so reruns only normalize new descriptions.
+    """
+    if not isinstance(descriptions.dtype, pd.CategoricalDtype):
+        descriptions = descriptions.astype(str).astype('category')
+    distinct = descriptions.cat.categories.astype(str).tolist()
+    with _key_lock:
+        keys = [_key_memo.get(description) for description in distinct]
+    missing = [description for description, key in zip(distinct, keys) if key is None]
+    if missing:
+        normalized = dict(zip(missing, _normalize(missing)))
+        keys = [normalized[description] if key is None else key for description, key in zip(distinct, keys)]
+        with _key_lock:
+            if len(_key_memo) + len(normalized) > MAX_MEMO_KEYS:
+                _key_memo.clear()
+            _key_memo.update(normalized)
+
+    # One entry per distinct description, plus an empty key for missing ones at code -1
+    key_codes, names = pd.factorize(np.array(keys + [''], dtype=object))
+    codes = key_codes[descriptions.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, names), index=descriptions.index, name='merchant')
+
+
+def key_stats(descriptions: pd.Series) -> dict:
+    """How many rows, distinct descriptions and distinct merchant keys a description column has"""
+    keys = merchant_keys(descriptions)
+    merchants = int(keys.nunique())
+    return {
+        'rows': len(descriptions),
+        'descriptions': int(descriptions.nunique()),
+        'merchants': merchants,
+        'ratio': merchants / len(descriptions) if len(descriptions) else 0.0,
+    }
+
+
+def fee_types(descriptions: pd.Series) -> pd.Series:
+    """The fee type of each transaction (NaN for non-fees), decided once per distinct description.
+
+    Uses the keyword rules of MongoAnalytics.bank_fees, matched against the
+    description case-insensitively as the pipeline's $regex does.
+    """
+    if not isinstance(descriptions.dtype, pd.CategoricalDtype):
+        descriptions = descriptions.astype(str).astype('category')
+    distinct = pa.array(descriptions.cat.categories.astype(str).tolist(), type=pa.string())
+
+    def matches(pattern):
+        return pc.match_substring_regex(distinct, pattern=pattern, ignore_case=True).to_numpy(zero_copy_only=False)
+
+    is_fee = matches('|'.join(FEE_KEYWORDS))
+    types = np.where(is_fee, OTHER_FEES, None).astype(object)
+    for pattern, fee_type in reversed(FEE_TYPES):
+        types[is_fee & matches(pattern)] = fee_type
+    # Missing descriptions (code -1) are not fees
+    labels = np.append(types, None)
+    return pd.Series(labels[descriptions.cat.codes.to_numpy()], index=descriptions.index, name='fee_type')
+
+
+class MerchantMemo:
+    """Persistent match key -> category table, in front of a Categorizer.
+
+    Keys are the categorizer's match keys (see Categorizer.match_keys), which
+    categorize exactly as the descriptions they stand for. Entries are stored
+    per categorizer fingerprint in the merchant_categories collection, so
+    they outlive the process and are shared by every replica, and are also
+    kept in a process-wide dict. A categorizer with different rules (e.g.
+    after a new category mapping) has a new fingerprint and starts a new
+    table. Only keys not seen before are matched against the rules. The
+    in-process dict is an LRU of at most MAX_ENTRIES (fingerprint, key)
+    entries, so tables of superseded fingerprints age out.
+    """
+
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+    _stats = {'memory_hits': 0, 'stored_hits': 0, 'computed': 0, 'evictions': 0}
+    BATCH_SIZE = 500
+    MAX_ENTRIES = 100_000
+
+    def __init__(self, db_connection):
+        self.db_connection = db_connection
+        self.logger = logging.getLogger(__name__)
+
+    def _count(self, counter: str, amount: int):
+        with MerchantMemo._lock:
+            MerchantMemo._stats[counter] += amount
+
+    def _load(self, fingerprint: str, keys: list) -> dict:
+        """Stored categories of keys, by key"""
+        stored = {}
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            memo_keys = [f"{fingerprint}:{key}" for key in keys[start:start + self.BATCH_SIZE]]
+            documents = self.db_connection.find_documents(
+                {"memo_key": {"$in": memo_keys}}, MEMO_COLLECTION,
+                projection={"_id": 0, "memo_key": 1, "category": 1}
+            )
+            stored.update((doc['memo_key'][len(fingerprint) + 1:], doc.get('category')) for doc in documents)
+        return stored
+
+    def _store(self, fingerprint: str, categories: dict):
+        created_at = datetime.now().isoformat()
+        documents = [
+            {"memo_key": f"{fingerprint}:{key}", "fingerprint": fingerprint, "match_key": key,
+             "category": category, "created_at": created_at}
+            for key, category in categories.items()
+        ]
+        self.db_connection.insert_documents(documents, MEMO_COLLECTION, unique_key="memo_key")
+
+    def lookup(self, categorizer, keys) -> list:
+        """Categories of match keys under categorizer's rules (None where no rule matches)"""
+        fingerprint = categorizer.fingerprint
+        entries = MerchantMemo._entries
+        with MerchantMemo._lock:
+            found = {}
+            for key in keys:
+                if (fingerprint, key) in entries:
+                    entries.move_to_end((fingerprint, key))
+                    found[key] = entries[(fingerprint, key)]
+        missing = [key for key in keys if key not in found]
+        self._count('memory_hits', len(found))
+
+        if missing:
+            try:
+                stored = self._load(fingerprint, missing)
+            except Exception as e:
+                self.logger.error(f"Failed to load merchant categories: {str(e)}")
+                stored = {}
+            self._count('stored_hits', len(stored))
+            computed = [key for key in missing if key not in stored]
+            if computed:
+                new = dict(zip(computed, categorizer.categorize_values(computed, default=None)))
+                self._count('computed', len(new))
+                try:
+                    self._store(fingerprint, new)
+                except Exception as e:
+                    self.logger.error(f"Failed to store merchant categories: {str(e)}")
+                stored.update(new)
+            with MerchantMemo._lock:
+                entries.update(((fingerprint, key), category) for key, category in stored.items())
+                evicted = 0
+                while len(entries) > self.MAX_ENTRIES:
+                    entries.popitem(last=False)
+                    evicted += 1
+                MerchantMemo._stats['evictions'] += evicted
+            found.update(stored)
+
+        return [found[key] for key in keys]
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {'entries': len(cls._entries), **cls._stats}
@@ -0,0 +1,117 @@
+# mongo_analytics.py
+from datetime import datetime
+
+from summary_engine import TransactionSummary, summarize_groups
+from transaction_store import to_rands
+
+# Keywords marking a transaction as a bank fee, and the fee type of each
+# keyword in priority order; the same rules as FinancialInsights.analyze_bank_fees
+FEE_KEYWORDS = ['fee', 'charge', 'service', 'atm', 'commission', 'monthly fee', 'transaction fee']
+FEE_TYPES = [
+    ('atm', 'ATM Fees'),
+    ('service|monthly', 'Service Fees'),
+    ('transaction', 'Transaction Fees'),
+    ('commission', 'Commission'),
+]
+OTHER_FEES = 'Other Fees'
+
+
+def _as_datetime(value) -> datetime:
+    """Midnight of a date, or a date string such as "2025-04-01"; datetimes are kept as they are"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, datetime.min.time())
+
+
+def _date_parts(unit: str) -> dict:
+    """Expression truncating $date to its day or month ($dateTrunc would need MongoDB 5.0)"""
+    parts = {"year": {"$year": "$date"}, "month": {"$month": "$date"}}
+    if unit == "day":
+        parts["day"] = {"$dayOfMonth": "$date"}
+    return {"$dateFromParts": parts}
+
+
+def _totals_stage(group_id) -> dict:
+    """$group stage summing cents and counting transactions per group_id"""
+    return {"$group": {
+        "_id": group_id,
+        "debits": {"$sum": "$debits"},
+        "credits": {"$sum": "$credits"},
+        "count": {"$sum": 1}
+    }}
+
+
+class MongoAnalytics:
+    """Transaction summaries computed by MongoDB aggregation pipelines.
+
+    The pipelines run on the per-transaction collection and return only the
+    grouped totals, in integer cents. Results have the same shape and values
+    as the pandas implementations in FinancialAnalyzer and FinancialInsights.
+    They need MongoDB 4.2 or later, for $regexMatch.
+    """
+
+    def __init__(self, db_connection, collection_name: str = "transactions"):
+        self.db_connection = db_connection
+        self.collection_name = collection_name
+
+    def _match(self, user_id: str, start_date, end_date=None) -> dict:
+        date_range = {"$gte": _as_datetime(start_date)}
+        if end_date is not None:
+            date_range["$lte"] = _as_datetime(end_date)
+        return {"$match": {"user_id": user_id, "date": date_range}}
+
+    def transaction_summary(self, user_id: str, start_date, end_date) -> TransactionSummary:
+        """Summarize a user's transactions between two dates, as FinancialAnalyzer.get_transaction_summary"""
+        pipeline = [
+            self._match(user_id, start_date, end_date),
+            {"$facet": {
+                "daily": [_totals_stage(_date_parts("day"))],
+                "categories": [_totals_stage("$category")],
+            }},
+        ]
+        result = self.db_connection.aggregate(pipeline, self.collection_name)[0]
+        return summarize_groups(result['daily'], result['categories'])
+
+    def monthly_trends(self, user_id: str, start_date) -> dict:
+        """Total a user's transactions per month from start_date, as FinancialInsights.get_monthly_trends"""
+        pipeline = [
+            self._match(user_id, start_date),
+            _totals_stage(_date_parts("month")),
+            {"$sort": {"_id": 1}},
+        ]
+        return {
+            month['_id'].strftime('%Y-%m'): {
+                'debits': to_rands(month['debits']),
+                'credits': to_rands(month['credits']),
+                'net': to_rands(month['credits'] - month['debits'])
+            }
+            for month in self.db_connection.aggregate(pipeline, self.collection_name)
+        }
+
+    def bank_fees(self, user_id: str, start_date, end_date) -> dict:
+        """Total a user's bank fees between two dates by fee type, as FinancialInsights.analyze_bank_fees"""
+        fee_type = {"$switch": {
+            "branches": [
+                {"case": {"$regexMatch": {"input": "$description", "regex": pattern, "options": "i"}}, "then": name}
+                for pattern, name in FEE_TYPES
+            ],
+            "default": OTHER_FEES
+        }}
+        match = self._match(user_id, start_date, end_date)
+        match["$match"]["description"] = {"$regex": "|".join(FEE_KEYWORDS), "$options": "i"}
+        pipeline = [match, _totals_stage(fee_type)]
+
+        groups = self.db_connection.aggregate(pipeline, self.collection_name)
+        if not groups:
+            return {'total_fees': 0, 'fee_types': {}, 'fee_count': 0}
+
+        return {
+            'total_fees': to_rands(sum(group['debits'] for group in groups)),
+            'fee_types': {
+                group['_id']: {'amount': to_rands(group['debits']), 'count': group['count']}
+                for group in groups
+            },
+            'fee_count': sum(group['count'] for group in groups)
+        }
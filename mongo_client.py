@@ -0,0 +1,164 @@
+# mongo_client.py
+import logging
+import threading
+
+from pymongo import monitoring
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener, monitoring.ServerHeartbeatListener):
+    """Counts connection pool and heartbeat events of one client, for MongoClientManager.stats()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_open = 0
+            self.connections_created = 0
+            self.checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkout_wait_total = 0.0
+            self.checkout_wait_max = 0.0
+            self.heartbeats = 0
+            self.heartbeat_failures = 0
+            self.last_heartbeat = None
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_open += 1
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_open -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            # Time spent waiting for a pooled connection, including establishing a new one
+            self.checkout_wait_total += event.duration
+            self.checkout_wait_max = max(self.checkout_wait_max, event.duration)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        with self._lock:
+            self.heartbeats += 1
+            self.last_heartbeat = event.duration
+
+    def failed(self, event):
+        with self._lock:
+            self.heartbeats += 1
+            self.heartbeat_failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'connections_open': self.connections_open,
+                'connections_created': self.connections_created,
+                'checked_out': self.checked_out,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'avg_checkout_wait_ms': self.checkout_wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                'max_checkout_wait_ms': self.checkout_wait_max * 1000,
+                'heartbeats': self.heartbeats,
+                'heartbeat_failures': self.heartbeat_failures,
+                'last_heartbeat_ms': self.last_heartbeat * 1000 if self.last_heartbeat is not None else None,
+            }
+
+
+class MongoClientManager:
+    """Process-wide MongoDB client shared by every session and DatabaseConnection.
+
+    The client is created on first use with connect=False, so nothing touches
+    the network until the first operation. pymongo's monitor threads then
+    heartbeat the servers every heartbeat_frequency_ms in the background,
+    which keeps server selection from waiting on a ping during a rerun.
+    """
+
+    _lock = threading.Lock()
+    _client = None
+    _uri = None
+    stats_listener = PoolStatsListener()
+
+    @classmethod
+    def get_client(cls, uri: str, config) -> MongoClient:
+        """Get the shared client, creating it for uri on first use"""
+        with cls._lock:
+            if cls._client is not None and cls._uri == uri:
+                return cls._client
+            if cls._client is not None:
+                # The connection settings changed, e.g. after a secrets update
+                cls._client.close()
+            cls._client = MongoClient(
+                uri,
+                server_api=ServerApi('1'),
+                connect=False,
+                event_listeners=[cls.stats_listener],
+                **cls.client_options(config)
+            )
+            cls._uri = uri
+            logging.getLogger(__name__).info("Created MongoDB client")
+            return cls._client
+
+    @staticmethod
+    def client_options(config) -> dict:
+        """MongoClient pool, timeout and monitoring options from Config, with defaults"""
+        settings = {
+            'maxPoolSize': (config.mongo_max_pool_size, 50),
+            'minPoolSize': (config.mongo_min_pool_size, 0),
+            'connectTimeoutMS': (config.mongo_connect_timeout_ms, 10000),
+            'serverSelectionTimeoutMS': (config.mongo_server_selection_timeout_ms, 10000),
+            'waitQueueTimeoutMS': (config.mongo_wait_queue_timeout_ms, 10000),
+            'heartbeatFrequencyMS': (config.mongo_heartbeat_frequency_ms, 10000),
+        }
+        return {option: int(value or default) for option, (value, default) in settings.items()}
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Connection pool and heartbeat statistics of the shared client"""
+        stats = cls.stats_listener.snapshot()
+        stats['max_pool_size'] = cls._client.options.pool_options.max_pool_size if cls._client else None
+        return stats
+
+    @classmethod
+    def close(cls):
+        """Close the shared client; the next get_client() creates a new one"""
+        with cls._lock:
+            if cls._client is not None:
+                cls._client.close()
+                cls._client = None
+                cls._uri = None
+                cls.stats_listener.reset()
@@ -0,0 +1,137 @@
+# parse_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join("data", "parse_cache")
+DEFAULT_MAX_MB = 512
+
+
+def hash_pdf_bytes(pdf_bytes: bytes) -> str:
+    """Get the SHA-256 hex digest of a PDF's bytes"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+class ParseCache:
+    """On-disk cache of Upstage document-parse results keyed by the SHA-256 of the PDF.
+
+    Entries are the raw JSON payloads, streamed to disk as they arrive, so the
+    directory holds the full API output outside the app's memory, can live on a
+    volume shared by several replicas and survives restarts. When the total size exceeds the limit,
+    the least recently used entries (by file mtime, refreshed on every hit) are
+    evicted. Hit/miss/eviction counters are kept per process.
+    """
+
+    _lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_MB * 1024 * 1024
+        self.logger = logging.getLogger(__name__)
+
+    def _path(self, pdf_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{pdf_hash}.json")
+
+    def _count(self, counter: str, amount: int = 1):
+        with ParseCache._lock:
+            ParseCache._stats[counter] += amount
+
+    def open_payload(self, pdf_hash: str):
+        """Open the cached raw payload for a PDF hash as a binary file, or return None on a miss"""
+        path = self._path(pdf_hash)
+        try:
+            fp = open(path, "rb")
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+
+        # Refresh the mtime so LRU eviction sees this entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hits')
+        return fp
+
+    def discard(self, pdf_hash: str):
+        """Remove an unreadable entry"""
+        self.logger.warning(f"Discarding unreadable cache entry {self._path(pdf_hash)}")
+        self._remove(self._path(pdf_hash))
+
+    def put(self, pdf_hash: str, data: dict):
+        """Store a parse result and evict old entries if the cache is over its size limit"""
+        self.put_stream(pdf_hash, [json.dumps(data).encode("utf-8")])
+
+    def put_stream(self, pdf_hash: str, chunks):
+        """Write a raw payload from an iterable of byte chunks without holding it in memory.
+
+        Returns:
+            The entry's path, or None if it could not be written.
+        """
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(pdf_hash)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+            self.evict(keep=path)
+            return path
+        except Exception as e:
+            self.logger.error(f"Failed to write parse cache entry: {str(e)}")
+            if tmp_path:
+                self._remove(tmp_path)
+            return None
+
+    def _entries(self):
+        """List (mtime, size, path) for every cache entry"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self, keep: str = None):
+        """Remove least recently used entries until the cache fits its size limit"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+            evicted += 1
+        if evicted:
+            self._count('evictions', evicted)
+            self.logger.info(f"Evicted {evicted} parse cache entries")
+
+    def stats(self) -> dict:
+        """Get hit/miss/eviction counters and current cache size"""
+        entries = self._entries()
+        with ParseCache._lock:
+            stats = dict(ParseCache._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['entries'] = len(entries)
+        stats['size_bytes'] = sum(size for _, size, _ in entries)
+        stats['max_bytes'] = self.max_bytes
+        return stats
@@ -0,0 +1,75 @@
+# pdf_chunking.py
+import io
+import re
+
+from pypdf import PdfReader, PdfWriter
+
+# The id attribute of an element's own tag in its html, e.g. "<table id='8' ...>"
+_RE_ELEMENT_ID = re.compile(r"""\bid=(['"])\d+\1""")
+
+
+def count_pages(pdf_bytes: bytes) -> int:
+    """Get the number of pages in a PDF"""
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+
+def split_pdf(pdf_bytes: bytes, pages_per_chunk: int):
+    """Split a PDF into chunks of at most pages_per_chunk pages.
+
+    Returns:
+        A list of (first page number, chunk PDF bytes), with 1-based page numbers.
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    chunks = []
+    for start in range(0, len(reader.pages), pages_per_chunk):
+        writer = PdfWriter()
+        for page in reader.pages[start:start + pages_per_chunk]:
+            writer.add_page(page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        chunks.append((start + 1, buffer.getvalue()))
+    return chunks
+
+
+def stitch_chunks(chunks) -> dict:
+    """Merge document-parse results of page chunks into one payload for the whole PDF.
+
+    Elements are placed in page order with page numbers offset by the chunk's
+    first page, and renumbered with sequential ids (in the html too), so the
+    result has the same shape as a single request for the full document.
+
+    Args:
+        chunks: (first page number, parse result) pairs, in any order.
+    """
+    chunks = sorted(chunks, key=lambda chunk: chunk[0])
+    first = chunks[0][1] if chunks else {}
+    elements = []
+    merged_elements = []
+    content = {'html': [], 'markdown': [], 'text': []}
+    pages = 0
+
+    for first_page, data in chunks:
+        for element in sorted(data.get('elements', []), key=lambda e: (e.get('page', 1), e.get('id', 0))):
+            element = dict(element)
+            element['id'] = len(elements)
+            element['page'] = element.get('page', 1) + first_page - 1
+            element_content = dict(element.get('content') or {})
+            if element_content.get('html'):
+                element_content['html'] = _RE_ELEMENT_ID.sub(f"id='{element['id']}'", element_content['html'], count=1)
+            element['content'] = element_content
+            elements.append(element)
+            for key in content:
+                if element_content.get(key):
+                    content[key].append(element_content[key])
+        merged_elements.extend(data.get('merged_elements', []))
+        pages += (data.get('usage') or {}).get('pages', 0)
+
+    return {
+        'api': first.get('api'),
+        'content': {key: "\n".join(parts) for key, parts in content.items()},
+        'elements': elements,
+        'merged_elements': merged_elements,
+        'model': first.get('model'),
+        'ocr': any(data.get('ocr') for _, data in chunks),
+        'usage': {'pages': pages},
+    }
@@ -1,68 +1,302 @@
-import streamlit as st
 import requests
+import io
 import os
 import re
+import time
+import queue
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-import tempfile
 from config import Config
+from parse_cache import ParseCache, hash_pdf_bytes
+from pdf_chunking import count_pages, split_pdf, stitch_chunks
+from upstage_payload import read_slim_payload, slim_payload
+from local_extractor import LocalTableExtractor
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RESPONSE_CHUNK_SIZE = 64 * 1024
+# auto: extract text-based PDFs locally and fall back to the API; local/remote: use only that engine.
+# remote is the default until the local extractor has been validated on more banks' statements.
+PDF_ENGINES = ('auto', 'local', 'remote')
+
+class DocumentParseError(Exception):
+    """Raised when the document-parse API cannot process a PDF"""
+
+class MultipartBody(io.RawIOBase):
+    """A multipart/form-data body holding one file, read straight from an in-memory buffer.
+
+    requests streams file-like bodies with a known length instead of building
+    the whole encoded request in memory, so the PDF is never copied.
+    """
+
+    def __init__(self, field: str, filename: str, content):
+        boundary = os.urandom(16).hex()
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: application/pdf\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._parts = [memoryview(head), memoryview(content).cast("B"), memoryview(tail)]
+        self._length = sum(len(part) for part in self._parts)
+        self._index = 0
+        self._offset = 0
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return sum(len(part) for part in self._parts[:self._index]) + self._offset
+
+    def readinto(self, buffer):
+        written = 0
+        view = memoryview(buffer).cast("B")
+        while written < len(view) and self._index < len(self._parts):
+            part = self._parts[self._index]
+            count = min(len(view) - written, len(part) - self._offset)
+            view[written:written + count] = part[self._offset:self._offset + count]
+            written += count
+            self._offset += count
+            if self._offset == len(part):
+                self._index += 1
+                self._offset = 0
+        return written
 
 class StreamlitBankProcessor:
-    def __init__(self):
+    default_api_url = 'https://api.upstage.ai/v1/document-ai/document-parse'
+
+    def __init__(self, max_retries: int = 3, backoff_seconds: float = 1.0, timeout: float = 300):
         self.config = Config()
         self.api_key = self.config.upstage_api_key
+        self.api_url = self.config.upstage_api_url or self.default_api_url
+        # Documents longer than this many pages are parsed in parallel page chunks
+        self.chunk_pages = int(self.config.upstage_chunk_pages or 0)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.max_workers = int(self.config.upstage_max_workers or 4)
+        self.engine = (self.config.pdf_engine or 'remote').lower()
+        if self.engine not in PDF_ENGINES:
+            raise ValueError(f"Unknown PDF engine '{self.engine}', expected one of {', '.join(PDF_ENGINES)}")
+        self.local_extractor = LocalTableExtractor()
+        self.logger = logging.getLogger(__name__)
+        max_mb = self.config.parse_cache_max_mb
+        self.cache = ParseCache(
+            cache_dir=self.config.parse_cache_dir,
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None
+        )
+
+    def process_batch(self, uploaded_files, max_workers: int = None, on_event=None):
+        """Process several PDFs concurrently with bounded parallelism.
+
+        Args:
+            uploaded_files: Uploaded files (objects with ``name`` and ``getbuffer()``).
+            max_workers: Maximum number of concurrent API requests (defaults to the
+                UPSTAGE_MAX_WORKERS setting).
+            on_event: Optional ``callback(index, filename, state, detail)``, where
+                index is the file's position in uploaded_files (filenames need not be
+                unique). It is always called from the calling thread, so it may update
+                Streamlit elements.
+
+        Returns:
+            A list of ``(filename, json_data, error)`` tuples in upload order, where
+            exactly one of ``json_data`` and ``error`` is None.
+        """
+        uploaded_files = list(uploaded_files)
+        events = queue.Queue()
+        results = {}
+        max_workers = max_workers or self.max_workers
+
+        def notify(index, state, detail):
+            if on_event:
+                on_event(index, uploaded_files[index].name, state, detail)
+
+        def drain():
+            while True:
+                try:
+                    notify(*events.get_nowait())
+                except queue.Empty:
+                    return
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="document-parse") as executor:
+            futures = {}
+            for index, uploaded_file in enumerate(uploaded_files):
+                notify(index, "queued", "⏳ Queued")
+                future = executor.submit(
+                    self.parse_pdf_bytes,
+                    uploaded_file.getbuffer(),
+                    uploaded_file.name,
+                    lambda state, detail, index=index: events.put((index, state, detail))
+                )
+                futures[future] = index
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                drain()
+                for future in done:
+                    index = futures[future]
+                    try:
+                        results[index] = (future.result(), None)
+                        notify(index, "done", "✅ Processed")
+                    except Exception as e:
+                        self.logger.error(f"Failed to process {uploaded_files[index].name}: {str(e)}")
+                        results[index] = (None, str(e))
+                        notify(index, "failed", f"❌ {str(e)}")
+
+        return [(uploaded_file.name, *results[index]) for index, uploaded_file in enumerate(uploaded_files)]
+
+    def parse_pdf_bytes(self, pdf_bytes, filename, on_event=None):
+        """Parse PDF bytes with the local extractor or the document-parse API, using the parse cache.
+
+        Text-based PDFs are extracted in-process unless the engine is 'remote';
+        the API is used for scanned documents, for local extractions whose
+        balances do not reconcile, and when the engine is 'remote'.
+        Safe to call from worker threads: progress is reported through
+        ``on_event(state, detail)`` instead of Streamlit calls. The raw API
+        response is streamed into the parse cache on disk and only its table
+        elements and metadata are loaded back.
+
+        Args:
+            pdf_bytes: The PDF as bytes or any bytes-like buffer (e.g. a memoryview).
 
-    @st.cache_data
-    def process_pdf(_self, uploaded_file):
-        """Process uploaded PDF file using Upstage API"""
+        Raises:
+            DocumentParseError: If the API rejects the document or retries are exhausted.
+        """
+        notify = on_event or (lambda state, detail: None)
+        pdf_hash = hash_pdf_bytes(pdf_bytes)
+        data = self._read_cached(pdf_hash)
+        if data is not None:
+            notify("cached", f"♻️ Using cached parse result for this PDF ({pdf_hash[:12]})")
+            return self._add_statement_metadata(data, filename, pdf_hash)
+
+        if self.engine != 'remote':
+            data = self._extract_locally(pdf_bytes, notify)
+            if data is not None:
+                return self._add_statement_metadata(data, filename, pdf_hash)
+            if self.engine == 'local':
+                raise DocumentParseError("No transaction tables with reconciling balances found in the PDF's text layer")
+            notify("processing", "🖨️ No reliable text-based transaction tables found, using the document-parse API")
+
+        if self.chunk_pages:
+            page_count = count_pages(pdf_bytes)
+            if page_count > self.chunk_pages:
+                data = slim_payload(self._parse_in_chunks(pdf_bytes, page_count, notify))
+                self.cache.put(pdf_hash, data)
+                return self._add_statement_metadata(data, filename, pdf_hash)
+
+        notify("processing", "🔗 Sending PDF to the document-parse API...")
+        response = self._post_with_retries(pdf_bytes, filename, notify)
+        notify("processing", f"⏱️ Response time: {response.elapsed.total_seconds():.2f}s")
+
+        # Spill the raw payload to disk as it arrives, then read back only what the pipeline needs
+        with response:
+            if self.cache.put_stream(pdf_hash, response.iter_content(chunk_size=RESPONSE_CHUNK_SIZE)) is None:
+                raise DocumentParseError("Failed to store the document-parse response")
+        data = self._read_cached(pdf_hash)
+        if data is None:
+            raise DocumentParseError("Failed to read the document-parse response")
+
+        return self._add_statement_metadata(data, filename, pdf_hash)
+
+    def _extract_locally(self, pdf_bytes, notify):
+        """Extract transaction tables in-process, or return None if the PDF needs the API"""
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-
-            # Call Upstage API
-            st.write("📄 Starting PDF processing...")
-            st.write(f"📂 Temporary file created at: {tmp_file_path}")
-            url = 'https://api.upstage.ai/v1/document-ai/document-parse'
-            headers = {"Authorization": f"Bearer {_self.api_key}"}
-            st.write("🔗 API endpoint: {url}")
-            st.write("🔑 Using API key (truncated): {_self.api_key[:4]}...{_self.api_key[-4:]}")
-
-            with open(tmp_file_path, "rb") as file:
-                files = {"document": file}
-                response = requests.post(url, headers=headers, files=files)
-
-            # Clean up temp file
-            try:
-                os.unlink(tmp_file_path)
-            except:
-                pass  # Handle case where file might not exist
-
-            if response.status_code == 200:
-                st.write("✅ API request successful")
-                st.write(f"⏱️ Response time: {response.elapsed.total_seconds():.2f}s")
-                data = response.json()
-                st.write("📊 Extracted data keys: {list(data.keys())}")
-
-                # Parse filename for date range
-                filename = uploaded_file.name
-                start_date, end_date = _self.parse_pdf_name(filename)
-
-                data["filename"] = filename
-                data["period"] = {
-                    "start": start_date.strftime('%Y-%m-%d') if start_date else None,
-                    "end": end_date.strftime('%Y-%m-%d') if end_date else None
-                }
-
-                return data
-            else:
-                st.error(f"API request failed: {response.status_code} - {response.text}")
-                return None
+            start = time.perf_counter()
+            data = self.local_extractor.extract(pdf_bytes)
+        except Exception as e:
+            self.logger.warning(f"Local extraction failed: {str(e)}")
+            return None
+        if data is not None:
+            notify("processing", f"⚡ Extracted {len(data['elements'])} tables locally in {time.perf_counter() - start:.2f}s")
+        return data
 
+    def _read_cached(self, pdf_hash):
+        """Load the table elements and metadata of a cached payload, or None on a miss"""
+        fp = self.cache.open_payload(pdf_hash)
+        if fp is None:
+            return None
+        try:
+            with fp:
+                return read_slim_payload(fp)
         except Exception as e:
-            st.error(f"Error processing PDF: {str(e)}")
+            self.logger.warning(f"Unreadable parse cache entry {pdf_hash[:12]}: {str(e)}")
+            self.cache.discard(pdf_hash)
             return None
 
+    def _parse_in_chunks(self, pdf_bytes, page_count, notify):
+        """Parse a long PDF as parallel page-range requests and stitch the results in page order"""
+        chunks = split_pdf(pdf_bytes, self.chunk_pages)
+        notify("processing", f"✂️ Parsing {page_count} pages as {len(chunks)} chunks of up to {self.chunk_pages} pages...")
+
+        def parse_chunk(first_page, chunk_bytes):
+            response = self._post_with_retries(chunk_bytes, f"pages-{first_page}.pdf", notify)
+            last_page = min(first_page + self.chunk_pages - 1, page_count)
+            notify("processing", f"📑 Pages {first_page}-{last_page} parsed in {response.elapsed.total_seconds():.2f}s")
+            with response:
+                response.raw.decode_content = True
+                return first_page, read_slim_payload(response.raw)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="document-parse-chunk") as executor:
+            results = list(executor.map(lambda chunk: parse_chunk(*chunk), chunks))
+        return stitch_chunks(results)
+
+    def _post_with_retries(self, pdf_bytes, filename, notify):
+        """POST a PDF to the API, retrying transient failures with exponential backoff.
+
+        The request body is streamed from the in-memory PDF buffer and the
+        successful response is returned unread (``stream=True``).
+        """
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                body = MultipartBody("document", filename, pdf_bytes)
+                response = requests.post(
+                    self.api_url,
+                    headers={**headers, "Content-Type": body.content_type},
+                    data=body,
+                    timeout=self.timeout,
+                    stream=True
+                )
+                if response.status_code == 200:
+                    return response
+                with response:
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        raise DocumentParseError(f"API request failed: {response.status_code} - {response.text}")
+                    error = f"HTTP {response.status_code}"
+                    retry_after = response.headers.get("Retry-After")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = type(e).__name__
+
+            if attempt == self.max_retries:
+                raise DocumentParseError(f"API request failed after {attempt + 1} attempts: {error}")
+
+            delay = self.backoff_seconds * (2 ** attempt) + random.uniform(0, self.backoff_seconds)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            notify("retrying", f"🔁 {error}, retrying in {delay:.1f}s (attempt {attempt + 2} of {self.max_retries + 1})")
+            time.sleep(delay)
+
+    def _add_statement_metadata(self, data, filename, pdf_hash):
+        """Attach filename, statement period and PDF hash to a parse result"""
+        # Parse filename for date range
+        start_date, end_date = self.parse_pdf_name(filename)
+
+        data["filename"] = filename
+        data["pdf_sha256"] = pdf_hash
+        data["period"] = {
+            "start": start_date.strftime('%Y-%m-%d') if start_date else None,
+            "end": end_date.strftime('%Y-%m-%d') if end_date else None
+        }
+        return data
+
     def parse_pdf_name(self, pdf_name):
         """Parse date range from PDF filename"""
         pattern = r'(\d{2}\s\w{3}\s\d{4})\s-\s(\d{2}\s\w{3}\s\d{4})\.pdf'
@@ -71,4 +305,4 @@ class StreamlitBankProcessor:
             start_date = datetime.strptime(match.group(1), '%d %b %Y')
             end_date = datetime.strptime(match.group(2), '%d %b %Y')
             return start_date, end_date
-        return None, None
\ No newline at end of file
+        return None, None
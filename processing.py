@@ -3,82 +3,101 @@ import json
 import os
 import streamlit as st
 from datetime import datetime
-from io import StringIO
 import logging
 import re
+from config import Config
+from amount_parser import parse_amount_series
+from table_parser import SUMMARY_ROWS, parse_upstage_table, combine_tables, is_transaction_table
+from transaction_store import TransactionStore, compute_statement_hash, conform_to_schema
+from statement_memo import StatementFileMemo
+from result_memo import get_result_memo
+
+_RE_ACCOUNT_NUMBER = re.compile(r"account\s*(?:number|no\.?)[\W_]*(\d[\d ]{4,}\d)", re.I)
+_RE_ACCOUNT_HEADER = re.compile(r"account\s*(?:number|no\.?)", re.I)
+DEFAULT_ACCOUNT = 'default'
 
 class StreamlitAnalytics:
     """Handles bank statement processing and data extraction"""
     
     def __init__(self):
         self.json_file_path = "latest_bank_statement.json"
+        max_mb = Config().transaction_store_max_mb
+        self.store = TransactionStore(max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else None)
+        self.memo = StatementFileMemo(self.json_file_path)
         logging.basicConfig(level=logging.DEBUG)  # Enable debug logging
     
-    #@st.cache_data
     def load_latest_bank_statement(self):
-        """Load the latest processed bank statement JSON from storage and convert to DataFrame."""
+        """Load the latest saved bank statement from the normalized transaction store."""
         try:
-            if os.path.exists(self.json_file_path):
-                with open(self.json_file_path, "r") as f:
-                    json_data = json.load(f)
-                
-                df = self._extract_tables_to_dataframe(json_data)
-                if not df.empty:
-                    # Ensure 'date' column is datetime and handle missing columns
-                    if 'date' in df.columns:
-                        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-                    
-                    # Fill NaN in 'debits' and 'credits' with 0
-                    if 'debits' not in df.columns:
-                        df['debits'] = 0.0
-                    else:
-                        df['debits'] = pd.to_numeric(df['debits'], errors='coerce').fillna(0.0)
-                    
-                    if 'credits' not in df.columns:
-                        df['credits'] = 0.0
-                    else:
-                        df['credits'] = pd.to_numeric(df['credits'], errors='coerce').fillna(0.0)
-                    
-                    # Add description if missing
-                    if 'description' not in df.columns:
-                        df['description'] = 'Unknown'
-                    
-                    # Add category column if it doesn't exist
-                    if 'category' not in df.columns:
-                        df['category'] = 'Uncategorized'
-                    
-                    logging.debug(f"Loaded DataFrame columns: {df.columns.tolist()}")
-                    return df
-            
-            logging.warning("No bank statement JSON file found")
-            return pd.DataFrame()
-        
+            # Memoized per process until the statement file changes; copied so callers can modify it
+            return self.memo.get('transactions', self._load_latest_bank_statement).copy()
         except Exception as e:
             logging.error(f"Error loading transaction data: {str(e)}")
             st.error(f"Error loading transaction data: {str(e)}")
             return pd.DataFrame()
+
+    def _load_latest_bank_statement(self):
+        """Read the latest statement's transactions from the store, or parse them from the JSON file"""
+        statement_hash = self.store.latest_hash()
+        if statement_hash:
+            df = self.store.read(statement_hash)
+            if df is not None:
+                logging.debug(f"Loaded {len(df)} transactions from store for statement {statement_hash[:12]}")
+                return df
+
+        # Fall back to the raw JSON for statements saved before the store existed
+        json_data = self._read_statement_file()
+        if json_data is not None:
+            df = self.extract_tables_to_dataframe(json_data)
+            if not df.empty:
+                self.store.set_latest(compute_statement_hash(json_data))
+                logging.debug(f"Loaded DataFrame columns: {df.columns.tolist()}")
+                return df
+
+        logging.warning("No bank statement JSON file found")
+        return pd.DataFrame()
+
+    def _read_statement_file(self):
+        """Get the parsed latest statement JSON, or None if there is none"""
+        def read():
+            if not os.path.exists(self.json_file_path):
+                return None
+            with open(self.json_file_path, "r") as f:
+                return json.load(f)
+        return self.memo.get('document', read)
     
     def process_latest_json(self):
         """Process the latest JSON bank statement and return a standardized DataFrame."""
         return self.load_latest_bank_statement()
+
+    def dataset_version(self):
+        """Version of the latest statement, changing whenever a statement is saved (None if there is none)"""
+        return self.memo.version()
+    
+    def extract_tables_to_dataframe(self, json_data):
+        """Get normalized transactions for a statement, parsing its tables only if not already stored"""
+        statement_hash = compute_statement_hash(json_data)
+        df = self.store.read(statement_hash)
+        if df is not None:
+            return df
+
+        df = self._extract_tables_to_dataframe(json_data)
+        if df.empty:
+            return df
+
+        # Validate once into the canonical typed frame; consumers trust its dtypes from here on
+        df = conform_to_schema(df)
+        try:
+            self.store.write(statement_hash, df)
+        except Exception as e:
+            logging.error(f"Error writing transaction store: {str(e)}")
+        return df
     
     def _extract_tables_to_dataframe(self, json_data):
         """Extract tables from JSON data and convert to DataFrame"""
         try:
-            all_tables = []
-            for page in json_data.get('elements', []):
-                if page.get('category') == 'table':
-                    html_table = page.get('content', {}).get('html', "")
-                    if html_table:
-                        df = pd.read_html(StringIO(html_table))[0]
-                        if isinstance(df.columns, pd.MultiIndex):
-                            df.columns = df.columns.map('_'.join)
-                        # Only include transaction tables (based on expected columns)
-                        if any(col in df.columns for col in ['Date', 'Description', 'Debits (R)', 'Credits (R)', 'Balance (R)']):
-                            all_tables.append(df)
-            
-            if all_tables:
-                combined_df = pd.concat(all_tables, ignore_index=True)
+            combined_df = self._read_transaction_tables(json_data)
+            if combined_df is not None:
                 combined_df.columns = combined_df.columns.astype(str)  # Ensure all column names are strings
                 
                 # Log raw column names for debugging
@@ -111,41 +130,20 @@ class StreamlitAnalytics:
                 # Filter out summary rows (e.g., "Total Charges", "Closing balance")
                 if 'description' in combined_df.columns:
                     combined_df = combined_df[~combined_df['description'].str.contains(
-                        'Total Charges|Closing balance|Opening balance|Balance brought forward', 
-                        case=False, na=False)]
+                        SUMMARY_ROWS, case=False, na=False)]
                 
-                # Handle multiple values in debits/credits (e.g., "242.20 126.86")
+                # Parse amounts in one vectorized pass per column; debit/credit/fee cells may
+                # hold several space-separated amounts (e.g., "242.20 126.86") which are summed
                 for col in ['debits', 'credits', 'fees']:
                     if col in combined_df.columns:
-                        def parse_multi_values(x):
-                            if pd.isna(x):
-                                return 0.0
-                            # Split by whitespace and sum valid numbers
-                            values = str(x).split()
-                            total = 0.0
-                            for val in values:
-                                cleaned = re.sub(r'[^\d.-]', '', val)
-                                try:
-                                    total += float(cleaned)
-                                except ValueError:
-                                    continue
-                            return total
-                        combined_df[col] = combined_df[col].apply(parse_multi_values)
-                
-                # Ensure numeric columns
-                for col in ['debits', 'credits', 'balance', 'fees']:
-                    if col in combined_df.columns:
-                        combined_df[col] = combined_df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-                        # Remove multiple decimal points
-                        combined_df[col] = combined_df[col].str.replace(r'\.(?=.*\.)', '', regex=True)
-                        combined_df[col] = pd.to_numeric(combined_df[col], errors='coerce').fillna(0.0)
+                        combined_df[col] = parse_amount_series(combined_df[col])
                 
                 # Process Balance/Running Total
                 balance_col = self._find_balance_column(combined_df)
                 if balance_col and balance_col != 'balance':
                     combined_df = self._process_balance_column(combined_df, balance_col)
-                else:
-                    combined_df['balance'] = pd.to_numeric(combined_df['balance'], errors='coerce').fillna(0.0)
+                elif balance_col:
+                    combined_df['balance'] = parse_amount_series(combined_df['balance'], multi_value=False, signed_suffix=True)
                 
                 # Ensure date is datetime
                 if 'date' in combined_df.columns:
@@ -171,6 +169,43 @@ class StreamlitAnalytics:
             st.error(f"Error extracting tables: {str(e)}")
             return pd.DataFrame()
     
+    def _read_transaction_tables(self, json_data):
+        """Parse the transaction tables of a statement into one raw DataFrame, or None if there are none"""
+        all_tables = []
+        for page in json_data.get('elements', []):
+            if page.get('category') == 'table':
+                html_table = page.get('content', {}).get('html', "")
+                if html_table:
+                    table = parse_upstage_table(html_table)
+                    # Only include transaction tables (based on expected columns)
+                    if table and is_transaction_table(table[0]):
+                        all_tables.append(table)
+        
+        if not all_tables:
+            return None
+        return combine_tables(all_tables)
+    
+    def get_account_number(self, json_data):
+        """Find the account number printed in a statement's tables, or DEFAULT_ACCOUNT"""
+        for element in json_data.get('elements', []):
+            if element.get('category') != 'table':
+                continue
+            table = parse_upstage_table(element.get('content', {}).get('html', ""))
+            if not table:
+                continue
+            names, arrays = table
+            for i, name in enumerate(names):
+                name = str(name)
+                match = _RE_ACCOUNT_NUMBER.search(name)
+                if match:
+                    return match.group(1).replace(' ', '')
+                # Header cell "Account number" with the number in the row below
+                if _RE_ACCOUNT_HEADER.fullmatch(name.strip()):
+                    for value in arrays[i]:
+                        if isinstance(value, str) and re.fullmatch(r"\d[\d ]{4,}\d", value.strip()):
+                            return value.replace(' ', '')
+        return DEFAULT_ACCOUNT
+
     def _find_balance_column(self, df):
         """Find the balance column in the dataframe"""
         for col in df.columns:
@@ -181,10 +216,7 @@ class StreamlitAnalytics:
     def _process_balance_column(self, df, balance_col):
         """Process and clean the balance column"""
         try:
-            df['balance'] = df[balance_col].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-            # Handle multiple decimal points
-            df['balance'] = df['balance'].str.replace(r'\.(?=.*\.)', '', regex=True)
-            df['balance'] = pd.to_numeric(df['balance'], errors='coerce').fillna(0.0)
+            df['balance'] = parse_amount_series(df[balance_col], multi_value=False, signed_suffix=True)
             
             # Ensure date column is datetime and sort for running total
             if 'date' in df.columns:
@@ -213,29 +245,62 @@ class StreamlitAnalytics:
         return df
     
     def save_bank_statement(self, json_data):
-        """Save bank statement JSON to file"""
+        """Save bank statement JSON to file and write its normalized transactions to the store"""
         try:
+            statement_hash = compute_statement_hash(json_data)
+            json_data['statement_hash'] = statement_hash
             with open(self.json_file_path, "w") as f:
                 json.dump(json_data, f, indent=2)
+
+            self.extract_tables_to_dataframe(json_data)
+            self.store.set_latest(statement_hash)
+            self.memo.invalidate()
+            get_result_memo().invalidate()
             return True
         except Exception as e:
             st.error(f"Error saving bank statement: {str(e)}")
             return False
-    
+
+    def save_bank_statements(self, statements):
+        """Save a batch of statements, keeping the one with the latest period as the current statement"""
+        try:
+            if not statements:
+                return False
+
+            for json_data in statements:
+                json_data['statement_hash'] = compute_statement_hash(json_data)
+                self.extract_tables_to_dataframe(json_data)
+
+            # Statements without a parsed period sort first, in upload order
+            latest = max(
+                enumerate(statements),
+                key=lambda item: ((item[1].get('period') or {}).get('end') or '', item[0])
+            )[1]
+            with open(self.json_file_path, "w") as f:
+                json.dump(latest, f, indent=2)
+            self.store.set_latest(latest['statement_hash'])
+            self.memo.invalidate()
+            get_result_memo().invalidate()
+            return True
+        except Exception as e:
+            st.error(f"Error saving bank statements: {str(e)}")
+            return False
+
     def get_statement_info(self):
         """Get information about the loaded statement"""
         try:
-            if os.path.exists(self.json_file_path):
-                with open(self.json_file_path, "r") as f:
-                    json_data = json.load(f)
-                
-                return {
-                    'filename': json_data.get('filename', 'Unknown'),
-                    'period': json_data.get('period', {}),
-                    'processed_date': datetime.fromtimestamp(os.path.getmtime(self.json_file_path)),
-                    'file_size': os.path.getsize(self.json_file_path)
-                }
-            return None
+            return self.memo.get('info', self._read_statement_info)
         except Exception as e:
             st.error(f"Error getting statement info: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def _read_statement_info(self):
+        json_data = self._read_statement_file()
+        if json_data is None:
+            return None
+        return {
+            'filename': json_data.get('filename', 'Unknown'),
+            'period': json_data.get('period', {}),
+            'processed_date': datetime.fromtimestamp(os.path.getmtime(self.json_file_path)),
+            'file_size': os.path.getsize(self.json_file_path)
+        }
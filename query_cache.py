@@ -0,0 +1,250 @@
+# query_cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from connection import CATEGORY_MAPPINGS_PROJECTION, STATEMENT_INFO_PROJECTION, STATEMENT_INFO_SORT
+
+GLOBAL_SCOPE = '*'
+
+# Collections with their own memo in front (merchant.MerchantMemo): reads are not cached, writes invalidate nothing
+UNCACHED_COLLECTIONS = ('merchant_categories',)
+
+
+def _normalize(value) -> str:
+    """Stable text of a query, sort or projection; key order in dicts does not matter"""
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class QueryCache:
+    """In-process cache of database read results with write-driven invalidation.
+
+    Entries are keyed by the read operation, collection and normalized
+    query/sort/projection, and stamped with generation counters: the global
+    one and that of the user the read is scoped to. Writes bump the counter of
+    the scope they change, which makes every entry stamped with the old value
+    stale; TTL bounds staleness from writes made by other processes. The
+    least recently used entries are evicted beyond max_entries entries or
+    max_documents cached documents.
+
+    Cached results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, max_documents: int = 200_000, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.max_documents = max_documents
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._documents = 0
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(operation: str, collection_name: str, query=None, sort_by=None, projection=None, limit=None) -> tuple:
+        return (operation, collection_name, _normalize(query), _normalize(sort_by), _normalize(projection), limit)
+
+    def _stamp(self, user_id) -> tuple:
+        return (self._generations.get(GLOBAL_SCOPE, 0), self._generations.get(user_id, 0))
+
+    def get(self, key: tuple, user_id: str = None):
+        """Return (True, result) for a fresh entry, or (False, None)"""
+        with self._lock:
+            entry = self._entries.get((key, user_id))
+            if entry is not None:
+                result, expires_at, stamp, size = entry
+                if expires_at > time.monotonic() and stamp == self._stamp(user_id):
+                    self._entries.move_to_end((key, user_id))
+                    self.hits += 1
+                    return True, result
+                self._remove((key, user_id))
+            self.misses += 1
+            return False, None
+
+    def put(self, key: tuple, user_id: str, result, stamp: tuple):
+        """Store a result computed while the generations were stamp; it is dropped if they moved on since"""
+        size = len(result) if isinstance(result, list) else 1
+        with self._lock:
+            if stamp != self._stamp(user_id) or size > self.max_documents:
+                return
+            self._remove((key, user_id))
+            self._entries[(key, user_id)] = (result, time.monotonic() + self.ttl_seconds, stamp, size)
+            self._documents += size
+            while len(self._entries) > self.max_entries or self._documents > self.max_documents:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def current_stamp(self, user_id: str = None) -> tuple:
+        with self._lock:
+            return self._stamp(user_id)
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._documents -= entry[3]
+
+    def invalidate(self, user_id: str = None):
+        """Bump a user's generation, or the global one (invalidating everything) if no user is given"""
+        with self._lock:
+            scope = user_id if user_id is not None else GLOBAL_SCOPE
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'documents': self._documents,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def _user_scope(query) -> str:
+    """The user a query is restricted to, if any"""
+    if isinstance(query, dict) and isinstance(query.get('user_id'), str):
+        return query['user_id']
+    return None
+
+
+def _document_users(documents) -> set:
+    return {doc.get('user_id') for doc in documents}
+
+
+class CachedConnection:
+    """A DatabaseConnection (or SQLiteConnection) with its reads served from a QueryCache.
+
+    Reads are cached per scope: transactions and rollups per user, statements
+    and category mappings globally. Writes through this object bump the
+    generation of the scope they change; anything else is passed through.
+    """
+
+    def __init__(self, connection, cache: QueryCache):
+        self.connection = connection
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def _cached(self, user_id, key, compute):
+        if key[1] in UNCACHED_COLLECTIONS:
+            return compute()
+        hit, result = self.cache.get(key, user_id)
+        if hit:
+            return result
+        stamp = self.cache.current_stamp(user_id)
+        result = compute()
+        self.cache.put(key, user_id, result, stamp)
+        return result
+
+    def count_documents(self, query: dict = None, collection_name: str = "statements"):
+        return self._cached(_user_scope(query), QueryCache.key('count', collection_name, query),
+                            lambda: self.connection.count_documents(query, collection_name))
+
+    def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                       projection: dict = None, batch_size: int = None, limit: int = None):
+        key = QueryCache.key('find', collection_name, query, sort_by, projection, limit)
+        return self._cached(_user_scope(query), key, lambda: self.connection.find_documents(
+            query, collection_name, sort_by, projection, batch_size, limit))
+
+    def find_transactions(self, user_id: str, start_date, end_date, account: str = None):
+        key = QueryCache.key('transactions', 'transactions', [start_date, end_date, account])
+        return self._cached(user_id, key, lambda: self.connection.find_transactions(
+            user_id, start_date, end_date, account))
+
+    def find_rollups(self, user_id: str, start_date, end_date):
+        key = QueryCache.key('rollups', 'rollups', [start_date, end_date])
+        return self._cached(user_id, key, lambda: self.connection.find_rollups(user_id, start_date, end_date))
+
+    def insert_document(self, document: dict, collection_name: str = "statements"):
+        try:
+            return self.connection.insert_document(document, collection_name)
+        finally:
+            self.cache.invalidate(document.get('user_id'))
+
+    def insert_documents(self, documents: list, collection_name: str = "statements", unique_key: str = "statement_hash"):
+        try:
+            return self.connection.insert_documents(documents, collection_name, unique_key)
+        finally:
+            if collection_name not in UNCACHED_COLLECTIONS:
+                for user_id in _document_users(documents):
+                    self.cache.invalidate(user_id)
+
+    def upsert_transactions(self, documents: list):
+        try:
+            return self.connection.upsert_transactions(documents)
+        finally:
+            for user_id in _document_users(documents):
+                self.cache.invalidate(user_id)
+
+    def invalidate(self, user_id: str = None):
+        """Invalidate cached reads after a write made outside this object, e.g. through get_collection()"""
+        self.cache.invalidate(user_id)
+
+    def generation(self, user_id: str = None) -> tuple:
+        """Stamp of the data a user's reads see; it changes with every write to their data or to shared data"""
+        return self.cache.current_stamp(user_id)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+
+class CachedAsyncConnection:
+    """An async read connection sharing a QueryCache (and its keys) with CachedConnection.
+
+    Category mappings and statement info are read through find_documents, so
+    they are cached globally under the same keys as the synchronous reads and
+    invalidated by the same writes.
+    """
+
+    def __init__(self, connection, cache: QueryCache):
+        self.connection = connection
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    async def _cached(self, user_id, key, compute):
+        if key[1] in UNCACHED_COLLECTIONS:
+            return await compute()
+        hit, result = self.cache.get(key, user_id)
+        if hit:
+            return result
+        stamp = self.cache.current_stamp(user_id)
+        result = await compute()
+        self.cache.put(key, user_id, result, stamp)
+        return result
+
+    async def count_documents(self, query: dict = None, collection_name: str = "statements"):
+        return await self._cached(_user_scope(query), QueryCache.key('count', collection_name, query),
+                                  lambda: self.connection.count_documents(query, collection_name))
+
+    async def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                             projection: dict = None, limit: int = None):
+        key = QueryCache.key('find', collection_name, query, sort_by, projection, limit)
+        return await self._cached(_user_scope(query), key, lambda: self.connection.find_documents(
+            query, collection_name, sort_by, projection, limit))
+
+    async def find_transactions(self, user_id: str, start_date, end_date, account: str = None):
+        key = QueryCache.key('transactions', 'transactions', [start_date, end_date, account])
+        return await self._cached(user_id, key, lambda: self.connection.find_transactions(
+            user_id, start_date, end_date, account))
+
+    async def find_rollups(self, user_id: str, start_date, end_date):
+        key = QueryCache.key('rollups', 'rollups', [start_date, end_date])
+        return await self._cached(user_id, key, lambda: self.connection.find_rollups(user_id, start_date, end_date))
+
+    async def find_category_mappings(self):
+        return await self.find_documents(collection_name="category_mappings", projection=CATEGORY_MAPPINGS_PROJECTION)
+
+    async def find_statement_info(self, limit: int = None):
+        return await self.find_documents(sort_by=STATEMENT_INFO_SORT, projection=STATEMENT_INFO_PROJECTION, limit=limit)
@@ -0,0 +1,147 @@
+# result_memo.py
+import copy
+import functools
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from config import Config
+
+_lock = threading.Lock()
+_result_memo = None
+_call_state = threading.local()
+
+
+def _fingerprint(value):
+    """A hashable, stable stand-in for a parameter value; frames are hashed by content"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashes = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        return ('frame', hashlib.sha256(hashes.tobytes()).hexdigest()[:16])
+    if isinstance(value, (list, tuple)):
+        return tuple(_fingerprint(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _fingerprint(item)) for key, item in value.items()))
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class ResultMemo:
+    """In-process LRU of analysis results, keyed by method, dataset fingerprint, user and parameters.
+
+    The dataset fingerprint identifies the data a result was computed from
+    (see FinancialAnalyzer.dataset_fingerprint), so a new statement or a write
+    to the user's transactions makes old entries unreachable; savers also call
+    invalidate() so they are dropped at once rather than aged out. The least
+    recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: tuple):
+        """Return (True, result) for a memoized result, or (False, None)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: tuple, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: str = None):
+        """Drop a user's results, or every result if no user is given"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[2] == user_id]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def get_result_memo() -> ResultMemo:
+    """The process-wide memo of analysis results, sized from the [cache] settings"""
+    global _result_memo
+    with _lock:
+        if _result_memo is None:
+            _result_memo = ResultMemo(max_entries=int(Config().result_cache_max_entries or 256))
+        return _result_memo
+
+
+def skip_memo():
+    """Keep the result of the memoized call in progress (and of any memoized call
+    it is part of) out of the memo, e.g. a fallback returned after a handled error"""
+    _call_state.skip = True
+
+
+def memoized(method=None, *, daily: bool = False):
+    """Memoize a read-only analysis method in its instance's result_memo.
+
+    The instance provides result_memo and dataset_fingerprint(user_id); the
+    method's user_id argument, if it has one, scopes the result. Nothing is
+    memoized while the fingerprint is None, nor when the method called
+    skip_memo(). Methods relative to the current date are memoized with
+    daily=True, which adds today's date to the key. Callers get a copy of the
+    result, so they may modify it. Never use this on methods with side effects.
+    """
+    if method is None:
+        return functools.partial(memoized, daily=daily)
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(list(bound.arguments.items())[1:])
+        user_id = params.pop('user_id', None)
+        fingerprint = self.dataset_fingerprint(user_id)
+        if fingerprint is None:
+            return method(self, *args, **kwargs)
+
+        key = (method.__qualname__, fingerprint, user_id, _fingerprint(params),
+               datetime.now().date() if daily else None)
+        hit, result = self.result_memo.get(key)
+        if not hit:
+            outer_skip = getattr(_call_state, 'skip', False)
+            _call_state.skip = False
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                skipped = _call_state.skip
+                _call_state.skip = outer_skip or skipped
+            if not skipped:
+                self.result_memo.put(key, result)
+        return copy.deepcopy(result)
+    return wrapper
@@ -0,0 +1,455 @@
+# sqlite_connection.py
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from config import Config
+from connection import (INDEXES, ROLLUP_PROJECTION, TRANSACTION_PROJECTION, TRANSACTION_SORT,
+                        query_shapes, rollup_increments, rollup_range_query, transaction_range_query)
+
+# Datetimes are stored as prefixed, fixed-width ISO strings, which sort chronologically
+# and can be told apart from ordinary strings (e.g. the ISO uploaded_at) when read back
+_DATE_PREFIX = "$date:"
+_RE_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+_COMPARISONS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+# Expression indexes beyond INDEXES for conditions with no MongoDB index counterpart:
+# statement_period_query's {"period.start": {"$exists": False}} branch
+SQLITE_INDEXES = {
+    "statements": [("period_start_type", "json_type(body, '$.period.start')")],
+}
+
+
+def _encode_value(value):
+    """Convert a query or document value to what SQLite stores and compares"""
+    if isinstance(value, datetime):
+        return _DATE_PREFIX + value.isoformat(timespec='microseconds')
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    return value
+
+
+def _encode_document(obj):
+    if isinstance(obj, dict):
+        return {key: _encode_document(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_encode_document(value) for value in obj]
+    return _encode_value(obj)
+
+
+def _decode_dates(obj: dict) -> dict:
+    for key, value in obj.items():
+        if isinstance(value, str) and value.startswith(_DATE_PREFIX):
+            obj[key] = datetime.fromisoformat(value[len(_DATE_PREFIX):])
+    return obj
+
+
+def _dumps(document: dict) -> str:
+    return json.dumps(_encode_document({key: value for key, value in document.items() if key != '_id'}))
+
+
+def _field(path: str, function: str = "json_extract") -> str:
+    """SQL expression for a (dotted) document field, the same text the indexes are built on"""
+    if not _RE_FIELD.match(path):
+        raise ValueError(f"Unsupported field name: {path}")
+    return f"{function}(body, '$.{path}')"
+
+
+def translate_query(query: dict, params: list) -> str:
+    """Translate a MongoDB query document into a SQL condition, appending its parameters.
+
+    Supports field equality, $gt/$gte/$lt/$lte, $ne, $in, $nin, $exists, $regex
+    (with $options "i"), and $and/$or/$nor, which covers every query the app runs.
+    """
+    conditions = []
+    for key, value in (query or {}).items():
+        if key in ("$and", "$or", "$nor"):
+            parts = [f"({translate_query(part, params)})" for part in value] or ["1"]
+            joined = (" OR " if key != "$and" else " AND ").join(parts)
+            conditions.append(f"NOT ({joined})" if key == "$nor" else f"({joined})")
+            continue
+
+        field = _field(key)
+        if not (isinstance(value, dict) and value and all(op.startswith("$") for op in value)):
+            value = {"$eq": value}
+        for op, operand in value.items():
+            if op == "$eq":
+                if operand is None:
+                    conditions.append(f"{field} IS NULL")
+                else:
+                    conditions.append(f"{field} = ?")
+                    params.append(_encode_value(operand))
+            elif op == "$ne":
+                conditions.append(f"{field} IS NOT ?")
+                params.append(_encode_value(operand))
+            elif op in _COMPARISONS:
+                conditions.append(f"{field} {_COMPARISONS[op]} ?")
+                params.append(_encode_value(operand))
+            elif op in ("$in", "$nin"):
+                if not operand:
+                    conditions.append("0" if op == "$in" else "1")
+                    continue
+                placeholders = ", ".join("?" for _ in operand)
+                conditions.append(f"{field} {'IN' if op == '$in' else 'NOT IN'} ({placeholders})")
+                params.extend(_encode_value(item) for item in operand)
+            elif op == "$exists":
+                # json_type() is NULL only for a missing field; json_extract() is also NULL for an explicit null
+                conditions.append(f"{_field(key, 'json_type')} IS {'NOT ' if operand else ''}NULL")
+            elif op == "$regex":
+                flags = "i" if "i" in value.get("$options", "") else ""
+                conditions.append(f"regexp(?, ?, {field})")
+                params.extend([operand, flags])
+            elif op == "$options":
+                continue
+            else:
+                raise ValueError(f"Unsupported query operator: {op}")
+    return " AND ".join(conditions) or "1"
+
+
+def translate_sort(sort_by, query: dict = None) -> str:
+    """Translate a find() sort into an ORDER BY clause.
+
+    An $or query is sorted after its branches are searched: the planner would
+    otherwise read the whole table in sort-index order instead (the unary +
+    keeps it from using an index for the ORDER BY).
+    """
+    if not sort_by:
+        return ""
+    prefix = "+" if "$or" in (query or {}) else ""
+    return " ORDER BY " + ", ".join(
+        f"{prefix}{_field(field)} {'DESC' if direction < 0 else 'ASC'}" for field, direction in sort_by
+    )
+
+
+def select_sql(collection_name: str, query: dict, sort_by, params: list) -> str:
+    """The SELECT of a find(), appending its parameters"""
+    return (f"SELECT _id, body FROM {collection_name} WHERE {translate_query(query, params)}"
+            f"{translate_sort(sort_by, query)}")
+
+
+def _regexp(pattern, flags, value):
+    if value is None:
+        return False
+    return re.search(pattern, str(value), re.IGNORECASE if flags else 0) is not None
+
+
+def _project(document: dict, projection: dict) -> dict:
+    """Apply a find() projection to a document.
+
+    Expression projections (e.g. TABLE_ELEMENTS_PROJECTION's $filter) return the
+    whole field: there is no transfer to save in-process.
+    """
+    if not projection:
+        return document
+    include_id = projection.get('_id', 1)
+    fields = {key: spec for key, spec in projection.items() if key != '_id'}
+    if any(spec for spec in fields.values()):
+        projected = {key: document[key] for key in fields if key in document}
+    else:
+        projected = {key: value for key, value in document.items() if key not in fields}
+    if include_id and '_id' in document:
+        projected['_id'] = document['_id']
+    elif not include_id:
+        projected.pop('_id', None)
+    return projected
+
+
+class SQLiteCollection:
+    """Minimal collection object for callers that use get_collection() directly"""
+
+    def __init__(self, connection, name: str):
+        self.connection = connection
+        self.name = name
+        self.database = SimpleNamespace(name=os.path.basename(connection.path))
+
+    def insert_one(self, document: dict):
+        return SimpleNamespace(inserted_id=self.connection._insert(self.name, [document])[0])
+
+    def find(self, query: dict = None, projection: dict = None):
+        return self.connection.find_documents(query, self.name, projection=projection)
+
+    def count_documents(self, query: dict = None):
+        return self.connection.count_documents(query, self.name)
+
+
+class SQLiteConnection:
+    """Embedded single-node storage with the DatabaseConnection API.
+
+    Each collection is a table of JSON documents. Queries are MongoDB query
+    documents translated to SQL over json_extract(), and the INDEXES are
+    created as expression indexes on the same json_extract() terms, so the
+    app's queries are index searches. One connection per database file is
+    shared by the process, serialized by a lock. There is no aggregate():
+    aggregation pipelines need MongoDB, so FinancialAnalyzer rejects
+    ANALYTICS_BACKEND 'mongo' with this backend.
+    """
+
+    _lock = threading.RLock()
+    _connections = {}
+
+    def __init__(self, path: str = None):
+        self.config = Config()
+        self.path = path or self.config.sqlite_path or os.path.join("data", "bankstat.db")
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        with SQLiteConnection._lock:
+            db = SQLiteConnection._connections.get(self.path)
+            if db is None:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.create_function("regexp", 3, _regexp, deterministic=True)
+                SQLiteConnection._connections[self.path] = db
+                self._ensure_schema(db)
+            return db
+
+    def _ensure_schema(self, db):
+        for collection_name, indexes in INDEXES.items():
+            self._ensure_table(db, collection_name)
+            for index in indexes:
+                spec = index.document
+                columns = ", ".join(
+                    f"{_field(field)}{' DESC' if direction == -1 else ''}" for field, direction in spec['key'].items()
+                )
+                db.execute(
+                    f"CREATE {'UNIQUE ' if spec.get('unique') else ''}INDEX IF NOT EXISTS "
+                    f"{collection_name}_{spec['name']} ON {collection_name} ({columns})"
+                )
+            for name, expression in SQLITE_INDEXES.get(collection_name, []):
+                db.execute(f"CREATE INDEX IF NOT EXISTS {collection_name}_{name} ON {collection_name} ({expression})")
+
+    @staticmethod
+    def _ensure_table(db, collection_name: str):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", collection_name):
+            raise ValueError(f"Unsupported collection name: {collection_name}")
+        db.execute(f"CREATE TABLE IF NOT EXISTS {collection_name} (_id INTEGER PRIMARY KEY, body TEXT NOT NULL)")
+
+    def _execute(self, sql: str, params=()):
+        with SQLiteConnection._lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def _insert(self, collection_name: str, documents: list, ignore_conflicts: bool = False) -> list:
+        """Insert documents, returning their ids (None for ones ignored as duplicates)"""
+        ids = []
+        with SQLiteConnection._lock:
+            db = self.db
+            self._ensure_table(db, collection_name)
+            db.execute("BEGIN")
+            try:
+                for document in documents:
+                    cursor = db.execute(
+                        f"INSERT {'OR IGNORE ' if ignore_conflicts else ''}INTO {collection_name} (body) VALUES (?)",
+                        (_dumps(document),)
+                    )
+                    ids.append(cursor.lastrowid if cursor.rowcount else None)
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return ids
+
+    def get_collection(self, collection_name: str = "statements", db_name: str = "bankstat"):
+        """Get collection instance"""
+        return SQLiteCollection(self, collection_name)
+
+    def test_connection(self):
+        """Test database connection and return status"""
+        try:
+            doc_count = self.count_documents()
+            return True, f"Connection successful ({self.path}). Found {doc_count} documents in collection."
+        except Exception as e:
+            return False, f"Connection test failed: {str(e)}"
+
+    def ensure_indexes(self, db=None):
+        """Create the INDEXES; done when the database file is first opened"""
+        self._ensure_schema(self.db)
+
+    def explain_queries(self):
+        """Explain the app's query shapes with EXPLAIN QUERY PLAN, flagging full table scans"""
+        results = []
+        for collection_name, name, query, sort_by in query_shapes():
+            params = []
+            sql = select_sql(collection_name, query, sort_by, params)
+            details = [row[-1] for row in self._execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            # SCAN visits every row, in table or index order; SEARCH is a seek
+            collscan = any(detail.startswith("SCAN ") for detail in details)
+            results.append({
+                'collection': collection_name,
+                'query': name,
+                'plan': ' <- '.join(details),
+                'collscan': collscan,
+            })
+            if collscan:
+                self.logger.warning(f"Query '{name}' on {collection_name} is a table scan")
+        return results
+
+    def insert_document(self, document: dict, collection_name: str = "statements"):
+        """Insert a document into the specified collection"""
+        try:
+            document['uploaded_at'] = datetime.now().isoformat()
+            document['processed_by'] = 'streamlit_app'
+            inserted_id = self._insert(collection_name, [document])[0]
+            self.logger.info(f"Document inserted with ID: {inserted_id}")
+            return inserted_id
+        except Exception as e:
+            self.logger.error(f"Failed to insert document: {str(e)}")
+            raise
+
+    def insert_documents(self, documents: list, collection_name: str = "statements", unique_key: str = "statement_hash"):
+        """Insert several documents in one transaction, skipping any whose unique key is already stored.
+
+        Returns:
+            A tuple of (inserted ids, number of skipped documents).
+        """
+        try:
+            keys = [doc[unique_key] for doc in documents if doc.get(unique_key)]
+            existing = set()
+            if keys:
+                existing = {
+                    doc.get(unique_key)
+                    for doc in self.find_documents({unique_key: {"$in": keys}}, collection_name, projection={unique_key: 1})
+                }
+
+            new_documents = []
+            seen = set()
+            for document in documents:
+                key = document.get(unique_key)
+                if key and (key in existing or key in seen):
+                    continue
+                seen.add(key)
+                document['uploaded_at'] = datetime.now().isoformat()
+                document['processed_by'] = 'streamlit_app'
+                new_documents.append(document)
+
+            if not new_documents:
+                return [], len(documents)
+
+            inserted_ids = self._insert(collection_name, new_documents)
+            self.logger.info(f"Inserted {len(inserted_ids)} documents, skipped {len(documents) - len(new_documents)}")
+            return inserted_ids, len(documents) - len(new_documents)
+
+        except Exception as e:
+            self.logger.error(f"Failed to insert documents: {str(e)}")
+            raise
+
+    def upsert_transactions(self, documents: list):
+        """Insert per-transaction documents, ignoring ones whose (user_id, account, fingerprint) is stored.
+
+        Returns:
+            The number of new transactions.
+        """
+        try:
+            if not documents:
+                return 0
+            ids = self._insert("transactions", documents, ignore_conflicts=True)
+            new_documents = [doc for doc, inserted_id in zip(documents, ids) if inserted_id is not None]
+            self.logger.info(f"Inserted {len(new_documents)} transactions, {len(documents) - len(new_documents)} already stored")
+            self.update_rollups(new_documents)
+            return len(new_documents)
+
+        except Exception as e:
+            self.logger.error(f"Failed to upsert transactions: {str(e)}")
+            raise
+
+    def update_rollups(self, documents: list):
+        """Add newly inserted transactions to the daily (user_id, day, category) rollups"""
+        try:
+            increments = rollup_increments(documents)
+            if not increments:
+                return
+            with SQLiteConnection._lock:
+                db = self.db
+                db.execute("BEGIN")
+                try:
+                    for (user_id, day, category), totals in increments.items():
+                        key = (user_id, _encode_value(day), category)
+                        cursor = db.execute(
+                            "UPDATE rollups SET body = json_set(body, "
+                            "'$.debits', json_extract(body, '$.debits') + ?, "
+                            "'$.credits', json_extract(body, '$.credits') + ?, "
+                            "'$.count', json_extract(body, '$.count') + ?) "
+                            f"WHERE {_field('user_id')} = ? AND {_field('day')} = ? AND {_field('category')} = ?",
+                            (totals['debits'], totals['credits'], totals['count'], *key)
+                        )
+                        if not cursor.rowcount:
+                            db.execute("INSERT INTO rollups (body) VALUES (?)", (_dumps(
+                                {"user_id": user_id, "day": day, "category": category, **totals}
+                            ),))
+                    db.execute("COMMIT")
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+            self.logger.info(f"Updated {len(increments)} rollups")
+
+        except Exception as e:
+            self.logger.error(f"Failed to update rollups: {str(e)}")
+            raise
+
+    def find_rollups(self, user_id: str, start_date, end_date):
+        """Find a user's daily category rollups between two dates (inclusive)"""
+        return self.find_documents(rollup_range_query(user_id, start_date, end_date), "rollups",
+                                   projection=ROLLUP_PROJECTION)
+
+    def find_transactions(self, user_id: str, start_date, end_date, account: str = None):
+        """Find a user's transactions between two dates (inclusive), sorted by date"""
+        return self.find_documents(transaction_range_query(user_id, start_date, end_date, account), "transactions",
+                                   TRANSACTION_SORT, TRANSACTION_PROJECTION)
+
+    def find_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                       projection: dict = None, batch_size: int = None, limit: int = None):
+        """Find documents in the specified collection"""
+        try:
+            return list(self.iter_documents(query, collection_name, sort_by, projection, batch_size, limit))
+
+        except Exception as e:
+            self.logger.error(f"Failed to find documents: {str(e)}")
+            raise
+
+    def iter_documents(self, query: dict = None, collection_name: str = "statements", sort_by: list = None,
+                       projection: dict = None, batch_size: int = None, limit: int = None):
+        """Yield documents from the specified collection; batch_size is accepted for API parity"""
+        params = []
+        sql = select_sql(collection_name, query, sort_by, params)
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with SQLiteConnection._lock:
+            self._ensure_table(self.db, collection_name)
+        for _id, body in self._execute(sql, params):
+            document = json.loads(body, object_hook=_decode_dates)
+            document['_id'] = _id
+            yield _project(document, projection)
+
+    def count_documents(self, query: dict = None, collection_name: str = "statements"):
+        """Count documents in the specified collection"""
+        try:
+            params = []
+            with SQLiteConnection._lock:
+                self._ensure_table(self.db, collection_name)
+            return self._execute(f"SELECT COUNT(*) FROM {collection_name} WHERE {translate_query(query, params)}",
+                                 params)[0][0]
+
+        except Exception as e:
+            self.logger.error(f"Failed to count documents: {str(e)}")
+            return 0
+
+    def pool_stats(self):
+        """Embedded storage has no connection pool"""
+        return None
+
+    def close_connection(self):
+        """Close the database file; it is reopened on next use"""
+        with SQLiteConnection._lock:
+            db = SQLiteConnection._connections.pop(self.path, None)
+            if db is not None:
+                db.close()
+                self.logger.info("Database connection closed")
@@ -0,0 +1,65 @@
+# statement_memo.py
+import os
+import threading
+
+
+class StatementFileMemo:
+    """Process-wide memo of values derived from a statement file.
+
+    Values (the parsed document, its statement info, the normalized DataFrame)
+    are kept per path and keyed on the file's (path, mtime, size), so any
+    rewrite of the file discards them. Writers should also call invalidate(),
+    since two writes within the filesystem's mtime resolution can leave the
+    key unchanged.
+    """
+
+    _lock = threading.Lock()
+    _entries = {}
+    _generations = {}
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _key(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (os.path.abspath(self.path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, name: str, compute):
+        """Get a memoized value, computing it with compute() if the file changed since it was stored.
+
+        Nothing is memoized while the file does not exist.
+        """
+        key = self._key()
+        if key is None:
+            return compute()
+
+        with StatementFileMemo._lock:
+            stored_key, values = StatementFileMemo._entries.get(self.path, (None, {}))
+            if stored_key == key and name in values:
+                return values[name]
+
+        value = compute()
+        with StatementFileMemo._lock:
+            stored_key, values = StatementFileMemo._entries.get(self.path, (None, {}))
+            if stored_key != key:
+                values = {}
+                StatementFileMemo._entries[self.path] = (key, values)
+            values[name] = value
+        return value
+
+    def version(self):
+        """The version of the file's contents: its key and invalidation count, or None while it does not exist"""
+        key = self._key()
+        if key is None:
+            return None
+        with StatementFileMemo._lock:
+            return key + (StatementFileMemo._generations.get(self.path, 0),)
+
+    def invalidate(self):
+        """Drop everything memoized for this file, and move on to a new version"""
+        with StatementFileMemo._lock:
+            StatementFileMemo._entries.pop(self.path, None)
+            StatementFileMemo._generations[self.path] = StatementFileMemo._generations.get(self.path, 0) + 1
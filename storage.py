@@ -0,0 +1,66 @@
+# storage.py
+import threading
+
+from config import Config
+from query_cache import CachedAsyncConnection, CachedConnection, QueryCache
+
+# Where documents are stored: a MongoDB deployment, or an embedded SQLite file
+STORAGE_BACKENDS = ('mongo', 'sqlite')
+
+_lock = threading.Lock()
+_connections = {}
+_query_cache = None
+
+
+def storage_backend() -> str:
+    """The configured STORAGE_BACKEND, 'mongo' by default"""
+    backend = (Config().storage_backend or 'mongo').lower()
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND must be one of {', '.join(STORAGE_BACKENDS)}, got '{backend}'")
+    return backend
+
+
+def get_query_cache() -> QueryCache:
+    """The process-wide cache of database reads, sized from the [cache] settings"""
+    global _query_cache
+    with _lock:
+        if _query_cache is None:
+            config = Config()
+            _query_cache = QueryCache(
+                max_entries=int(config.query_cache_max_entries or 256),
+                max_documents=int(config.query_cache_max_documents or 200_000),
+                ttl_seconds=float(config.query_cache_ttl_seconds or 300)
+            )
+        return _query_cache
+
+
+def get_db_connection():
+    """The process-wide connection of the configured storage backend, with cached reads"""
+    backend = storage_backend()
+    cache = get_query_cache()
+    with _lock:
+        if backend not in _connections:
+            if backend == 'sqlite':
+                from sqlite_connection import SQLiteConnection
+                connection = SQLiteConnection()
+            else:
+                from connection import db_connection as connection
+            _connections[backend] = CachedConnection(connection, cache)
+        return _connections[backend]
+
+
+def get_async_db_connection():
+    """The process-wide async read API of the configured storage backend, sharing the read cache"""
+    from async_connection import AsyncConnectionAdapter, async_db_connection
+    backend = storage_backend()
+    connection = get_db_connection()
+    key = f'{backend}-async'
+    with _lock:
+        if key not in _connections:
+            if backend == 'mongo':
+                _connections[key] = CachedAsyncConnection(async_db_connection, connection.cache)
+            else:
+                # The adapter calls the underlying connection so each read is looked up in the cache once
+                _connections[key] = CachedAsyncConnection(AsyncConnectionAdapter(connection.connection),
+                                                          connection.cache)
+        return _connections[key]
@@ -2,7 +2,7 @@ import streamlit as st
 from datetime import datetime, timedelta
 from config import Config
 from processing import StreamlitAnalytics
-from connection import DatabaseConnection
+from storage import get_db_connection
 from financial_analyzer import FinancialAnalyzer
 from pdf_processor import StreamlitBankProcessor
 from tabs.upload_tab import render_upload_tab
@@ -105,15 +105,15 @@ def main():
 
     # Initialize components
     processor = StreamlitAnalytics()
-    db_connection = DatabaseConnection()
+    db_connection = get_db_connection()
     pdf_processor = StreamlitBankProcessor()
     analyzer = FinancialAnalyzer(base_analyzer=processor)
 
     # Render selected tab
     if tab_selection == "📁 Upload & Process":
-        render_upload_tab(pdf_processor, processor, db_connection)
+        render_upload_tab(pdf_processor, processor, db_connection, user.user_id)
     elif tab_selection == "📊 View Dashboard":
-        render_dashboard_tab(analyzer, processor, db_connection, start_date, end_date)
+        render_dashboard_tab(analyzer, processor, db_connection, start_date, end_date, user.user_id)
     elif tab_selection == "🧮 Tools":
         render_tools_tab()
     elif tab_selection == "⚙️ Settings":
@@ -0,0 +1,140 @@
+# summary_engine.py
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from transaction_store import to_rands
+
+TOTAL_COLUMNS = ['debits', 'credits', 'transaction_count']
+
+
+def _empty_totals(index: pd.Index) -> pd.DataFrame:
+    return pd.DataFrame({col: pd.Series(dtype='int64') for col in TOTAL_COLUMNS}, index=index)
+
+
+def _empty_days() -> pd.Index:
+    return pd.DatetimeIndex([], dtype='datetime64[ns]', name='day')
+
+
+def _empty_categories() -> pd.Index:
+    return pd.Index([], dtype='object', name='category')
+
+
+def _with_net(totals: pd.DataFrame) -> pd.DataFrame:
+    return totals.assign(net=totals['credits'] - totals['debits'])
+
+
+def _with_average(totals: pd.DataFrame) -> pd.DataFrame:
+    debits = totals['debits'].to_numpy()
+    counts = totals['transaction_count'].to_numpy()
+    average = np.divide(debits, counts, out=np.zeros(len(totals)), where=debits > 0)
+    return totals.assign(avg_transaction=average)
+
+
+@dataclass(frozen=True)
+class TransactionSummary:
+    """Daily and per-category totals of a set of transactions, in int64 cents.
+
+    daily is indexed by day (midnight timestamps, ascending) and categories by
+    category; both have debits, credits, net and transaction_count columns,
+    and categories also avg_transaction (mean debit). The totals cover every
+    transaction, including undated ones that have no daily row. Values stay
+    in cents until they are displayed.
+    """
+
+    daily: pd.DataFrame
+    categories: pd.DataFrame
+    total_debits: int = 0
+    total_credits: int = 0
+    transaction_count: int = 0
+
+    @classmethod
+    def from_totals(cls, daily: pd.DataFrame, categories: pd.DataFrame, total_debits: int = None,
+                    total_credits: int = None, transaction_count: int = None) -> "TransactionSummary":
+        """Build a summary from debits/credits/transaction_count frames; totals default to the daily sums"""
+        daily = _with_net(daily.sort_index())
+        return cls(
+            daily=daily,
+            categories=_with_average(_with_net(categories)),
+            total_debits=int(daily['debits'].sum() if total_debits is None else total_debits),
+            total_credits=int(daily['credits'].sum() if total_credits is None else total_credits),
+            transaction_count=int(daily['transaction_count'].sum() if transaction_count is None else transaction_count),
+        )
+
+    @classmethod
+    def empty(cls) -> "TransactionSummary":
+        return cls.from_totals(_empty_totals(_empty_days()), _empty_totals(_empty_categories()))
+
+    @property
+    def net_flow(self) -> int:
+        return self.total_credits - self.total_debits
+
+    def category_dict(self) -> dict:
+        """The category totals as dicts of rands keyed by category (to_dict()['expense_types'])"""
+        categories = pd.DataFrame({
+            'debits': to_rands(self.categories['debits']),
+            'credits': to_rands(self.categories['credits']),
+            'net': to_rands(self.categories['net']),
+            'transaction_count': self.categories['transaction_count'],
+            'avg_transaction': to_rands(self.categories['avg_transaction']),
+        })
+        categories.index = self.categories.index.astype(str)
+        return categories.to_dict('index')
+
+    def to_dict(self) -> dict:
+        """The summary as nested dicts of rands keyed by date string and category, e.g. for JSON"""
+        daily = pd.DataFrame({
+            'debits': to_rands(self.daily['debits']),
+            'credits': to_rands(self.daily['credits']),
+            'net': to_rands(self.daily['net']),
+            'transaction_count': self.daily['transaction_count'],
+        })
+        daily.index = self.daily.index.strftime('%Y-%m-%d')
+        return {
+            'daily_flow': daily.to_dict('index'),
+            'expense_types': self.category_dict(),
+            'total_debits': to_rands(self.total_debits),
+            'total_credits': to_rands(self.total_credits),
+            'net_flow': to_rands(self.total_credits) - to_rands(self.total_debits),
+            'transaction_count': self.transaction_count
+        }
+
+
+def summarize_transactions(df: pd.DataFrame, categories: pd.Series = None) -> TransactionSummary:
+    """Summarize a canonical transactions frame with one groupby().agg pass per axis.
+
+    Transactions are grouped by their category column unless categories (a
+    Series aligned with df) is given.
+    """
+    if df.empty:
+        return TransactionSummary.empty()
+    amounts = df[['debits', 'credits']]
+    aggregations = {'debits': ('debits', 'sum'), 'credits': ('credits', 'sum'),
+                    'transaction_count': ('debits', 'size')}
+    daily = amounts.groupby(df['date'].dt.floor('D').rename('day')).agg(**aggregations)
+    by_category = amounts.groupby(df['category'] if categories is None else categories.rename('category'),
+                                  observed=True).agg(**aggregations)
+    return TransactionSummary.from_totals(daily, by_category, int(amounts['debits'].sum()),
+                                          int(amounts['credits'].sum()), len(df))
+
+
+def summarize_rollups(rollups: list) -> TransactionSummary:
+    """Summarize daily category rollup documents"""
+    if not rollups:
+        return TransactionSummary.empty()
+    frame = pd.DataFrame(rollups, columns=['day', 'category', 'debits', 'credits', 'count'])
+    frame = frame.rename(columns={'count': 'transaction_count'})
+    daily = frame.groupby('day')[TOTAL_COLUMNS].sum()
+    by_category = frame.groupby('category')[TOTAL_COLUMNS].sum()
+    return TransactionSummary.from_totals(daily, by_category)
+
+
+def summarize_groups(daily: list, categories: list) -> TransactionSummary:
+    """Summarize pre-grouped {_id, debits, credits, count} records, e.g. from an aggregation pipeline"""
+    def totals(records, empty_index):
+        if not records:
+            return _empty_totals(empty_index)
+        frame = pd.DataFrame(records, columns=['_id', 'debits', 'credits', 'count'])
+        return frame.rename(columns={'count': 'transaction_count'}).set_index('_id').rename_axis(empty_index.name)
+    return TransactionSummary.from_totals(totals(daily, _empty_days()), totals(categories, _empty_categories()))
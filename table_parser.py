@@ -0,0 +1,261 @@
+# table_parser.py
+import re
+from functools import lru_cache
+from html import unescape
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# Same whitespace collapsing and missing-value markers as pd.read_html
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+# Numbers with thousands separators, which pd.read_html strips the ',' from
+_RE_THOUSANDS_NUMBER = re.compile(r"^[\-\+]?([0-9]+,|[0-9])*(\.[0-9]*)?([0-9]?(E|e)\-?[0-9]+)?$")
+SECTIONS = ('thead', 'tbody', 'tfoot')
+# Header cells that identify a statement's transaction tables
+TRANSACTION_COLUMNS = ('Date', 'Description', 'Debits (R)', 'Credits (R)', 'Balance (R)')
+# Descriptions of summary rows that are not transactions
+SUMMARY_ROWS = 'Total Charges|Closing balance|Opening balance|Balance brought forward|Balance carried forward'
+
+# Tags, comments, text runs, and stray '<' characters
+_RE_TOKEN = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|<!--.*?-->|([^<]+)|<", re.S)
+_RE_SPAN = re.compile(r"""\b(rowspan|colspan)\s*=\s*["']?(\d+)""", re.I)
+
+
+class UpstageTableParser:
+    """Streaming parser for the narrow table HTML emitted by Upstage document-parse.
+
+    A single regex scan tokenizes the fragment into tags and text, so no DOM is
+    built. Only the first top-level <table> is read. Rows are collected per
+    section as lists of (tag, text, rowspan, colspan) cells; nested tables
+    contribute their text to the enclosing cell, as lxml's text_content() does
+    for pd.read_html.
+    """
+
+    def parse(self, html: str):
+        """Parse an HTML fragment and return (header, body, footer) rows of cells"""
+        sections = {'thead': [], 'tbody': [], 'tfoot': [], None: []}
+        depth = 0
+        section = None
+        row = None
+        cell = None
+
+        for match in _RE_TOKEN.finditer(html):
+            closing, tag, attrs, text = match.group(1, 2, 3, 4)
+            if tag is None:
+                if cell is not None and not match.group(0).startswith('<!--'):
+                    cell[1].append(match.group(0))
+                continue
+
+            tag = tag.lower()
+            if tag == 'table':
+                depth += -1 if closing else 1
+                if depth == 0 and closing:
+                    break
+                continue
+            if depth == 0:
+                continue
+            if tag == 'br':
+                if cell is not None:
+                    cell[1].append('\n')
+                continue
+            if depth > 1:
+                continue
+
+            if tag in ('td', 'th'):
+                if cell is not None:
+                    row.append(_close_cell(cell))
+                    cell = None
+                if not closing:
+                    if row is None:
+                        row = []
+                    cell = (tag, [], *_spans(attrs))
+            elif tag == 'tr' or tag in SECTIONS:
+                if cell is not None:
+                    row.append(_close_cell(cell))
+                    cell = None
+                if row is not None:
+                    sections[section].append(row)
+                    row = None
+                if tag == 'tr':
+                    if not closing:
+                        row = []
+                else:
+                    section = None if closing else tag
+
+        if cell is not None:
+            row.append(_close_cell(cell))
+        if row is not None:
+            sections[section].append(row)
+
+        header = sections['thead']
+        body = sections['tbody'] + sections[None]
+        footer = sections['tfoot']
+
+        # Without a <thead>, leading rows made only of <th> cells form the header
+        if not header:
+            while body and all(cell[0] == 'th' for cell in body[0]):
+                header.append(body.pop(0))
+        return header, body, footer
+
+
+def _close_cell(cell):
+    """Finish a cell, collapsing its text the way pd.read_html does"""
+    tag, parts, rowspan, colspan = cell
+    text = "".join(parts)
+    if '&' in text:
+        text = unescape(text)
+    return tag, _RE_WHITESPACE.sub(" ", text.strip()), rowspan, colspan
+
+
+def _spans(attrs: str):
+    """Parse the rowspan and colspan attributes of a cell"""
+    rowspan = colspan = 1
+    if 'span' in attrs:
+        for name, value in _RE_SPAN.findall(attrs):
+            if name.lower() == 'rowspan':
+                rowspan = int(value)
+            else:
+                colspan = int(value)
+    return rowspan, colspan
+
+
+def _clean_value(value: str):
+    """Map a cell to NaN or strip thousands separators from numbers, like pd.read_html"""
+    if value in NA_VALUES:
+        return np.nan
+    if ',' in value and _RE_THOUSANDS_NUMBER.search(value.strip()):
+        return value.replace(',', '')
+    return value
+
+
+def _expand_spans(rows, remainder=None, overflow=True):
+    """Copy rowspan/colspan cell text into the cells they cover, like pd.read_html"""
+    all_texts = []
+    remainder = remainder if remainder is not None else []
+
+    for row in rows:
+        texts = []
+        next_remainder = []
+        index = 0
+        for _, text, rowspan, colspan in row:
+            while remainder and remainder[0][0] <= index:
+                prev_i, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+                index += 1
+
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        for prev_i, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    if not overflow:
+        while remainder:
+            next_remainder = []
+            texts = []
+            for prev_i, prev_text, prev_rowspan in remainder:
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+            all_texts.append(texts)
+            remainder = next_remainder
+
+    return all_texts, remainder
+
+
+@lru_cache(maxsize=256)
+def _header_names(header_rows, header):
+    """Build column names from the header rows using pandas' naming and de-duplication rules"""
+    rows = [list(row) for row in header_rows]
+    header = header if isinstance(header, int) else list(header)
+    with TextParser(rows, header=header, thousands=',') as tp:
+        columns = tp.read().columns
+    if isinstance(columns, pd.MultiIndex):
+        return tuple('_'.join(col) for col in columns)
+    return tuple(columns)
+
+
+def parse_upstage_table(html: str):
+    """Parse one Upstage table element into (column names, column arrays).
+
+    Column names match what pd.read_html would produce (with MultiIndex headers
+    joined by '_'). Cell values are kept as strings with missing markers mapped
+    to NaN. Returns None if the fragment contains no table text.
+    """
+    header_cells, body_cells, footer_cells = UpstageTableParser().parse(html)
+    head, remainder = _expand_spans(header_cells)
+    body, remainder = _expand_spans(body_cells, remainder, overflow=len(footer_cells) > 0)
+    foot, _ = _expand_spans(footer_cells, remainder, overflow=False)
+
+    rows = head + body + foot
+    if not any(text for row in rows for text in row):
+        return None
+
+    width = max(len(row) for row in rows)
+    for row in rows:
+        if len(row) < width:
+            row.extend([""] * (width - len(row)))
+
+    if not head:
+        names = list(range(width))
+        data_rows = rows
+    else:
+        header = 0 if len(head) == 1 else [i for i, row in enumerate(head) if any(row)]
+        last_header = header if isinstance(header, int) else max(header, default=-1)
+        header_rows = tuple(tuple(row) for row in rows[:last_header + 1])
+        names = list(_header_names(header_rows, header if isinstance(header, int) else tuple(header)))
+        data_rows = rows[last_header + 1:]
+
+    # Single-cell blank rows are dropped by pandas' blank-line handling
+    data_rows = [row for row in data_rows if width > 1 or row[0].strip()]
+
+    arrays = []
+    for values in zip(*data_rows) if data_rows else [()] * width:
+        column = np.empty(len(values), dtype=object)
+        column[:] = [_clean_value(value) for value in values]
+        arrays.append(column)
+    return names, arrays
+
+
+def is_transaction_table(names) -> bool:
+    """Check whether a table's column names mark it as a transaction table"""
+    return any(col in names for col in TRANSACTION_COLUMNS)
+
+
+def combine_tables(tables) -> pd.DataFrame:
+    """Concatenate parsed tables by column name, in order of first appearance, like pd.concat"""
+    names = []
+    for table_names, _ in tables:
+        for name in table_names:
+            if name not in names:
+                names.append(name)
+
+    columns = {name: [] for name in names}
+    for table_names, arrays in tables:
+        length = len(arrays[0]) if arrays else 0
+        present = dict(zip(table_names, arrays))
+        for name in names:
+            if name in present:
+                columns[name].append(present[name])
+            else:
+                columns[name].append(np.full(length, np.nan, dtype=object))
+
+    return pd.DataFrame({
+        name: np.concatenate(parts) if parts else np.array([], dtype=object)
+        for name, parts in columns.items()
+    })
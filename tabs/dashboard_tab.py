@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
 from dashboard_viz import create_dashboard_metrics, create_expense_breakdown_chart, create_cash_flow_chart
+from connection import TABLE_ELEMENTS_PROJECTION, statement_period_query
+from storage import get_async_db_connection
+from transaction_store import amounts_in_rands, concat_transactions, from_documents
 
-def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_date):
+STATEMENT_BATCH_SIZE = 8
+
+def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_date, user_id):
     st.header("📊 Financial Dashboard")
     
     # Data source selection
@@ -13,9 +18,22 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
         # Check what data is available
         local_available = processor.get_statement_info() is not None
         db_available = False
+        transaction_count = 0
+        latest_statement = None
+        mappings = None
+        async_db_connection = get_async_db_connection()
         try:
-            doc_count = db_connection.count_documents()
-            db_available = doc_count > 0
+            # The counts, the latest statement's metadata and the category mappings in one concurrent round trip
+            overview = async_db_connection.run(async_db_connection.gather(
+                transactions=async_db_connection.count_documents({"user_id": user_id}, "transactions"),
+                statements=async_db_connection.count_documents(),
+                latest_statement=async_db_connection.find_statement_info(limit=1),
+                mappings=async_db_connection.find_category_mappings()
+            ))
+            transaction_count = overview['transactions']
+            db_available = transaction_count > 0 or overview['statements'] > 0
+            latest_statement = overview['latest_statement'][0] if overview['latest_statement'] else None
+            mappings = overview['mappings']
         except:
             db_available = False
         
@@ -32,132 +50,67 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
     # Load data based on source
     transactions_df = pd.DataFrame()
     data_info = {}
+    summary_data = None
     
     if data_source == "Database Query":
         try:
             st.info(f"🔍 Querying database for transactions between {start_date} and {end_date}")
             with st.spinner("Loading data from database..."):
-                # Query database for date range
-                query = {
-                    "$or": [
-                        {
-                            "period.start": {"$lte": end_date.strftime("%Y-%m-%d")},
-                            "period.end": {"$gte": start_date.strftime("%Y-%m-%d")}
-                        },
-                        {
-                            "period.start": {"$exists": False}  # Fallback for documents without period
-                        }
-                    ]
-                }
-                
-                documents = db_connection.find_documents(query=query, sort_by=[("uploaded_at", -1)])
-                st.write(f"📊 Found {len(documents)} relevant document(s) in database")
-                
-                if documents:
-                    # Process all documents that match the date range
-                    for doc in documents:
-                        df = processor.extract_tables_to_dataframe(doc)
-                        if not df.empty:
-                            # Standardize column names
-                            column_mapping = {
-                                'Date': 'date',
-                                'Transaction Date': 'date',
-                                'Trans Date': 'date',
-                                'Description': 'description',
-                                'Details': 'description',
-                                'Trans Details': 'description',
-                                'Debit': 'debits',
-                                'Debits': 'debits',
-                                'Credit': 'credits',
-                                'Credits': 'credits',
-                                'Balance': 'balance',
-                                'Running Balance': 'balance',
-                                'Saldo': 'balance'
-                            }
-                            df = df.rename(columns=column_mapping)
-                            
-                            # Ensure required columns exist
-                            required_columns = ['date', 'description', 'debits', 'credits', 'balance']
-                            for col in required_columns:
-                                if col not in df.columns:
-                                    df[col] = 'Unknown' if col == 'description' else 0.0
-                            
-                            # Filter by actual transaction dates
-                            if 'date' in df.columns:
-                                df['date'] = pd.to_datetime(df['date'], errors='coerce')
-                                df = df[
-                                    (df['date'] >= pd.to_datetime(start_date)) &
-                                    (df['date'] <= pd.to_datetime(end_date))
-                                ]
-                            
-                            if not df.empty:
-                                transactions_df = pd.concat([transactions_df, df], ignore_index=True)
-                
+                if transaction_count:
+                    # Index range scan on (user_id, account, date) returning only the selected rows,
+                    # fetched concurrently with the range's rollups
+                    reads = {'transactions': async_db_connection.find_transactions(user_id, start_date, end_date)}
+                    if analyzer.backend == 'pandas':
+                        reads['rollups'] = async_db_connection.find_rollups(user_id, start_date, end_date)
+                    results = async_db_connection.run(async_db_connection.gather(**reads))
+                    transactions_df = from_documents(results['transactions'])
                     if not transactions_df.empty:
-                        # Remove duplicates and sort
-                        transactions_df = transactions_df.drop_duplicates().sort_values('date' if 'date' in transactions_df.columns else transactions_df.columns[0])
+                        # Totals and charts come from rollups or an aggregation pipeline, per ANALYTICS_BACKEND
+                        if 'rollups' in results:
+                            summary_data = analyzer.summary_from_rollups(results['rollups'])
+                        else:
+                            summary_data = analyzer.get_range_summary(user_id, start_date, end_date)
                         data_info = {
                             'source': 'Database',
-                            'documents_found': len(documents),
                             'transactions_loaded': len(transactions_df),
                             'date_range': f"{start_date} to {end_date}",
                             'columns': transactions_df.columns.tolist()
                         }
+                        if latest_statement:
+                            period = latest_statement.get('period') or {}
+                            data_info['latest_statement'] = (f"{latest_statement.get('filename', 'Unknown')} "
+                                                             f"({period.get('start', 'Unknown')} to {period.get('end', 'Unknown')})")
                     else:
                         st.warning(f"No transactions found in database for date range {start_date} to {end_date}")
                 else:
-                    st.warning(f"No documents found in database covering the date range {start_date} to {end_date}")
-                    
+                    transactions_df, data_info = _load_statement_documents(processor, db_connection, start_date, end_date)
+
         except Exception as e:
             st.error(f"Error querying database: {str(e)}")
             st.info("Falling back to local file if available...")
             data_source = "Local File"
-    
+
     if data_source == "Local File" or (data_source == "Database Query" and transactions_df.empty):
         try:
             with st.spinner("Loading data from local file..."):
+                summary_data = None
                 transactions_df = processor.load_latest_bank_statement()
                 statement_info = processor.get_statement_info()
                 
                 if not transactions_df.empty and statement_info:
-                    # Standardize column names
-                    column_mapping = {
-                        'Date': 'date',
-                        'Transaction Date': 'date',
-                        'Trans Date': 'date',
-                        'Description': 'description',
-                        'Details': 'description',
-                        'Trans Details': 'description',
-                        'Debit': 'debits',
-                        'Debits': 'debits',
-                        'Credit': 'credits',
-                        'Credits': 'credits',
-                        'Balance': 'balance',
-                        'Running Balance': 'balance',
-                        'Saldo': 'balance'
-                    }
-                    transactions_df = transactions_df.rename(columns=column_mapping)
-                    
-                    # Ensure required columns exist
-                    required_columns = ['date', 'description', 'debits', 'credits', 'balance']
-                    for col in required_columns:
-                        if col not in transactions_df.columns:
-                            transactions_df[col] = 'Unknown' if col == 'description' else 0.0
-                    
                     # Check if local file date range overlaps with selected range
                     period = statement_info.get('period', {})
                     if period.get('start') and period.get('end'):
-                        file_start = pd.to_datetime(period['start'])
-                        file_end = pd.to_datetime(period['end'])
-                        selected_start = pd.to_datetime(start_date)
-                        selected_end = pd.to_datetime(end_date)
+                        file_start = pd.Timestamp(period['start'])
+                        file_end = pd.Timestamp(period['end'])
+                        selected_start = pd.Timestamp(start_date)
+                        selected_end = pd.Timestamp(end_date)
                         
                         if file_end < selected_start or file_start > selected_end:
                             st.warning(f"⚠️ Local file covers {period['start']} to {period['end']}, but you selected {start_date} to {end_date}. There may be no overlapping data.")
                         
                         # Filter to selected date range
                         if 'date' in transactions_df.columns:
-                            transactions_df['date'] = pd.to_datetime(transactions_df['date'], errors='coerce')
                             original_count = len(transactions_df)
                             transactions_df = transactions_df[
                                 (transactions_df['date'] >= selected_start) &
@@ -190,7 +143,12 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
 
     # Create metrics and charts if we have data
     if not transactions_df.empty:
-        create_dashboard_metrics(analyzer, start_date, end_date, transactions_df)
+        if summary_data is None:
+            # Transactions saved before categorization, or read from a local file, are categorized here
+            # with the mappings read in the overview round trip
+            transactions_df = analyzer.categorize(transactions_df, mappings)
+            summary_data = analyzer.summarize(transactions_df)
+        create_dashboard_metrics(analyzer, start_date, end_date, transactions_df, summary_data)
 
         # Charts section
         col1, col2 = st.columns(2)
@@ -198,7 +156,6 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
         with col1:
             st.subheader("💰 Expense Breakdown")
             try:
-                summary_data = analyzer.get_transaction_summary(transactions_df)
                 create_expense_breakdown_chart(summary_data)
             except Exception as e:
                 st.error(f"Error loading expense data: {str(e)}")
@@ -206,7 +163,6 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
         with col2:
             st.subheader("📊 Cash Flow Trend")
             try:
-                summary_data = analyzer.get_transaction_summary(transactions_df)
                 create_cash_flow_chart(summary_data)
             except Exception as e:
                 st.error(f"Error loading cash flow data: {str(e)}")
@@ -222,7 +178,7 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
             # Filter to only available columns
             display_columns = [col for col in display_columns if col in transactions_df.columns]
             if display_columns:
-                display_df = transactions_df.head(20)[display_columns]
+                display_df = amounts_in_rands(transactions_df.head(20)[display_columns])
                 st.dataframe(display_df, use_container_width=True)
             else:
                 st.warning("No valid columns available for transaction display")
@@ -234,8 +190,50 @@ def render_dashboard_tab(analyzer, processor, db_connection, start_date, end_dat
                     st.warning(f"⚠️ {len(uncategorized)} uncategorized transactions found")
                     with st.expander("View Uncategorized Transactions"):
                         uncategorized_columns = [col for col in display_columns if col != 'category']
-                        st.dataframe(uncategorized[uncategorized_columns])
+                        st.dataframe(amounts_in_rands(uncategorized[uncategorized_columns]))
         except Exception as e:
             st.error(f"Error displaying transactions: {str(e)}")
     else:
-        st.info("No transaction data available for the selected criteria.")
\ No newline at end of file
+        st.info("No transaction data available for the selected criteria.")
+
+def _load_statement_documents(processor, db_connection, start_date, end_date):
+    """Load transactions by parsing whole statement documents, for statements saved before per-transaction storage"""
+    transactions_df = pd.DataFrame()
+    data_info = {}
+    query = statement_period_query(start_date, end_date)
+
+    # Only table elements are fetched, and each statement is parsed as its batch arrives
+    selected_start = pd.Timestamp(start_date)
+    selected_end = pd.Timestamp(end_date)
+    documents_found = 0
+    frames = []
+    for doc in db_connection.iter_documents(query=query, sort_by=[("uploaded_at", -1)],
+                                            projection=TABLE_ELEMENTS_PROJECTION, batch_size=STATEMENT_BATCH_SIZE):
+        documents_found += 1
+        # Frames arrive in the canonical schema
+        df = processor.extract_tables_to_dataframe(doc)
+        if not df.empty:
+            # Filter by actual transaction dates
+            frames.append(df[(df['date'] >= selected_start) & (df['date'] <= selected_end)])
+    st.write(f"📊 Found {documents_found} relevant document(s) in database")
+
+    if documents_found:
+        transactions_df = concat_transactions(frames)
+
+        if not transactions_df.empty:
+            # Statement documents overlap where their periods do, so remove repeated rows here;
+            # the transactions collection is deduplicated at write time by fingerprint
+            transactions_df = transactions_df.drop_duplicates().sort_values('date' if 'date' in transactions_df.columns else transactions_df.columns[0])
+            data_info = {
+                'source': 'Database',
+                'documents_found': documents_found,
+                'transactions_loaded': len(transactions_df),
+                'date_range': f"{start_date} to {end_date}",
+                'columns': transactions_df.columns.tolist()
+            }
+        else:
+            st.warning(f"No transactions found in database for date range {start_date} to {end_date}")
+    else:
+        st.warning(f"No documents found in database covering the date range {start_date} to {end_date}")
+
+    return transactions_df, data_info
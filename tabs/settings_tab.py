@@ -1,5 +1,8 @@
 import streamlit as st
 import os
+import pandas as pd
+from async_connection import AsyncDatabaseConnection
+from merchant import MerchantMemo, key_stats
 
 def render_settings_tab(processor, pdf_processor, analyzer, db_connection):
     st.header("⚙️ Settings")
@@ -69,6 +72,96 @@ def render_settings_tab(processor, pdf_processor, analyzer, db_connection):
         else:
             st.error(f"❌ {message}")
 
+    if st.button("🔎 Check Query Plans"):
+        try:
+            plans = db_connection.explain_queries()
+            collscans = [plan for plan in plans if plan['collscan']]
+            if collscans:
+                st.warning(f"⚠️ {len(collscans)} of {len(plans)} queries are collection scans")
+            else:
+                st.success(f"✅ All {len(plans)} queries use an index")
+            st.dataframe(pd.DataFrame(plans), hide_index=True)
+        except Exception as e:
+            st.error(f"❌ Query plan check failed: {str(e)}")
+
+    pool_stats = db_connection.pool_stats()
+    if pool_stats:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Checked Out", f"{pool_stats['checked_out']:,} / {pool_stats['max_pool_size'] or '-'}")
+            st.caption(f"{pool_stats['connections_open']:,} open, {pool_stats['connections_created']:,} created")
+        with col2:
+            st.metric("Avg Checkout Wait", f"{pool_stats['avg_checkout_wait_ms']:,.1f} ms")
+            st.caption(f"max {pool_stats['max_checkout_wait_ms']:,.1f} ms, {pool_stats['checkout_failures']:,} failures")
+        with col3:
+            last_heartbeat = pool_stats['last_heartbeat_ms']
+            st.metric("Last Heartbeat", f"{last_heartbeat:,.1f} ms" if last_heartbeat is not None else "-")
+            st.caption(f"{pool_stats['heartbeats']:,} heartbeats, {pool_stats['heartbeat_failures']:,} failed")
+        async_stats = AsyncDatabaseConnection.stats()
+        if async_stats:
+            st.caption(f"Async client: {async_stats['checked_out']:,} / {async_stats['max_pool_size']} checked out, "
+                       f"{async_stats['connections_open']:,} open, "
+                       f"avg checkout wait {async_stats['avg_checkout_wait_ms']:,.1f} ms")
+
+    # Query cache
+    st.subheader("🗄️ Query Cache")
+    query_stats = db_connection.cache_stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cached Reads", f"{query_stats['entries']:,} / {query_stats['max_entries']:,}")
+        st.caption(f"{query_stats['documents']:,} documents")
+    with col2:
+        st.metric("Hits / Misses", f"{query_stats['hits']:,} / {query_stats['misses']:,}")
+    with col3:
+        st.metric("Hit Rate", f"{query_stats['hit_rate']:.0%}")
+        st.caption(f"{query_stats['evictions']:,} evictions, {query_stats['invalidations']:,} invalidations")
+
+    # Analysis results
+    st.subheader("🧮 Analysis Results")
+    result_stats = analyzer.result_memo.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Memoized Results", f"{result_stats['entries']:,} / {result_stats['max_entries']:,}")
+    with col2:
+        st.metric("Hits / Misses", f"{result_stats['hits']:,} / {result_stats['misses']:,}")
+    with col3:
+        st.metric("Hit Rate", f"{result_stats['hit_rate']:.0%}")
+        st.caption(f"{result_stats['evictions']:,} evictions, {result_stats['invalidations']:,} invalidations")
+
+    # Merchant keys
+    st.subheader("🏪 Merchant Keys")
+    transactions_df = processor.load_latest_bank_statement()
+    memo_stats = MerchantMemo.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if transactions_df is not None and not transactions_df.empty:
+            merchant_stats = key_stats(transactions_df['description'])
+            st.metric("Distinct Merchants", f"{merchant_stats['merchants']:,} / {merchant_stats['rows']:,}")
+            st.caption(f"{merchant_stats['ratio']:.1%} of rows, from {merchant_stats['descriptions']:,} distinct "
+                       f"descriptions in the current statement")
+        else:
+            st.metric("Distinct Merchants", "-")
+    with col2:
+        st.metric("Memoized Merchants", f"{memo_stats['entries']:,}")
+        st.caption(f"{memo_stats['memory_hits']:,} in memory, {memo_stats['stored_hits']:,} stored, "
+                   f"{memo_stats['evictions']:,} evicted")
+    with col3:
+        st.metric("Categorized", f"{memo_stats['computed']:,}")
+        st.caption("merchant keys matched against the category rules")
+
+    # Parse cache
+    st.subheader("♻️ Parse Cache")
+    cache_stats = pdf_processor.cache.stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cached PDFs", f"{cache_stats['entries']:,}")
+        st.caption(f"{cache_stats['size_bytes'] / (1024 * 1024):,.1f} MB of {cache_stats['max_bytes'] / (1024 * 1024):,.0f} MB")
+    with col2:
+        st.metric("Hits / Misses", f"{cache_stats['hits']:,} / {cache_stats['misses']:,}")
+    with col3:
+        st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+        st.caption(f"{cache_stats['evictions']:,} evictions")
+
     # System Information
     st.subheader("ℹ️ System Information")
     st.info(f"**Current Directory:** {os.getcwd()}")
@@ -1,113 +1,164 @@
 import streamlit as st
-from datetime import datetime
+from categorizer import load_categorizer
+from merchant import MerchantMemo
+from result_memo import get_result_memo
+from transaction_store import amounts_in_rands, to_documents
 
-def render_upload_tab(pdf_processor, processor, db_connection):
-    st.header("📁 Upload Bank Statement")
+def render_upload_tab(pdf_processor, processor, db_connection, user_id):
+    st.header("📁 Upload Bank Statements")
 
     # File upload section
     st.markdown('<div class="upload-area">', unsafe_allow_html=True)
-    uploaded_file = st.file_uploader(
-        "Drop your PDF bank statement here",
+    uploaded_files = st.file_uploader(
+        "Drop your PDF bank statements here",
         type=['pdf'],
-        help="Upload a PDF bank statement to process and analyze",
+        accept_multiple_files=True,
+        help="Upload one or more PDF bank statements to process and analyze",
         key="pdf_uploader"
     )
     st.markdown('</div>', unsafe_allow_html=True)
 
-    if uploaded_file is not None:
+    if uploaded_files:
         col1, col2 = st.columns([2, 1])
 
         with col1:
-            st.info(f"📄 File: {uploaded_file.name}")
-            st.info(f"📏 Size: {uploaded_file.size:,} bytes")
+            total_size = sum(uploaded_file.size for uploaded_file in uploaded_files)
+            st.info(f"📄 Files: {len(uploaded_files)}")
+            st.info(f"📏 Total size: {total_size:,} bytes")
 
         with col2:
-            # Initialize session state for processed data
-            if 'processed_json' not in st.session_state:
-                st.session_state.processed_json = None
-
-            if st.button("🚀 Process PDF", type="primary", key="process_pdf_button"):
-                with st.spinner("Processing PDF... This may take a moment..."):
-                    try:
-                        # Process the PDF
-                        json_data = pdf_processor.process_pdf(uploaded_file)
-                        if json_data:
-                            st.success("✅ PDF processed successfully!")
-                            st.session_state.processed_json = json_data
-
-                            # Display extracted data
-                            st.subheader("📊 Extracted Data Preview")
-                            df = processor.extract_tables_to_dataframe(json_data)
-                            if not df.empty:
-                                st.dataframe(df.head(10), use_container_width=True)
-                            else:
-                                st.warning("No tabular data extracted from PDF")
-                        else:
-                            st.error("❌ Failed to process PDF")
-                            st.session_state.processed_json = None
-                    except Exception as e:
-                        st.error(f"Error processing PDF: {str(e)}")
-                        st.session_state.processed_json = None
-                        st.write("🔧 Debug info:")
-                        st.write(f"- Error type: {type(e).__name__}")
-                        st.write(f"- Error message: {str(e)}")
-
-            # Save to Database button (only shown if PDF was processed successfully)
-            if st.session_state.processed_json:
-                with st.status("Database Upload Status", expanded=True) as status:
-                    if st.button("💾 Save to Database", key="save_to_db_button"):
-                        try:
-                            status.write("📁 Saving to local file...")
-                            if processor.save_bank_statement(st.session_state.processed_json):
-                                status.write("✅ Saved to local file!")
-                            else:
-                                status.write("❌ Failed to save local file!")
-                                st.error("Failed to save to local file")
-                                return
-
-                            status.write("🛢️ Starting MongoDB upload process...")
-                            status.write(f"📊 JSON data keys: {list(st.session_state.processed_json.keys())}")
-                            status.write(f"📄 Filename: {st.session_state.processed_json.get('filename', 'Unknown')}")
-
-                            # Test database connection
-                            status.write("🔌 Testing MongoDB connection...")
-                            conn_success, conn_message = db_connection.test_connection()
-                            if not conn_success:
-                                raise Exception(f"Database connection failed: {conn_message}")
-
-                            status.write(f"✅ {conn_message}")
-
-                            # Add metadata
-                            st.session_state.processed_json['uploaded_at'] = datetime.now().isoformat()
-                            st.session_state.processed_json['processed_by'] = 'streamlit_app'
-
-                            # Insert document
-                            status.write("📝 Inserting document...")
-                            inserted_id = db_connection.insert_document(st.session_state.processed_json)
-                            status.write(f"✅ Success! Document ID: {inserted_id}")
-
-                            # Verify insertion
-                            doc_count = db_connection.count_documents()
-                            status.write(f"📊 Total documents in collection: {doc_count}")
-
-                            status.update(label="✅ Data uploaded to MongoDB successfully!", state="complete")
-                            st.success("✅ Data uploaded to MongoDB successfully!")
-                            st.info("💡 Data is now in database. You can view it in the Dashboard tab.")
-                        except Exception as e:
-                            status.write(f"❌ MongoDB upload failed: {str(e)}")
-                            status.update(label=f"❌ Upload Failed: {str(e)}", state="error")
-                            st.error(f"❌ MongoDB upload failed: {str(e)}")
-                            st.write("🔧 Debug info:")
-                            st.write(f"- Error type: {type(e).__name__}")
-                            st.write(f"- Error message: {str(e)}")
-                            try:
-                                test_collection = db_connection.get_collection()
-                                if test_collection:
-                                    st.write(f"- Collection name: {test_collection.name}")
-                                    st.write(f"- Database name: {test_collection.database.name}")
-                                else:
-                                    st.write("- Collection connection returned None")
-                            except Exception as debug_e:
-                                st.write(f"- Additional debug error: {str(debug_e)}")
+            # Session state holds only the table elements and metadata of each statement;
+            # the raw API payloads stay in the on-disk parse cache
+            if 'processed_statements' not in st.session_state:
+                st.session_state.processed_statements = []
+
+            process_clicked = st.button("🚀 Process PDFs", type="primary", key="process_pdf_button")
+
+        if process_clicked:
+            st.session_state.processed_statements = _process_files(pdf_processor, processor, uploaded_files)
+
+        # Save to Database button (only shown if at least one PDF was processed successfully)
+        if st.session_state.processed_statements:
+            with st.status("Database Upload Status", expanded=True) as status:
+                if st.button("💾 Save to Database", key="save_to_db_button"):
+                    _save_statements(processor, db_connection, st.session_state.processed_statements, status, user_id)
+        else:
+            st.info("Please process the PDFs first before saving to database.")
+
+def _process_files(pdf_processor, processor, uploaded_files):
+    """Parse uploaded PDFs concurrently, showing a status line per file"""
+    progress = st.progress(0.0, text=f"Processing 0 of {len(uploaded_files)} files...")
+    placeholders = [st.empty() for _ in uploaded_files]
+    finished = set()
+
+    def on_event(index, filename, state, detail):
+        placeholders[index].write(f"**{filename}** — {detail}")
+        if state in ("done", "failed"):
+            finished.add(index)
+            progress.progress(
+                len(finished) / len(uploaded_files),
+                text=f"Processed {len(finished)} of {len(uploaded_files)} files"
+            )
+
+    try:
+        results = pdf_processor.process_batch(uploaded_files, on_event=on_event)
+    except Exception as e:
+        st.error(f"Error processing PDFs: {str(e)}")
+        st.write("🔧 Debug info:")
+        st.write(f"- Error type: {type(e).__name__}")
+        st.write(f"- Error message: {str(e)}")
+        return []
+
+    statements = [json_data for _, json_data, error in results if error is None]
+    failed = [(filename, error) for filename, _, error in results if error is not None]
+
+    if statements:
+        st.success(f"✅ Processed {len(statements)} of {len(results)} PDFs successfully!")
+    for filename, error in failed:
+        st.error(f"❌ Failed to process {filename}: {error}")
+
+    # Display extracted data
+    if statements:
+        st.subheader("📊 Extracted Data Preview")
+        for json_data in statements:
+            with st.expander(json_data.get('filename', 'Unknown'), expanded=len(statements) == 1):
+                df = processor.extract_tables_to_dataframe(json_data)
+                if not df.empty:
+                    st.dataframe(amounts_in_rands(df.head(10)), use_container_width=True)
+                else:
+                    st.warning("No tabular data extracted from PDF")
+    return statements
+
+def _save_statements(processor, db_connection, statements, status, user_id):
+    """Save processed statements to the local store and MongoDB in one batch each"""
+    try:
+        status.write(f"📁 Saving {len(statements)} statements locally...")
+        if processor.save_bank_statements(statements):
+            status.write("✅ Saved to local store!")
+        else:
+            status.write("❌ Failed to save locally!")
+            st.error("Failed to save to local store")
+            return
+
+        status.write("🛢️ Starting MongoDB upload process...")
+        for json_data in statements:
+            status.write(f"📄 {json_data.get('filename', 'Unknown')}")
+
+        # Test database connection
+        status.write("🔌 Testing MongoDB connection...")
+        conn_success, conn_message = db_connection.test_connection()
+        if not conn_success:
+            raise Exception(f"Database connection failed: {conn_message}")
+
+        status.write(f"✅ {conn_message}")
+
+        # Insert all new statements at once; already stored statements are skipped
+        status.write("📝 Inserting documents...")
+        inserted_ids, skipped = db_connection.insert_documents(statements)
+        status.write(f"✅ Inserted {len(inserted_ids)} documents")
+        if skipped:
+            status.write(f"♻️ Skipped {skipped} statements already stored")
+
+        # One document per transaction, for indexed date-range queries from the dashboard
+        status.write("🧾 Inserting transactions...")
+        transactions = []
+        categorizer = load_categorizer(db_connection)
+        merchant_memo = MerchantMemo(db_connection)
+        for json_data in statements:
+            df = processor.extract_tables_to_dataframe(json_data)
+            if not df.empty:
+                transactions.extend(to_documents(
+                    categorizer.tag(df, merchant_memo),
+                    user_id=user_id,
+                    account=processor.get_account_number(json_data),
+                    statement_hash=json_data['statement_hash']
+                ))
+        inserted_transactions = db_connection.upsert_transactions(transactions)
+        get_result_memo().invalidate(user_id)
+        status.write(f"✅ Inserted {inserted_transactions} transactions")
+        if inserted_transactions < len(transactions):
+            status.write(f"♻️ Skipped {len(transactions) - inserted_transactions} transactions already stored")
+
+        # Verify insertion
+        doc_count = db_connection.count_documents()
+        status.write(f"📊 Total documents in collection: {doc_count}")
+
+        status.update(label="✅ Data uploaded to MongoDB successfully!", state="complete")
+        st.success("✅ Data uploaded to MongoDB successfully!")
+        st.info("💡 Data is now in database. You can view it in the Dashboard tab.")
+    except Exception as e:
+        status.write(f"❌ MongoDB upload failed: {str(e)}")
+        status.update(label=f"❌ Upload Failed: {str(e)}", state="error")
+        st.error(f"❌ MongoDB upload failed: {str(e)}")
+        st.write("🔧 Debug info:")
+        st.write(f"- Error type: {type(e).__name__}")
+        st.write(f"- Error message: {str(e)}")
+        try:
+            test_collection = db_connection.get_collection()
+            if test_collection is not None:
+                st.write(f"- Collection name: {test_collection.name}")
+                st.write(f"- Database name: {test_collection.database.name}")
             else:
-                st.info("Please process the PDF first before saving to database.")
\ No newline at end of file
+                st.write("- Collection connection returned None")
+        except Exception as debug_e:
+            st.write(f"- Additional debug error: {str(debug_e)}")
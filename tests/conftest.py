@@ -0,0 +1,26 @@
+# tests/conftest.py
+import pytest
+
+import result_memo
+import storage
+from analysis_snapshot import SnapshotMemo
+from financial_analyzer import FinancialAnalyzer
+from processing import StreamlitAnalytics
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    """A FinancialAnalyzer over embedded storage in tmp_path, with empty process-wide memos"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('STORAGE_BACKEND', 'sqlite')
+    monkeypatch.setenv('SQLITE_PATH', str(tmp_path / 'bankstat.db'))
+    monkeypatch.setenv('ANALYTICS_BACKEND', 'pandas')
+    monkeypatch.setattr(storage, '_connections', {})
+    monkeypatch.setattr(storage, '_query_cache', None)
+    monkeypatch.setattr(result_memo, '_result_memo', None)
+    SnapshotMemo.clear()
+    analyzer = FinancialAnalyzer(StreamlitAnalytics())
+    yield analyzer
+    analyzer.log_file.close()
+    analyzer.db_connection.close_connection()
+    SnapshotMemo.clear()
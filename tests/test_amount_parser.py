@@ -0,0 +1,48 @@
+# tests/test_amount_parser.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from amount_parser import parse_amount_series
+from benchmarks.bench_amount_parser import legacy_parse_amounts, legacy_parse_balance, make_cells
+
+
+@pytest.mark.parametrize('cell, debits, balance', [
+    ('1,234.50', 1234.5, 1234.5),
+    ('R1,234.50', 1234.5, 1234.5),
+    ('-R12,675.15', -12675.15, -12675.15),
+    ('120.00-', -120.0, -120.0),
+    ('1,500.00 Cr', 1500.0, 1500.0),
+    ('99.10 Dr', 99.1, -99.1),
+    ('242.20 126.86', 369.06, 126.86),
+    ('1 234 567.89', 802.89, 1234567.89),
+    ('1.234.56', 1234.56, 1234.56),
+    ('R1.234.567.89 Dr', 1234567.89, -1234567.89),
+    ('.50', 0.5, 0.5),
+    ('', 0.0, 0.0),
+    ('n/a', 0.0, 0.0),
+    (None, 0.0, 0.0),
+])
+def test_amount_formats(cell, debits, balance):
+    cells = pd.Series([cell], dtype=object)
+    assert parse_amount_series(cells).iloc[0] == pytest.approx(debits)
+    assert parse_amount_series(cells, multi_value=False, signed_suffix=True).iloc[0] == pytest.approx(balance)
+
+
+def test_numeric_columns_are_passed_through():
+    values = pd.Series([1.5, np.nan, 3], index=[5, 6, 7])
+    pd.testing.assert_series_equal(parse_amount_series(values), pd.Series([1.5, 0.0, 3.0], index=[5, 6, 7]))
+
+
+def test_amounts_match_the_legacy_cleanup():
+    cells = make_cells(5_000)
+    np.testing.assert_allclose(parse_amount_series(cells), legacy_parse_amounts(cells))
+
+    balances = cells.where(~cells.str.contains(' ', na=False), None)
+    np.testing.assert_allclose(parse_amount_series(balances, multi_value=False, signed_suffix=True),
+                               legacy_parse_balance(balances))
+
+
+def test_result_keeps_the_input_index():
+    cells = pd.Series(['1.00', None, '2.00 3.00'], index=['a', 'b', 'c'])
+    assert list(parse_amount_series(cells).index) == ['a', 'b', 'c']
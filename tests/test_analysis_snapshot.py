@@ -0,0 +1,62 @@
+# tests/test_analysis_snapshot.py
+import copy
+import os
+
+from benchmarks.synthetic import make_statement
+
+
+def _reversed_rows(json_data):
+    """The statement with its table rows in reverse order: different transactions, same file size"""
+    json_data = copy.deepcopy(json_data)
+    for element in json_data['elements']:
+        if element['category'] != 'table':
+            continue
+        html = element['content']['html']
+        head, rest = html.split('<tbody>')
+        body, tail = rest.split('</tbody>')
+        rows = [row + '</tr>' for row in body.split('</tr>')[:-1]]
+        element['content']['html'] = f"{head}<tbody>{''.join(reversed(rows))}</tbody>{tail}"
+    return json_data
+
+
+def _save_keeping_mtime(analyzer, json_data):
+    """Save a statement so that its file has the same mtime and size as the one it replaces"""
+    path = analyzer.analyzer.json_file_path
+    stat = os.stat(path)
+    assert analyzer.analyzer.save_bank_statement(json_data)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.path.getsize(path) == stat.st_size
+
+
+def test_snapshot_is_shared_until_a_statement_is_saved(analyzer):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10, seed=1))
+    snapshot = analyzer.snapshot()
+
+    assert len(snapshot.frame) == 10
+    assert analyzer.snapshot() is snapshot
+    assert analyzer.snapshot().summary is snapshot.summary
+
+    analyzer.analyzer.save_bank_statement(make_statement(pages=2, rows_per_page=10, seed=2))
+    assert len(analyzer.snapshot().frame) == 20
+
+
+def test_saving_invalidates_even_when_the_file_looks_unchanged(analyzer):
+    statement = make_statement(pages=1, rows_per_page=10)
+    analyzer.analyzer.save_bank_statement(statement)
+    before = analyzer.snapshot().frame
+
+    _save_keeping_mtime(analyzer, _reversed_rows(statement))
+    after = analyzer.snapshot().frame
+
+    assert not after.equals(before)
+
+
+def test_windows_are_cut_from_the_full_snapshot(analyzer):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=2, rows_per_page=20))
+    frame = analyzer.snapshot().frame
+    start, end = frame['date'].iloc[5], frame['date'].iloc[25]
+
+    window = analyzer.snapshot(start, end)
+
+    assert window is analyzer.snapshot(start, end)
+    assert window.frame.equals(frame[(frame['date'] >= start) & (frame['date'] <= end)])
@@ -0,0 +1,128 @@
+# tests/test_categorizer.py
+import re
+from collections import OrderedDict
+
+import pandas as pd
+import pytest
+
+from categorizer import DEFAULT_RULES, Categorizer
+from merchant import MerchantMemo, fee_types
+from mongo_analytics import FEE_KEYWORDS, FEE_TYPES, OTHER_FEES
+
+DESCRIPTIONS = [
+    'H&M Canal Walk 518103XXXXXX5733',
+    '7-Eleven Rondebosch',
+    'Mr.Price 01/03/24',
+    'WOOLWORTHS1234 CAPE TOWN',
+    '12 JUNCTION MARKET',
+    'Checkers Hyper R1,250.00',
+    'ATM withdrawal fee',
+    'Monthly account fee 2024-03-01',
+    'Service charge REF1234567',
+    'Uber Trip 12 Mar 2024',
+    'Café Paradiso',
+    'Shop 24/7 00123',
+    'Netflix.com',
+]
+
+MAPPED_RULES = (('h&m', 'Shopping'), ('7-eleven', 'Groceries'), ('mr.price', 'Shopping'),
+                ('junction', 'Shopping'), ('24/7', 'Groceries')) + DEFAULT_RULES
+
+
+class MemoryMemo(MerchantMemo):
+    """A MerchantMemo that keeps entries in memory only"""
+
+    def _load(self, fingerprint, keys):
+        return {}
+
+    def _store(self, fingerprint, categories):
+        pass
+
+
+def reference_categorize(rules, description) -> str:
+    """The category of the first rule whose term the lowercased description contains"""
+    lowered = str(description).lower()
+    for term, category in rules:
+        if term in lowered:
+            return category
+    return 'Other'
+
+
+@pytest.mark.parametrize('rules', [DEFAULT_RULES, MAPPED_RULES])
+def test_categorize_series_matches_descriptions(rules):
+    descriptions = pd.Series(DESCRIPTIONS * 3)
+    expected = [reference_categorize(rules, description) for description in descriptions]
+
+    categorizer = Categorizer(rules)
+    assert list(categorizer.categorize_series(descriptions)) == expected
+    assert list(categorizer.categorize_series(descriptions.astype('category'))) == expected
+    assert list(categorizer.categorize_series(descriptions, memo=MemoryMemo(None))) == expected
+
+
+def test_punctuated_and_digit_terms_match():
+    categorizer = Categorizer(MAPPED_RULES)
+    assert categorizer.categorize('H&M Canal Walk') == 'Shopping'
+    assert categorizer.categorize('7-Eleven Rondebosch') == 'Groceries'
+    assert categorizer.categorize('WOOLWORTHS1234 CAPE TOWN') == 'Groceries'
+    assert categorizer.categorize('12 JUNCTION MARKET') == 'Shopping'
+
+
+def test_match_keys_mask_digits_only_without_digit_terms():
+    assert Categorizer(DEFAULT_RULES).match_keys(['PnP 518103XXXXXX5733 01/03/24']) == ['pnp #xxxxxx# #/#/#']
+    assert Categorizer(MAPPED_RULES).match_keys(['Shop 24/7']) == ['shop 24/7']
+
+
+def test_missing_descriptions_get_the_default():
+    descriptions = pd.Series(pd.Categorical(['Uber Trip', None]))
+    assert list(Categorizer(DEFAULT_RULES).categorize_series(descriptions, default='Uncategorized')) == \
+        ['Transport', 'Uncategorized']
+
+
+def test_fee_types_match_the_mongo_pipeline_rules():
+    descriptions = pd.Series(DESCRIPTIONS)
+    expected = []
+    for description in DESCRIPTIONS:
+        fee_type = None
+        if re.search('|'.join(FEE_KEYWORDS), description, re.I):
+            fee_type = next((name for pattern, name in FEE_TYPES if re.search(pattern, description, re.I)), OTHER_FEES)
+        expected.append(fee_type or '')
+    assert fee_types(descriptions).fillna('').tolist() == expected
+
+
+def test_loaded_categorizer_is_reused_until_mappings_change(analyzer, monkeypatch):
+    reads = []
+    connection = analyzer.db_connection.connection
+    find_documents = connection.find_documents
+    monkeypatch.setattr(connection, 'find_documents',
+                        lambda *args: reads.append(args[1]) or find_documents(*args))
+
+    cache = analyzer.db_connection.cache
+    assert [analyzer._categorize_transaction(text) for text in ('Netflix.com', 'Uber trip', 'Spar')] == [
+        'Other', 'Transport', 'Groceries']
+    assert reads == ['category_mappings']
+    # Not even a query cache lookup per row
+    assert cache.hits + cache.misses == 1
+
+    assert analyzer.add_category_mapping('netflix', 'Entertainment', 'expense')
+    assert analyzer._categorize_transaction('Netflix.com') == 'Entertainment'
+    assert reads == ['category_mappings'] * 2
+
+
+def test_given_mappings_are_not_read_again(analyzer, monkeypatch):
+    monkeypatch.setattr(analyzer.db_connection.connection, 'find_documents', None)
+    categorizer = analyzer.categorizer([{'term': 'netflix', 'category': 'Entertainment'}])
+    assert categorizer.categorize('Netflix.com') == 'Entertainment'
+
+
+def test_memo_is_bounded_and_drops_superseded_fingerprints(monkeypatch):
+    monkeypatch.setattr(MerchantMemo, '_entries', OrderedDict())
+    monkeypatch.setattr(MerchantMemo, 'MAX_ENTRIES', len(DESCRIPTIONS))
+    old, new = Categorizer(DEFAULT_RULES), Categorizer(MAPPED_RULES)
+    memo = MemoryMemo(None)
+
+    old.categorize_series(pd.Series(DESCRIPTIONS), memo=memo)
+    labels = new.categorize_series(pd.Series(DESCRIPTIONS), memo=memo)
+
+    assert len(MerchantMemo._entries) <= len(DESCRIPTIONS)
+    assert {fingerprint for fingerprint, _ in MerchantMemo._entries} == {new.fingerprint}
+    assert list(labels) == [reference_categorize(MAPPED_RULES, text) for text in DESCRIPTIONS]
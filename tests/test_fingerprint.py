@@ -0,0 +1,33 @@
+# tests/test_fingerprint.py
+import pandas as pd
+
+from sqlite_connection import SQLiteConnection
+from transaction_store import conform_to_schema, to_documents
+
+
+def _statement(rows):
+    return conform_to_schema(pd.DataFrame(rows, columns=['date', 'description', 'debits', 'balance']))
+
+
+def _documents(rows, statement_hash):
+    return to_documents(_statement(rows), user_id='user', account='acc', statement_hash=statement_hash)
+
+
+def test_identical_rows_on_one_statement_get_distinct_fingerprints():
+    documents = _documents([('2024-03-02', 'CARD PURCHASE  Coffee', 35.0, 0.0),
+                            ('2024-03-02', 'card purchase coffee', 35.0, 0.0),
+                            ('2024-03-02', 'CARD PURCHASE Coffee', 35.0, 0.0)], 'a')
+    assert len({document['fingerprint'] for document in documents}) == 3
+
+
+def test_overlapping_statements_store_each_transaction_once(tmp_path):
+    connection = SQLiteConnection(str(tmp_path / 'test.db'))
+    first = [('2024-03-01', 'Salary', 0.0, 1000.0), ('2024-03-02', 'Coffee', 35.0, 0.0),
+             ('2024-03-02', 'Coffee', 35.0, 0.0)]
+    second = first[1:] + [('2024-03-02', 'Coffee', 35.0, 0.0), ('2024-03-05', 'Rent', 500.0, 0.0)]
+
+    assert connection.upsert_transactions(_documents(first, 'a')) == 3
+    # The overlap's two coffees are already stored; a third one on the same day is new
+    assert connection.upsert_transactions(_documents(second, 'b')) == 2
+    assert connection.upsert_transactions(_documents(first, 'a')) == 0
+    assert connection.count_documents(collection_name='transactions') == 5
@@ -0,0 +1,39 @@
+# tests/test_local_extractor.py
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_statement, make_statement_pdf
+from local_extractor import LocalTableExtractor, _balances_reconcile
+from processing import StreamlitAnalytics
+
+HEADER = ['Date', 'Description', 'Fees (R)', 'Debits (R)', 'Credits (R)', 'Balance (R)']
+
+
+@pytest.fixture
+def analytics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return StreamlitAnalytics()
+
+
+@pytest.mark.parametrize('repeat_header, page_totals', [(True, False), (False, False), (False, True), (True, True)])
+def test_local_extraction_matches_the_api_tables(analytics, repeat_header, page_totals):
+    pdf_bytes = make_statement_pdf(pages=3, rows_per_page=20, repeat_header=repeat_header, page_totals=page_totals)
+    data = LocalTableExtractor().extract(pdf_bytes)
+
+    assert data is not None
+    assert [element['page'] for element in data['elements']] == [1, 2, 3]
+    expected = analytics._extract_tables_to_dataframe(make_statement(pages=3, rows_per_page=20))
+    pd.testing.assert_frame_equal(analytics._extract_tables_to_dataframe(data), expected)
+
+
+def test_balances_reconcile_across_pages():
+    first = [['01/03/2024', 'Opening', '', '', '', '100.00'], ['02/03/2024', 'Coffee', '', '30.00', '', '70.00']]
+    second = [['03/03/2024', 'Salary', '', '', '1,000.00', '1,070.00'], ['03/03/2024', 'Fee', '5.00', '', '', '']]
+    third = [['04/03/2024', 'Shop', '', '10.00', '', '1,055.00']]
+    assert _balances_reconcile([(HEADER, first), (HEADER, second), (HEADER, third)])
+
+
+def test_balances_that_do_not_reconcile_are_rejected():
+    rows = [['01/03/2024', 'Opening', '', '', '', '100.00'], ['Monthly fee', '', '', '65.00', '', ''],
+            ['02/03/2024', 'Coffee', '', '30.00', '', '70.00']]
+    assert not _balances_reconcile([(HEADER, rows)])
@@ -0,0 +1,100 @@
+# tests/test_mongo_analytics.py
+import json
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from benchmarks.synthetic import make_statement
+from mongo_analytics import MongoAnalytics
+from summary_engine import summarize_transactions
+from transaction_store import to_documents
+
+# Aggregation operators added after MongoDB 4.2
+NEWER_OPERATORS = ('$dateTrunc', '$dateAdd', '$dateDiff', '$setWindowFields', '$getField')
+
+
+class RecordingConnection:
+    """Returns canned aggregation results and records the pipelines it is given"""
+
+    def __init__(self, results):
+        self.results = results
+        self.pipelines = []
+
+    def aggregate(self, pipeline, collection_name):
+        self.pipelines.append(pipeline)
+        return self.results
+
+
+class MongomockConnection:
+    """Runs aggregation pipelines on an in-memory mongomock database"""
+
+    def __init__(self):
+        self.db = mongomock.MongoClient().db
+
+    def aggregate(self, pipeline, collection_name):
+        return list(self.db[collection_name].aggregate(pipeline))
+
+
+@pytest.fixture
+def seeded(analyzer):
+    """A mongomock connection holding the categorized synthetic statement for user "alice", and its frame"""
+    analyzer.analyzer.save_bank_statement(make_statement(pages=3, rows_per_page=40))
+    frame = analyzer.categorize(analyzer.snapshot().frame)
+    connection = MongomockConnection()
+    connection.db.transactions.insert_many(
+        to_documents(frame, user_id='alice', account='acc', statement_hash='s'))
+    return analyzer, connection, frame
+
+
+def test_transaction_summary_matches_pandas(seeded):
+    _, connection, frame = seeded
+    start, end = frame['date'].min(), frame['date'].max()
+    summary = MongoAnalytics(connection).transaction_summary('alice', start, end)
+    # Undated transactions are outside every date range
+    in_range = frame[frame['date'].between(start, end)]
+    assert summary.transaction_count == len(in_range)
+    assert len(summary.categories) > 1
+    assert summary.to_dict() == summarize_transactions(in_range).to_dict()
+    assert MongoAnalytics(connection).transaction_summary('bob', start, end).to_dict() == \
+        summarize_transactions(frame.head(0)).to_dict()
+
+
+def test_monthly_trends_match_pandas(seeded):
+    analyzer, connection, _ = seeded
+    start_date = datetime.now() - timedelta(days=1200 * 30)
+    trends = MongoAnalytics(connection).monthly_trends('alice', start_date)
+    assert trends
+    assert trends == analyzer.insights.get_monthly_trends(months=1200)
+
+
+def test_bank_fees_match_pandas(seeded):
+    analyzer, connection, frame = seeded
+    start, end = frame['date'].min(), frame['date'].max()
+    fees = MongoAnalytics(connection).bank_fees('alice', start, end)
+    assert fees['fee_count'] > 0
+    assert fees == analyzer.insights.analyze_bank_fees(start, end)
+
+
+def test_pipelines_run_on_mongodb_4_2():
+    connection = RecordingConnection([])
+    analytics = MongoAnalytics(connection)
+    analytics.monthly_trends('user', '2024-01-01')
+    analytics.bank_fees('user', '2024-01-01', '2024-03-31')
+    connection.results = [{'daily': [], 'categories': []}]
+    analytics.transaction_summary('user', '2024-01-01', '2024-03-31')
+
+    pipelines = json.dumps(connection.pipelines, default=str)
+    assert [operator for operator in NEWER_OPERATORS if operator in pipelines] == []
+
+
+def test_monthly_trends_are_keyed_by_month_in_rands():
+    connection = RecordingConnection([
+        {'_id': datetime(2024, 1, 1), 'debits': 12_550, 'credits': 100_000, 'count': 3},
+        {'_id': datetime(2024, 2, 1), 'debits': 5_000, 'credits': 0, 'count': 1},
+    ])
+    trends = MongoAnalytics(connection).monthly_trends('user', '2024-01-01')
+    assert trends == {
+        '2024-01': {'debits': 125.5, 'credits': 1000.0, 'net': 874.5},
+        '2024-02': {'debits': 50.0, 'credits': 0.0, 'net': -50.0},
+    }
@@ -0,0 +1,56 @@
+# tests/test_pdf_chunking.py
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_statement_pdf
+from benchmarks.upstage_stub import parse_document, start_stub
+from parse_cache import ParseCache
+from pdf_chunking import count_pages, split_pdf, stitch_chunks
+from pdf_processor import StreamlitBankProcessor
+from processing import StreamlitAnalytics
+
+
+@pytest.fixture(scope='module')
+def stub_url():
+    server, url = start_stub()
+    yield url
+    server.shutdown()
+
+
+def test_split_pdf_covers_every_page_in_order():
+    pdf_bytes = make_statement_pdf(pages=7, rows_per_page=3)
+    chunks = split_pdf(pdf_bytes, 3)
+    assert [first_page for first_page, _ in chunks] == [1, 4, 7]
+    assert [count_pages(chunk) for _, chunk in chunks] == [3, 3, 1]
+
+
+def test_stitched_chunks_match_a_single_parse():
+    pdf_bytes = make_statement_pdf(pages=5, rows_per_page=4)
+    single = parse_document(pdf_bytes)
+    # Chunks may finish in any order
+    chunks = [(first_page, parse_document(chunk)) for first_page, chunk in split_pdf(pdf_bytes, 2)]
+    stitched = stitch_chunks(chunks[::-1])
+
+    # The stub's footers number pages within the request, so only the tables are compared
+    def tables(data):
+        return [element for element in data['elements'] if element['category'] == 'table']
+
+    assert [element['id'] for element in stitched['elements']] == list(range(len(single['elements'])))
+    assert tables(stitched) == tables(single)
+    assert stitched['usage'] == single['usage']
+
+
+def test_chunked_requests_give_the_same_transactions(stub_url, tmp_path):
+    pdf_bytes = make_statement_pdf(pages=6, rows_per_page=10)
+    frames = []
+    for chunk_pages in (0, 4):
+        processor = StreamlitBankProcessor()
+        processor.api_url = stub_url
+        processor.engine = 'remote'
+        processor.chunk_pages = chunk_pages
+        processor.cache = ParseCache(cache_dir=str(tmp_path / str(chunk_pages)))
+        frames.append(StreamlitAnalytics()._extract_tables_to_dataframe(
+            processor.parse_pdf_bytes(pdf_bytes, 'statement.pdf')))
+
+    assert len(frames[0]) == 60
+    pd.testing.assert_frame_equal(frames[1], frames[0])
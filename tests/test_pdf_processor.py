@@ -0,0 +1,47 @@
+# tests/test_pdf_processor.py
+import pytest
+
+from benchmarks.synthetic import make_statement_pdf
+from parse_cache import ParseCache
+from pdf_processor import StreamlitBankProcessor
+
+
+class Upload:
+    """An uploaded file as Streamlit's file_uploader returns it"""
+
+    def __init__(self, name, content):
+        self.name = name
+        self.content = content
+
+    def getbuffer(self):
+        return memoryview(self.content)
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = StreamlitBankProcessor()
+    processor.engine = 'local'
+    processor.cache = ParseCache(cache_dir=str(tmp_path))
+    return processor
+
+
+def test_process_batch_keeps_uploads_with_the_same_name_apart(processor):
+    uploads = [Upload('statement.pdf', make_statement_pdf(pages=pages, rows_per_page=5, seed=pages))
+               for pages in (1, 2, 3)]
+    events = []
+
+    results = processor.process_batch(uploads, on_event=lambda *event: events.append(event))
+
+    assert [filename for filename, _, _ in results] == ['statement.pdf'] * 3
+    assert [error for _, _, error in results] == [None] * 3
+    assert [len(json_data['elements']) for _, json_data, _ in results] == [1, 2, 3]
+    assert sorted(index for index, _, state, _ in events if state == 'done') == [0, 1, 2]
+
+
+def test_process_batch_reports_failures_in_upload_order(processor):
+    uploads = [Upload('a.pdf', make_statement_pdf(pages=1, rows_per_page=5)), Upload('a.pdf', b'not a pdf')]
+
+    results = processor.process_batch(uploads)
+
+    assert results[0][1] is not None and results[0][2] is None
+    assert results[1][1] is None and results[1][2]
@@ -0,0 +1,41 @@
+# tests/test_query_cache.py
+from categorizer import load_categorizer
+from storage import get_async_db_connection
+
+
+def _reads(connection, **reads):
+    cache = connection.cache
+    hits = cache.hits
+    results = connection.run(connection.gather(**reads))
+    return results, cache.hits - hits
+
+
+def test_async_mappings_and_statement_info_are_cached_with_the_sync_reads(analyzer):
+    connection = get_async_db_connection()
+    assert analyzer.add_category_mapping('coffee', 'Dining', 'expense')
+    analyzer.db_connection.insert_documents([{'statement_hash': 'a', 'filename': 'a.pdf'}])
+
+    results, hits = _reads(connection, mappings=connection.find_category_mappings(),
+                           statements=connection.find_statement_info())
+    assert hits == 0
+    assert [(m['term'], m['category']) for m in results['mappings']] == [('coffee', 'Dining')]
+    assert [s['filename'] for s in results['statements']] == ['a.pdf']
+
+    _, hits = _reads(connection, mappings=connection.find_category_mappings(),
+                     statements=connection.find_statement_info())
+    assert hits == 2
+
+    # The synchronous categorizer load reads the same cache entry
+    hits = connection.cache.hits
+    load_categorizer(analyzer.db_connection)
+    assert connection.cache.hits == hits + 1
+
+
+def test_category_mapping_writes_invalidate_async_reads(analyzer):
+    connection = get_async_db_connection()
+    _reads(connection, mappings=connection.find_category_mappings())
+
+    assert analyzer.add_category_mapping('uber', 'Transport', 'expense')
+    results, hits = _reads(connection, mappings=connection.find_category_mappings())
+    assert hits == 0
+    assert [m['term'] for m in results['mappings']] == ['uber']
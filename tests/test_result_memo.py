@@ -0,0 +1,100 @@
+# tests/test_result_memo.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import result_memo
+
+from benchmarks.synthetic import make_statement
+from transaction_store import to_documents
+
+
+def _summary(analyzer):
+    memo = analyzer.result_memo
+    hits = memo.hits
+    summary = analyzer.get_transaction_summary()
+    return summary, memo.hits > hits
+
+
+def test_results_are_memoized_and_returned_as_copies(analyzer):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10))
+    first, hit = _summary(analyzer)
+    assert not hit
+    first['transaction_count'] = -1
+
+    second, hit = _summary(analyzer)
+    assert hit
+    assert second['transaction_count'] == 10
+
+
+def test_saving_a_statement_invalidates_results(analyzer):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10))
+    _summary(analyzer)
+
+    analyzer.analyzer.save_bank_statement(make_statement(pages=2, rows_per_page=10))
+    assert analyzer.result_memo.stats()['entries'] == 0
+    summary, hit = _summary(analyzer)
+    assert not hit
+    assert summary['transaction_count'] == 20
+
+
+def test_category_mappings_invalidate_every_result(analyzer):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10))
+    _summary(analyzer)
+
+    assert analyzer.add_category_mapping('coffee', 'Dining', 'expense')
+    _, hit = _summary(analyzer)
+    assert not hit
+
+
+def test_writes_to_a_users_transactions_change_their_results_only(analyzer):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10))
+    frame = analyzer.snapshot().frame
+    trends = analyzer.insights.get_monthly_trends(months=1200, user_id='alice')
+    analyzer.insights.get_monthly_trends(months=1200, user_id='bob')
+    assert trends == {}
+
+    documents = to_documents(frame, user_id='alice', account='acc', statement_hash='s')
+    assert analyzer.db_connection.upsert_transactions(documents) == len(frame)
+
+    hits = analyzer.result_memo.hits
+    assert analyzer.insights.get_monthly_trends(months=1200, user_id='bob') == {}
+    assert analyzer.result_memo.hits == hits + 1
+    trends = analyzer.insights.get_monthly_trends(months=1200, user_id='alice')
+    assert analyzer.result_memo.hits == hits + 1
+    assert sum(month['debits'] for month in trends.values()) == pytest.approx(frame['debits'].sum() / 100)
+
+
+def test_fallbacks_after_handled_errors_are_not_memoized(analyzer, monkeypatch):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10))
+    frame = analyzer.snapshot().frame
+    documents = to_documents(frame, user_id='alice', account='acc', statement_hash='s')
+    analyzer.db_connection.upsert_transactions(documents)
+
+    def unavailable(*args):
+        raise RuntimeError("database unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(analyzer.db_connection, 'find_rollups', unavailable)
+        assert analyzer.insights.get_monthly_trends(months=1200, user_id='alice') == {}
+    assert analyzer.result_memo.stats()['entries'] == 0
+
+    trends = analyzer.insights.get_monthly_trends(months=1200, user_id='alice')
+    assert sum(month['debits'] for month in trends.values()) == pytest.approx(frame['debits'].sum() / 100)
+
+
+def test_now_relative_results_are_keyed_by_date(analyzer, monkeypatch):
+    analyzer.analyzer.save_bank_statement(make_statement(pages=1, rows_per_page=10))
+    analyzer.insights.get_monthly_trends(months=1200, user_id='alice')
+    hits = analyzer.result_memo.hits
+    analyzer.insights.get_monthly_trends(months=1200, user_id='alice')
+    assert analyzer.result_memo.hits == hits + 1
+
+    class Tomorrow(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(days=1)
+
+    monkeypatch.setattr(result_memo, 'datetime', Tomorrow)
+    analyzer.insights.get_monthly_trends(months=1200, user_id='alice')
+    assert analyzer.result_memo.hits == hits + 1
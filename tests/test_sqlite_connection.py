@@ -0,0 +1,69 @@
+# tests/test_sqlite_connection.py
+from datetime import datetime
+
+import pytest
+
+from connection import statement_period_query
+from sqlite_connection import SQLiteConnection, translate_query
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = SQLiteConnection(str(tmp_path / 'test.db'))
+    yield connection
+    connection.close_connection()
+
+
+@pytest.fixture
+def documents(connection):
+    connection.insert_documents([
+        {'statement_hash': 'march', 'period': {'start': '2024-03-01', 'end': '2024-03-31'},
+         'total': 10, 'tags': 'fees'},
+        {'statement_hash': 'april', 'period': {'start': '2024-04-01', 'end': '2024-04-30'},
+         'total': 20, 'note': None},
+        {'statement_hash': 'undated', 'total': 30, 'tags': 'Monthly FEES'},
+    ])
+    return connection
+
+
+def _hashes(connection, query, sort_by=None):
+    return [doc['statement_hash'] for doc in connection.find_documents(query, sort_by=sort_by)]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ({}, ['march', 'april', 'undated']),
+    ({'statement_hash': 'april'}, ['april']),
+    ({'total': {'$gt': 10, '$lte': 30}}, ['april', 'undated']),
+    ({'total': {'$ne': 20}}, ['march', 'undated']),
+    ({'statement_hash': {'$in': ['march', 'undated']}}, ['march', 'undated']),
+    ({'statement_hash': {'$nin': ['march']}}, ['april', 'undated']),
+    ({'statement_hash': {'$in': []}}, []),
+    ({'period.start': {'$gte': '2024-04-01'}}, ['april']),
+    ({'note': {'$exists': True}}, ['april']),
+    ({'note': {'$exists': False}}, ['march', 'undated']),
+    ({'note': None}, ['march', 'april', 'undated']),
+    ({'period': {'$exists': False}}, ['undated']),
+    ({'tags': {'$regex': 'fee', '$options': 'i'}}, ['march', 'undated']),
+    ({'tags': {'$regex': 'fee'}}, ['march']),
+    ({'$or': [{'total': 10}, {'total': 30}]}, ['march', 'undated']),
+    ({'$and': [{'total': {'$gte': 10}}, {'total': {'$lt': 30}}]}, ['march', 'april']),
+    ({'$nor': [{'total': 10}, {'total': 30}]}, ['april']),
+])
+def test_queries_match_as_in_mongodb(documents, query, expected):
+    assert _hashes(documents, query) == expected
+
+
+def test_statement_period_query_includes_undated_statements_sorted(documents):
+    query = statement_period_query(datetime(2024, 3, 15), datetime(2024, 3, 20))
+    assert _hashes(documents, query, sort_by=[('total', -1)]) == ['undated', 'march']
+
+
+def test_unsupported_queries_are_rejected():
+    with pytest.raises(ValueError):
+        translate_query({'total': {'$elemMatch': {}}}, [])
+    with pytest.raises(ValueError):
+        translate_query({"total') OR 1 --": 1}, [])
+
+
+def test_the_apps_queries_are_index_searches(connection):
+    assert [result['query'] for result in connection.explain_queries() if result['collscan']] == []
@@ -0,0 +1,62 @@
+# tests/test_table_parser.py
+from io import StringIO
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_table_parser import ReadHtmlAnalytics
+from benchmarks.synthetic import make_statement
+from processing import StreamlitAnalytics
+from table_parser import parse_upstage_table
+
+HEADER = ("<thead><tr><td>Date</td><td>Description</td><td>Fees (R)</td><td>Debits (R)</td>"
+          "<td>Credits (R)</td><td>Balance (R)</td></tr></thead>")
+
+TABLES = {
+    'plain': f"<table id='0'>{HEADER}<tbody>"
+             "<tr><td>01/03/2024</td><td>Salary</td><td></td><td></td><td>1,000.00</td><td>1,100.00</td></tr>"
+             "<tr><td>02/03/2024</td><td>Coffee</td><td></td><td>35.50</td><td></td><td>1,064.50</td></tr>"
+             "</tbody></table>",
+    'rowspan': f"<table id='1'>{HEADER}<tbody>"
+               "<tr><td rowspan='2'>03/03/2024</td><td>Shop</td><td></td><td>10.00</td><td></td><td>90.00</td></tr>"
+               "<tr><td>Fee</td><td>5.00</td><td></td><td></td><td>85.00</td></tr>"
+               "</tbody></table>",
+    'colspan': f"<table id='2'>{HEADER}<tbody>"
+               "<tr><td>04/03/2024</td><td colspan='2'>Transfer from savings</td><td></td><td>500.00</td>"
+               "<td>585.00</td></tr>"
+               "</tbody></table>",
+    'no header': "<table id='3'><tr><td>Date</td><td>Description</td><td>Debits (R)</td></tr>"
+                 "<tr><td>05/03/2024</td><td>Rent &amp; levies</td><td>4,500.00</td></tr></table>",
+    'two header rows': "<table id='4'><thead><tr><td colspan='2'>Transaction</td><td>Amounts</td></tr>"
+                       "<tr><td>Date</td><td>Description</td><td>Debits (R)</td></tr></thead>"
+                       "<tbody><tr><td>06/03/2024</td><td>Airtime</td><td>29.00</td></tr></tbody></table>",
+}
+
+
+def _elements(*tables):
+    return {'elements': [{'category': 'table', 'content': {'html': html}} for html in tables]}
+
+
+@pytest.mark.parametrize('name', TABLES)
+def test_column_names_match_read_html(name):
+    expected = pd.read_html(StringIO(TABLES[name]))[0]
+    if isinstance(expected.columns, pd.MultiIndex):
+        expected.columns = expected.columns.map('_'.join)
+    names, arrays = parse_upstage_table(TABLES[name])
+    assert names == list(expected.columns)
+    assert [len(array) for array in arrays] == [len(expected)] * len(names)
+
+
+@pytest.mark.parametrize('json_data', [
+    make_statement(pages=3, rows_per_page=25),
+    _elements(TABLES['plain'], TABLES['rowspan'], TABLES['colspan']),
+], ids=['synthetic', 'spans'])
+def test_transactions_match_the_read_html_path(json_data):
+    expected = ReadHtmlAnalytics()._extract_tables_to_dataframe(json_data)
+    actual = StreamlitAnalytics()._extract_tables_to_dataframe(json_data)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_empty_tables_are_skipped():
+    assert parse_upstage_table("<table id='0'><tr><td> </td></tr></table>") is None
@@ -0,0 +1,58 @@
+# tests/test_transaction_store.py
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+import transaction_store
+from benchmarks.synthetic import make_statement
+from processing import StreamlitAnalytics
+from transaction_store import TransactionStore, compute_statement_hash
+
+
+@pytest.fixture
+def analytics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return StreamlitAnalytics()
+
+
+def test_statements_stored_by_another_parser_version_are_parsed_again(analytics, monkeypatch):
+    json_data = make_statement(pages=1, rows_per_page=10)
+    statement_hash = compute_statement_hash(json_data)
+    expected = analytics.extract_tables_to_dataframe(json_data)
+
+    # A stale parse of the same statement, as an older parser might have stored it
+    with monkeypatch.context() as patch:
+        patch.setattr(transaction_store, 'PARSER_VERSION', transaction_store.PARSER_VERSION - 1)
+        analytics.store.write(statement_hash, expected.head(3))
+
+    assert analytics.store.read(statement_hash) is None
+    assert len(analytics.extract_tables_to_dataframe(json_data)) == len(expected)
+    assert len(analytics.store.read(statement_hash)) == len(expected)
+
+
+def test_files_without_a_parser_version_are_not_served(tmp_path):
+    store = TransactionStore(str(tmp_path))
+    json_data = make_statement(pages=1, rows_per_page=5)
+    path = store.write('abc', StreamlitAnalytics()._extract_tables_to_dataframe(json_data))
+    pq.write_table(pq.read_table(path).replace_schema_metadata(None), path)
+
+    assert store.read('abc') is None
+
+
+def test_store_evicts_least_recently_used_statements_but_keeps_the_latest(tmp_path):
+    frame = StreamlitAnalytics()._extract_tables_to_dataframe(make_statement(pages=1, rows_per_page=50))
+    store = TransactionStore(str(tmp_path))
+    size = os.path.getsize(store.write('probe', frame))
+    os.remove(store.path_for('probe'))
+
+    store.max_bytes = 3 * size
+    for age, statement_hash in enumerate(['latest', 'old', 'read', 'new']):
+        os.utime(store.write(statement_hash, frame), (age, age))
+        if statement_hash == 'latest':
+            store.set_latest(statement_hash)
+    store.read('read')
+    store.write('newest', frame)
+
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.parquet')) == [
+        'latest.parquet', 'newest.parquet', 'read.parquet']
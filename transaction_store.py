@@ -0,0 +1,298 @@
+# transaction_store.py
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Canonical transaction schema: amounts are integer cents, text columns are dictionary-encoded
+TRANSACTION_SCHEMA = pa.schema([
+    ('date', pa.timestamp('ns')),
+    ('description', pa.dictionary(pa.int32(), pa.string())),
+    ('debits', pa.int64()),
+    ('credits', pa.int64()),
+    ('balance', pa.int64()),
+    ('category', pa.dictionary(pa.int32(), pa.string())),
+    ('fees', pa.int64()),
+])
+
+AMOUNT_COLUMNS = ('debits', 'credits', 'balance', 'fees')
+CATEGORICAL_COLUMNS = ('description', 'category')
+CENTS_PER_RAND = 100
+
+# Version of the statement-to-transactions parse. Bump it whenever table parsing, amount
+# parsing or normalization changes the frame a statement produces; stored statements
+# written by another version are re-parsed instead of being served stale.
+PARSER_VERSION = 1
+PARSER_VERSION_KEY = b'parser_version'
+
+DEFAULT_STORE_MAX_MB = 256
+
+COLUMN_DEFAULTS = {
+    'description': 'Unknown',
+    'debits': 0,
+    'credits': 0,
+    'balance': 0,
+    'category': 'Uncategorized',
+    'fees': 0,
+}
+
+
+def compute_statement_hash(json_data: dict) -> str:
+    """Compute a content hash of a statement from the table HTML it was parsed from"""
+    digest = hashlib.sha256()
+    for element in json_data.get('elements', []):
+        if element.get('category') == 'table':
+            digest.update(element.get('content', {}).get('html', '').encode('utf-8'))
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def to_cents(values) -> pd.Series:
+    """Convert rand amounts to int64 cents, treating missing values as zero"""
+    rands = pd.to_numeric(pd.Series(values), errors='coerce').fillna(0.0).astype('float64')
+    return pd.Series(np.rint(rands.to_numpy() * CENTS_PER_RAND).astype(np.int64), index=rands.index)
+
+
+def to_rands(cents):
+    """Convert int64 cents (a scalar or a Series) to float rands for display and charts"""
+    return cents / CENTS_PER_RAND
+
+
+def amounts_in_rands(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of a canonical frame with its amount columns as float rands, for display"""
+    df = df.copy()
+    for col in AMOUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = to_rands(df[col])
+    return df
+
+
+def is_canonical(df: pd.DataFrame) -> bool:
+    """Check whether a frame already has exactly the canonical columns and dtypes"""
+    if list(df.columns) != TRANSACTION_SCHEMA.names:
+        return False
+    return (
+        df['date'].dtype == 'datetime64[ns]'
+        and all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in CATEGORICAL_COLUMNS)
+        and all(df[col].dtype == np.int64 for col in AMOUNT_COLUMNS)
+    )
+
+
+def conform_to_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of a transactions DataFrame with exactly the canonical columns and dtypes.
+
+    Float amounts are read as rands and converted to int64 cents; integer
+    amounts are taken to be cents already. Frames that are already canonical
+    are only copied.
+    """
+    df = df.copy()
+    if is_canonical(df):
+        return df.reset_index(drop=True)
+
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce').astype('datetime64[ns]')
+    else:
+        df['date'] = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+
+    for col, default in COLUMN_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+        if col in AMOUNT_COLUMNS:
+            if pd.api.types.is_integer_dtype(df[col]):
+                df[col] = df[col].astype(np.int64)
+            else:
+                df[col] = to_cents(df[col])
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            if df[col].hasnans and default not in df[col].cat.categories:
+                df[col] = df[col].cat.add_categories([default])
+            df[col] = df[col].fillna(default)
+        else:
+            df[col] = df[col].fillna(default).astype(str).astype('category')
+
+    return df[TRANSACTION_SCHEMA.names].reset_index(drop=True)
+
+
+def concat_transactions(frames) -> pd.DataFrame:
+    """Concatenate canonical frames, keeping the canonical dtypes (categories are unioned)"""
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(
+        [df.astype({col: str for col in CATEGORICAL_COLUMNS}) for df in frames],
+        ignore_index=True
+    )
+    return conform_to_schema(combined)
+
+
+def transaction_fingerprint(record: dict, occurrence: int = 0) -> str:
+    """Stable hash identifying a transaction across statements.
+
+    Built from its date, amounts, running balance and whitespace- and
+    case-normalized description, so the same transaction printed on two
+    overlapping statements gets the same fingerprint. Identical rows on one
+    statement (two equal purchases on a day without a running balance) are
+    told apart by occurrence, their position among the identical rows; the
+    first keeps the plain fingerprint.
+    """
+    date = record.get('date')
+    description = " ".join(str(record.get('description', '')).lower().split())
+    parts = [
+        date.strftime('%Y-%m-%d') if date is not None else '',
+        str(int(record.get('debits', 0))),
+        str(int(record.get('credits', 0))),
+        str(int(record.get('balance', 0))),
+        description,
+    ]
+    if occurrence:
+        parts.append(str(occurrence))
+    return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
+
+
+def to_documents(df: pd.DataFrame, **fields) -> list:
+    """Convert one statement's transactions frame into one document per transaction, with extra fields set on each.
+
+    Amounts stay in integer cents; ``seq`` records each row's position in the frame
+    and ``fingerprint`` identifies the transaction (see transaction_fingerprint).
+    """
+    df = conform_to_schema(df).astype({col: str for col in CATEGORICAL_COLUMNS})
+    documents = []
+    occurrences = {}
+    for seq, record in enumerate(df.to_dict('records')):
+        if pd.isna(record['date']):
+            record['date'] = None
+        else:
+            record['date'] = record['date'].to_pydatetime()
+        record['seq'] = seq
+        fingerprint = transaction_fingerprint(record)
+        occurrence = occurrences.get(fingerprint, 0)
+        occurrences[fingerprint] = occurrence + 1
+        record['fingerprint'] = transaction_fingerprint(record, occurrence) if occurrence else fingerprint
+        record.update(fields)
+        documents.append(record)
+    return documents
+
+
+def from_documents(documents) -> pd.DataFrame:
+    """Build a canonical frame from transaction documents"""
+    documents = list(documents)
+    if not documents:
+        return pd.DataFrame()
+    return conform_to_schema(pd.DataFrame(documents, columns=TRANSACTION_SCHEMA.names))
+
+
+class TransactionStore:
+    """Parquet store of normalized transactions keyed by statement content hash.
+
+    Each file records the PARSER_VERSION it was parsed with; files from another
+    version read as missing, so the statement is parsed again and rewritten.
+    When the total size exceeds the limit, the least recently used statements
+    (by file mtime, refreshed on every read) are evicted; the latest statement
+    is never evicted.
+    """
+
+    def __init__(self, base_dir: str = os.path.join("data", "transactions"), max_bytes: int = None):
+        self.base_dir = base_dir
+        self.latest_pointer = os.path.join(base_dir, "LATEST")
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_STORE_MAX_MB * 1024 * 1024
+        self.logger = logging.getLogger(__name__)
+
+    def path_for(self, statement_hash: str) -> str:
+        """Get the Parquet path for a statement hash"""
+        return os.path.join(self.base_dir, f"{statement_hash}.parquet")
+
+    def has(self, statement_hash: str) -> bool:
+        """Check whether a statement has already been normalized"""
+        return os.path.exists(self.path_for(statement_hash))
+
+    def write(self, statement_hash: str, df: pd.DataFrame) -> str:
+        """Write normalized transactions for a statement and return the file path"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        path = self.path_for(statement_hash)
+        table = pa.Table.from_pandas(conform_to_schema(df), schema=TRANSACTION_SCHEMA, preserve_index=False)
+        table = table.replace_schema_metadata({PARSER_VERSION_KEY: str(PARSER_VERSION).encode()})
+
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        self.logger.info(f"Stored {table.num_rows} transactions for statement {statement_hash[:12]}")
+        self.evict(keep=path)
+        return path
+
+    def read(self, statement_hash: str):
+        """Read normalized transactions for a statement, or None if not stored or parsed by another parser version"""
+        path = self.path_for(statement_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            table = pq.read_table(path)
+            version = (table.schema.metadata or {}).get(PARSER_VERSION_KEY)
+            if version != str(PARSER_VERSION).encode():
+                self.logger.info(f"Statement {statement_hash[:12]} was stored by parser version "
+                                 f"{version.decode() if version else 'unknown'}; parsing it again")
+                return None
+            df = conform_to_schema(table.to_pandas())
+        except Exception as e:
+            self.logger.error(f"Failed to read transaction store {path}: {str(e)}")
+            return None
+
+        # Refresh the mtime so LRU eviction sees this statement as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def _entries(self):
+        """List (mtime, size, path) for every stored statement"""
+        entries = []
+        try:
+            with os.scandir(self.base_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".parquet"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def evict(self, keep: str = None):
+        """Remove least recently used statements until the store fits its size limit"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        latest = self.latest_hash()
+        protected = {keep, self.path_for(latest) if latest else None}
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path in protected:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            self.logger.info(f"Evicted {evicted} statements from the transaction store")
+
+    def set_latest(self, statement_hash: str):
+        """Mark a statement as the latest saved one"""
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_path = f"{self.latest_pointer}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(statement_hash)
+        os.replace(tmp_path, self.latest_pointer)
+
+    def latest_hash(self):
+        """Get the hash of the latest saved statement, or None"""
+        try:
+            with open(self.latest_pointer, "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
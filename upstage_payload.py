@@ -0,0 +1,56 @@
+# upstage_payload.py
+import ijson
+
+# Top-level fields of a document-parse response kept alongside the table elements
+METADATA_KEYS = frozenset(['api', 'model', 'ocr', 'usage', 'filename', 'period', 'pdf_sha256', 'statement_hash'])
+KEPT_CATEGORIES = frozenset(['table'])
+
+
+def _kept_element(element: dict) -> bool:
+    return element.get('category') in KEPT_CATEGORIES
+
+
+def read_slim_payload(fp) -> dict:
+    """Incrementally parse a document-parse JSON payload, keeping only table elements and metadata.
+
+    The payload is read as a stream of parse events, so the document-wide
+    ``content``, ``merged_elements`` and non-table elements are skipped without
+    ever being built in memory.
+
+    Args:
+        fp: A binary file-like object holding the JSON payload.
+    """
+    data = {}
+    elements = []
+    builder = None
+    target = None
+
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if builder is None:
+            if prefix != 'elements.item' and prefix not in METADATA_KEYS:
+                continue
+            if event not in ('start_map', 'start_array'):
+                if event not in ('map_key', 'end_map', 'end_array'):
+                    data[prefix] = value
+                continue
+            builder = ijson.ObjectBuilder()
+            target = prefix
+
+        builder.event(event, value)
+        if prefix == target and event in ('end_map', 'end_array'):
+            if target == 'elements.item':
+                if _kept_element(builder.value):
+                    elements.append(builder.value)
+            else:
+                data[target] = builder.value
+            builder = None
+
+    data['elements'] = elements
+    return data
+
+
+def slim_payload(data: dict) -> dict:
+    """Drop everything but table elements and metadata from an in-memory payload"""
+    slim = {key: value for key, value in data.items() if key in METADATA_KEYS}
+    slim['elements'] = [element for element in data.get('elements', []) if _kept_element(element)]
+    return slim